@@ -11,38 +11,24 @@ PNG (8-bit RGBA)
     B = 子 Transform のローカル +X 軸ベクトルのワールド Z 成分 (−1..1 → 0..1)
     A = 階層深度 α  (0,1,2,3 → 19/255,7/255,5.5/255,5/255)
 """
-import os, sys, site, inspect
+import os
 import numpy as np
 import maya.cmds as cmds
-import maya.api.OpenMaya as om2
 
-# -------- サードパーティ検索パス ------------------------------------------------
-def _module_dir(fallback: str | None = None) -> str:
-    if "__file__" in globals():
-        return os.path.dirname(__file__)
-    try:
-        p = inspect.getsourcefile(sys.modules[__name__])  # type: ignore[arg-type]
-        if p:
-            return os.path.dirname(p)
-    except TypeError:
-        pass
-    return fallback or os.getcwd()
+# Pillow は PNG を書く時に pp2_writers（pp2_env.require）が読む
 
-_here = _module_dir()
-site.addsitedir(os.path.join(os.path.dirname(_here), "third_party"))
-
-ext_site = r"D:\Maya2023\Lib\site-packages"      # Pillow などを置いたフォルダ
-if ext_site not in sys.path:
-    sys.path.append(ext_site)
-
-from PIL import Image   # noqa: F401
+from pp2_encode import DEPTH_ALPHA, encode_xvector, grid_from_uvs
+from pp2_profile import make_profiler
+from pp2_index import read_uvs, snapshot
+from pp2_snapshot import layout_cells
+from pp2_writers import save_png_rgba
 
 # -------------------------------------------------------------------------------
 class PP2XVectorExporter:
     """X-Vector PNG を書き出すユーティリティ"""
 
     UVSET: str = "pp2_uv"
-    DEPTH_ALPHA = {0: 19/255.0, 1: 7/255.0, 2: 5.5/255.0, 3: 5/255.0}
+    DEPTH_ALPHA = DEPTH_ALPHA
 
     # ------------------------------------------------------------------
     def __init__(
@@ -50,6 +36,7 @@ class PP2XVectorExporter:
         root: str | None = None,
         out_dir: str | None = None,
         base_name: str = "",
+        profile: bool | str = False,
     ):
         """
         Parameters
@@ -57,59 +44,58 @@ class PP2XVectorExporter:
         root      : ルート Transform 名（None なら現在の選択）
         out_dir   : 保存フォルダ
         base_name : ファイル名ベース（拡張子なし）
+        profile   : True / パスなら工程ごとの時間と cmds 呼び出し回数を JSON に保存
+                    （True なら <out_dir>/<base_name>.pp2profile.json）
         """
         self.root      = root or self._require_selection()
         self.out_dir   = out_dir or r"D:/PP2_out2"
         self.base_name = base_name or "pp2_xvector"
+        self.profile   = profile
 
     # ------------------------------------------------------------------
     # public API
     # ------------------------------------------------------------------
     def export(self) -> None:
         """X-Vector テクスチャを書き出し"""
-        tree = self._enum_tree(self.root)
-
-        # --- UV グリッド取得 -----------------------------------------
-        uv_u, uv_v, u_set, v_set = {}, {}, set(), set()
-        for tr, _, _ in tree:
-            mesh = cmds.listRelatives(tr, s=True, ni=True, f=True, type="mesh")[0]
-            self._ensure_uv(mesh)
-
-            u, v = cmds.polyEditUV(f"{mesh}.map[0]", q=True)
-            u, v = round(u, 6), round(v, 6)
-            uv_u[tr], uv_v[tr] = u, v
-            u_set.add(u), v_set.add(v)
-
-        cols = sorted(u_set)
-        rows = sorted(v_set, reverse=True)
-        u_idx = {u: i for i, u in enumerate(cols)}
-        v_idx = {v: i for i, v in enumerate(rows)}
-        nC, nR = len(cols), len(rows)
-
-        tex = np.zeros((nR, nC, 4), np.float32)
-
-        # --- X-Vector サンプリング -----------------------------------
-        for tr, _, depth in tree:
-            r = v_idx[uv_v[tr]]
-            c = u_idx[uv_u[tr]]
-
-            m = cmds.xform(tr, q=True, ws=True, m=True)
-            vx = om2.MVector(m[0], m[1], m[2]).normalize()  # ローカル+X → ワールド
-
-            tex[r, c, 0] = vx.x * 0.5 + 0.5  # -1..1 → 0..1
-            tex[r, c, 1] = vx.z * 0.5 + 0.5
-            tex[r, c, 2] = vx.y * 0.5 + 0.5
-            tex[r, c, 3] = self.DEPTH_ALPHA.get(depth, 5/255.0)
-
-        # --- 保存 -----------------------------------------------------
-        os.makedirs(self.out_dir, exist_ok=True)
-        out_path = os.path.join(self.out_dir, f"{self.base_name}.png")
-        self._save_png_rgba(out_path, tex)
-
-        cmds.inViewMessage(
-            amg=f"[PP2] X-Vector 書き出し完了 → {out_path}",
-            pos="midCenter", fade=True
-        )
+        prof = make_profiler(
+            self.profile, "PP2XVectorExporter",
+            os.path.join(self.out_dir, f"{self.base_name}.pp2profile.json"))
+
+        with prof.attach():
+            with prof.stage("snapshot"):
+                snap  = snapshot(self.root)
+
+            # --- レイアウト記録が無い / 古い → pp2_uv からグリッド再構築 ----
+            with prof.stage("grid"):
+                found = layout_cells(snap, self.UVSET)
+                if found is None:
+                    read_uvs(snap, self.UVSET)
+                    for i in np.flatnonzero(~snap.has_uv):
+                        mesh = snap.shapes[i]
+                        if mesh is None:
+                            cmds.error(f"mesh がありません: {snap.paths[i]}")
+                        self._ensure_uv(mesh)
+                        snap.uvs[i] = cmds.polyEditUV(f"{mesh}.map[0]", q=True)
+                    found = grid_from_uvs(snap.uvs)
+
+            # --- X-Vector エンコード (pp2_encode) ----------------------
+            cells, grid = found
+            with prof.stage("encode"):
+                tex = encode_xvector(snap.matrices, snap.depths, cells, grid)
+
+            # --- 保存 -------------------------------------------------
+            with prof.stage("write"):
+                os.makedirs(self.out_dir, exist_ok=True)
+                out_path = os.path.join(self.out_dir, f"{self.base_name}.png")
+                self._save_png_rgba(out_path, tex)
+
+        msg = f"[PP2] X-Vector 書き出し完了 → {out_path}"
+        if prof.enabled:
+            prof.note(nodes=len(snap), grid=list(grid), memo=snap.memo)
+            prof.note_texture("xvector", out_path, grid)
+            print(f"[PP2] profile → {prof.save()}")
+            msg += "  | " + prof.summary()
+        cmds.inViewMessage(amg=msg, pos="midCenter", fade=True)
 
     # ------------------------------------------------------------------
     # internal helpers
@@ -121,18 +107,6 @@ class PP2XVectorExporter:
             cmds.error("幹 Transform を 1 つ選択してください")
         return sel[0]
 
-    @classmethod
-    def _enum_tree(cls, root: str):
-        """深さ優先で (node, parentIdx, depth) を列挙"""
-        st, out = [(root, -1, 0)], []
-        while st:
-            node, pidx, d = st.pop()
-            out.append((node, pidx, d))
-            for ch in reversed(cmds.listRelatives(node, c=True, f=True,
-                                                  type="transform") or []):
-                st.append((ch, len(out)-1, d+1))
-        return out
-
     # ----------------------------------------------------------
     def _ensure_uv(self, mesh: str) -> None:
         """mesh に self.UVSET を準備しカレント化"""
@@ -143,8 +117,7 @@ class PP2XVectorExporter:
     # ----------------------------------------------------------
     @staticmethod
     def _save_png_rgba(path: str, arr: np.ndarray) -> None:
-        img8 = np.rint(np.clip(arr, 0.0, 1.0) * 255.0).astype(np.uint8)
-        Image.fromarray(img8, "RGBA").save(path, compress_level=0)
+        save_png_rgba(path, arr)
 
 # ----------------------------------------------------------------------
 # 使い方
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""
+ベンチマーク用 maya スタンドイン
+
+maya.cmds / maya.api.OpenMaya のうち、本リポジトリのスクリプトが使う部分だけを
+プロセス内のシーンモデル (maya._scene) で再現する。呼び出しは回数を数える。
+"""
@@ -0,0 +1,410 @@
+# -*- coding: utf-8 -*-
+"""
+maya スタンドインのシーンモデルと呼び出しカウンタ
+
+ノードは DAG フルパス ("|trunk|branch1") で管理する。
+Transform のローカル行列は Maya と同じ行ベクトル形式 (p' = p @ M)。
+"""
+
+from __future__ import annotations
+import functools, re
+from collections import Counter
+import numpy as np
+
+CALLS: Counter = Counter()          # "cmds.xform" などの呼び出し回数
+
+
+def counted(name: str):
+    """呼び出し回数を CALLS[name] に数えるデコレーター"""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            CALLS[name] += 1
+            return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def count_methods(prefix: str):
+    """クラスの公開メソッドをすべて counted で包むクラスデコレーター"""
+    def deco(cls):
+        for k, v in list(vars(cls).items()):
+            if (callable(v) and not k.startswith("_")
+                    and not isinstance(v, (staticmethod, classmethod, type))):
+                setattr(cls, k, counted(f"{prefix}.{cls.__name__}.{k}")(v))
+        return cls
+    return deco
+
+
+def reset_calls() -> None:
+    CALLS.clear()
+
+
+# ----------------------------------------------------------------------
+class Mesh:
+    """mesh シェイプの中身"""
+
+    def __init__(self, points, counts, ids) -> None:
+        self.points = np.asarray(points, np.float64).reshape(-1, 3)
+        self.counts = list(counts)
+        self.ids    = list(ids)
+        self.uvsets: dict[str, dict] = {}     # 名前 → {"u": [], "v": [], "ids": []}
+        self.current = "map1"
+
+    def uvset(self, name: str) -> dict:
+        return self.uvsets.setdefault(name, {"u": [], "v": [], "ids": []})
+
+    def edges(self) -> np.ndarray:
+        """(E, 2) の辺（フェースの隣接頂点ペアを重複除去、番号順）"""
+        pairs, k = [], 0
+        for n in self.counts:
+            f = self.ids[k:k + n]
+            pairs += [tuple(sorted((f[i], f[(i + 1) % n]))) for i in range(n)]
+            k += n
+        return np.array(sorted(set(pairs)), np.int64).reshape(-1, 2)
+
+
+# ----------------------------------------------------------------------
+# コンポーネント文字列 "node.vtx[0:3]" / "node.e[5]" / "node.f[2]"
+# ----------------------------------------------------------------------
+_COMP = re.compile(r"^(.*)\.(vtx|e|f)\[(\d+)(?::(\d+))?\]$")
+
+
+def parse_component(s: str):
+    """→ (ノード名, 種類, 番号配列)"""
+    m = _COMP.match(s)
+    if m is None:
+        raise RuntimeError(f"not a component: {s}")
+    node, kind, lo, hi = m.groups()
+    return node, kind, np.arange(int(lo), int(hi or lo) + 1, dtype=np.int64)
+
+
+def component_strings(node: str, kind: str, ids) -> list[str]:
+    """番号列 → 連続区間ごとの "node.kind[a:b]" のリスト"""
+    ids = np.unique(np.asarray(ids, np.int64))
+    if not len(ids):
+        return []
+    cut = np.flatnonzero(np.diff(ids) != 1) + 1
+    return [f"{node}.{kind}[{r[0]}:{r[-1]}]" for r in np.split(ids, cut)]
+
+
+def euler_matrix(r) -> np.ndarray:
+    """XYZ オイラー角 [rad] → 行ベクトル形式の回転行列 (Rx · Ry · Rz)"""
+    (cx, cy, cz), (sx, sy, sz) = np.cos(r), np.sin(r)
+    rx = np.array([[1, 0, 0], [0, cx, sx], [0, -sx, cx]])
+    ry = np.array([[cy, 0, -sy], [0, 1, 0], [sy, 0, cy]])
+    rz = np.array([[cz, sz, 0], [-sz, cz, 0], [0, 0, 1]])
+    return rx @ ry @ rz
+
+
+def matrix_euler(m) -> np.ndarray:
+    """euler_matrix の逆"""
+    sy = float(np.clip(-m[0, 2], -1.0, 1.0))
+    if abs(sy) < 1.0 - 1e-9:
+        return np.array([np.arctan2(m[1, 2], m[2, 2]), np.arcsin(sy),
+                         np.arctan2(m[0, 1], m[0, 0])])
+    return np.array([np.arctan2(m[1, 0] * np.sign(sy), m[1, 1]), np.arcsin(sy), 0.0])
+
+
+class Node:
+    """
+    DAG ノード。Transform は Maya と同じ成分を持つ（scale pivot = rotate pivot）
+
+        M = [-rp] · S · R · [rp] · [rpt] · [T]
+
+    成分は update() で書き換える（ローカル行列のキャッシュを捨てるため）。
+    anim に {成分名: f(frame) → 値} を入れるとその成分がアニメーションする
+    （matrix_at / Scene.world_at で評価。matrix は現在値のまま）。
+
+    インスタンスはパスごとに Node を複製して持つ（Scene.instance）。ident は
+    複製元の Node（MObject の同一性に使う）、direct は直接インスタンスされた
+    ノード（親が複数ある）か。複製どうしでローカル値の書き換えは共有しない。
+    """
+
+    __slots__ = ("path", "type", "parent", "children", "t", "r", "s", "rp",
+                 "rpt", "attrs", "mesh", "intermediate", "anim", "ident",
+                 "direct", "_m")
+
+    def __init__(self, path: str, type_: str, parent: str | None) -> None:
+        self.path     = path
+        self.type     = type_
+        self.parent   = parent
+        self.children: list[str] = []
+        self.t, self.r, self.rpt = np.zeros(3), np.zeros(3), np.zeros(3)
+        self.s, self.rp = np.ones(3), np.zeros(3)
+        self.attrs: dict = {}
+        self.mesh: Mesh | None = None
+        self.intermediate = False
+        self.anim: dict = {}
+        self.ident: Node | None = None
+        self.direct = False
+        self._m = None
+
+    @property
+    def name(self) -> str:
+        return self.path.rpartition("|")[2]
+
+    def update(self, **comps) -> None:
+        """t / r / s / rp / rpt を書き換える"""
+        for k, v in comps.items():
+            setattr(self, k, np.asarray(v, np.float64))
+        self._m = None
+
+    @staticmethod
+    def _compose(t, r, s, rp, rpt) -> np.ndarray:
+        sr = s[:, None] * euler_matrix(r)
+        m  = np.eye(4)
+        m[:3, :3] = sr
+        m[3, :3]  = -rp @ sr + rp + rpt + t
+        return m
+
+    @property
+    def matrix(self) -> np.ndarray:
+        if self._m is None:
+            self._m = self._compose(self.t, self.r, self.s, self.rp, self.rpt)
+        return self._m
+
+    def comp_at(self, name: str, frame) -> np.ndarray:
+        """成分 name のフレーム frame での値（frame が None なら現在値）"""
+        fn = self.anim.get(name) if frame is not None else None
+        return getattr(self, name) if fn is None else np.asarray(fn(frame), np.float64)
+
+    def matrix_at(self, frame) -> np.ndarray:
+        if frame is None or not self.anim:
+            return self.matrix
+        return self._compose(*(self.comp_at(k, frame)
+                               for k in ("t", "r", "s", "rp", "rpt")))
+
+    @matrix.setter
+    def matrix(self, m) -> None:
+        """ローカル行列を設定（ピボットは保ち、T で合わせる。せん断は無い前提）"""
+        m = np.asarray(m, np.float64).reshape(4, 4)
+        s = np.linalg.norm(m[:3, :3], axis=1)
+        self.update(s=s, r=matrix_euler(m[:3, :3] / s[:, None]),
+                    t=m[3, :3] + self.rp @ m[:3, :3] - self.rp - self.rpt)
+        self._m = m.copy()
+
+    def set_rp(self, rp) -> None:
+        """rotate pivot を動かす（rpt で補正してオブジェクトは動かさない）"""
+        m = self.matrix
+        self.update(rp=rp, rpt=np.zeros(3))
+        self.matrix = m
+
+
+class Scene:
+    """プロセス内シーン"""
+
+    def __init__(self) -> None:
+        self.nodes: dict[str, Node] = {}
+        self.by_name: dict[str, str] = {}
+        self.top: list[str] = []
+        self.selection: list[str] = []
+        self._world: dict[str, np.ndarray] = {}
+        self._world_t: tuple = (None, {})      # (フレーム, {パス: 行列})
+        self._cbs: dict[tuple, dict] = {}      # (種類, Node | None) → {id: fn}
+        self._cb_key: dict[int, tuple] = {}
+        self._cb_next = 1
+        self.undo_stack: list = []             # 取り消し可能なコマンド（MPxCommand）
+        self.redo_stack: list = []
+
+    # ------------------------------------------------------------------
+    def add(self, name: str, parent: str | None = None, type_: str = "transform",
+            matrix=None, mesh: Mesh | None = None) -> str:
+        path = f"{parent or ''}|{name}"
+        node = Node(path, type_, parent)
+        if matrix is not None:
+            node.matrix = matrix
+        node.mesh = mesh
+        self.nodes[path] = node
+        self.by_name.setdefault(name, path)
+        (self.nodes[parent].children if parent else self.top).append(path)
+        self.dirty()
+        self.emit("dag", None, node, self.nodes[parent] if parent else None)
+        return path
+
+    def instance(self, src: str, parent: str | None) -> str:
+        """src 以下を parent の子としてインスタンスし、新しいフルパスを返す"""
+        root = self.nodes[src]
+        new  = f"{parent or ''}|{root.name}"
+        if new in self.nodes:
+            raise RuntimeError(f"{new} already exists")
+        for p in list(self.iter_dag(src)):
+            n = self.nodes[p]
+            path = new + p[len(src):]
+            par  = parent if p == src else new + n.parent[len(src):]
+            self.add(n.name, par, n.type, mesh=n.mesh)
+            c = self.nodes[path]
+            c.t, c.r, c.s, c.rp, c.rpt = n.t, n.r, n.s, n.rp, n.rpt
+            c.attrs, c.intermediate, c.anim = n.attrs, n.intermediate, n.anim
+            c.ident = n.ident or n
+        root.direct = self.nodes[new].direct = True
+        self.dirty()
+        return new
+
+    def resolve(self, name: str) -> str:
+        """名前 / フルパス / "mesh.map[0]" などのコンポーネント → ノードのフルパス"""
+        name = name.split(".", 1)[0]
+        if name in self.nodes:
+            return name
+        if name in self.by_name and self.by_name[name] in self.nodes:
+            return self.by_name[name]
+        raise RuntimeError(f"No object matches name: {name}")
+
+    def node(self, name: str) -> Node:
+        return self.nodes[self.resolve(name)]
+
+    def _repath(self, node: Node, path: str) -> None:
+        """node 以下のフルパスを付け替える"""
+        old = node.path
+        for p in list(self.iter_dag(old)):
+            n = self.nodes.pop(p)
+            n.path = path + p[len(old):]
+            if n.parent and n.parent.startswith(old):
+                n.parent = path + n.parent[len(old):]
+            n.children = [path + c[len(old):] for c in n.children]
+            self.nodes[n.path] = n
+            self.by_name[n.name] = n.path
+        self.dirty()
+
+    def unique_name(self, name: str) -> str:
+        base, k = name.rstrip("0123456789") or name, 1
+        while name in self.by_name and self.by_name[name] in self.nodes:
+            name, k = f"{base}{k}", k + 1
+        return name
+
+    def rename(self, path: str, name: str) -> str:
+        node = self.nodes[path]
+        name = self.unique_name(name)
+        sibs = self.nodes[node.parent].children if node.parent else self.top
+        new  = f"{node.parent or ''}|{name}"
+        sibs[sibs.index(path)] = new
+        old = node.name
+        self._repath(node, new)
+        self.emit("name", node, node, old)
+        return new
+
+    def reparent(self, path: str, parent: str | None, keep_world: bool = True) -> str:
+        """path を parent (None ならワールド) の子にし、新しいフルパスを返す"""
+        node  = self.nodes[path]
+        world = self.world(path)
+        (self.nodes[node.parent].children if node.parent else self.top).remove(path)
+        node.parent = parent
+        new = f"{parent or ''}|{node.name}"
+        (self.nodes[parent].children if parent else self.top).append(new)
+        self._repath(node, new)
+        if keep_world:
+            pw = self.world(parent) if parent else np.eye(4)
+            node.matrix = world @ np.linalg.inv(pw)
+            self.dirty()
+        self.emit("dag", None, node, self.nodes[parent] if parent else None)
+        return new
+
+    def detach(self, path: str) -> Node:
+        """子を持たないノードをシーンから外す（MDagModifier.undoIt 用。attach で戻す）"""
+        node = self.nodes[path]
+        if node.children:
+            raise RuntimeError(f"{path} has children")
+        (self.nodes[node.parent].children if node.parent else self.top).remove(path)
+        del self.nodes[path]
+        if self.by_name.get(node.name) == path:
+            del self.by_name[node.name]
+        self.dirty()
+        self.emit("dag", None, node, self.nodes[node.parent] if node.parent else None)
+        return node
+
+    def attach(self, node: Node) -> None:
+        """detach したノードを同じ親・同じ名前で戻す"""
+        self.nodes[node.path] = node
+        self.by_name.setdefault(node.name, node.path)
+        (self.nodes[node.parent].children if node.parent else self.top).append(node.path)
+        self.dirty()
+        self.emit("dag", None, node, self.nodes[node.parent] if node.parent else None)
+
+    # ------------------------------------------------------------------
+    def world(self, path: str) -> np.ndarray:
+        """ワールド行列（Transform はローカル × 親、シェイプは親と同じ）"""
+        m = self._world.get(path)
+        if m is None:
+            node = self.nodes[path]
+            pw = self.world(node.parent) if node.parent else np.eye(4)
+            m = node.matrix @ pw if node.type == "transform" else pw
+            self._world[path] = m
+        return m
+
+    def world_at(self, path: str, frame) -> np.ndarray:
+        """フレーム frame でのワールド行列（直近 1 フレーム分だけキャッシュ）"""
+        if frame is None:
+            return self.world(path)
+        if self._world_t[0] != frame:
+            self._world_t = (frame, {})
+        cache = self._world_t[1]
+        m = cache.get(path)
+        if m is None:
+            node = self.nodes[path]
+            pw = self.world_at(node.parent, frame) if node.parent else np.eye(4)
+            m = node.matrix_at(frame) @ pw if node.type == "transform" else pw
+            cache[path] = m
+        return m
+
+    def dirty(self) -> None:
+        self._world.clear()
+        self._world_t = (None, {})
+
+    def changed(self, path: str, attr: str) -> None:
+        """path のアトリビュート attr を書き換えた（ワールド行列を捨て、コールバックを呼ぶ）"""
+        self.dirty()
+        node = self.nodes[path]
+        self.emit("attr", node, node, attr)
+
+    # ------------------------------------------------------------------
+    # メッセージコールバック（OpenMaya の MDagMessage / MNodeMessage が使う）
+    # ------------------------------------------------------------------
+    def add_callback(self, kind: str, node, fn) -> int:
+        """kind = "dag" / "name" / "attr" / "time" / "scene"。node=None なら全ノード"""
+        cid, self._cb_next = self._cb_next, self._cb_next + 1
+        self._cbs.setdefault((kind, node), {})[cid] = fn
+        self._cb_key[cid] = (kind, node)
+        return cid
+
+    def remove_callback(self, cid: int) -> None:
+        key = self._cb_key.pop(cid, None)
+        if key is None:
+            raise RuntimeError(f"unknown callback id: {cid}")
+        del self._cbs[key][cid]
+
+    def emit(self, kind: str, node, *args) -> None:
+        """node に登録されたコールバックと全ノード向けのものを fn(*args) で呼ぶ"""
+        for key in ((kind, node), (kind, None)) if node is not None else ((kind, None),):
+            for fn in list(self._cbs.get(key, {}).values()):
+                fn(*args)
+
+    def world_rp(self, path: str) -> np.ndarray:
+        node = self.nodes[path]
+        return np.append(node.rp, 1.0) @ self.world(path)
+
+    def iter_dag(self, root: str):
+        """root 以下を深さ優先（子は登録順）で列挙"""
+        st = [root]
+        while st:
+            p = st.pop()
+            yield p
+            st.extend(reversed(self.nodes[p].children))
+
+
+SCENE = Scene()
+
+
+def new_scene() -> Scene:
+    """シーンを作り直す（cmds / OpenMaya スタンドインが参照するのは常に SCENE）"""
+    global SCENE
+    SCENE.emit("scene", None, 1)                    # MSceneMessage.kBeforeNew
+    old, SCENE = SCENE, Scene()
+    # ノードに付かないコールバック（DAG / 時間 / シーン）は Maya と同じく引き継ぐ
+    SCENE._cb_key = {c: k for c, k in old._cb_key.items() if k[1] is None}
+    SCENE._cbs = {k: v for k, v in old._cbs.items() if k[1] is None}
+    SCENE._cb_next = old._cb_next
+    return SCENE
+
+
+def scene() -> Scene:
+    return SCENE
@@ -0,0 +1,710 @@
+# -*- coding: utf-8 -*-
+"""
+maya.api.OpenMaya スタンドイン
+
+take_snapshot / read_layout / PP2UVAutoSquare(batch=True) / PivotMover /
+PivotOrienter(batch=True) / PP2ShellExtractor / pp2_index が使う範囲だけを実装する。
+メッセージコールバックは cmds / OpenMaya の書き換え操作から呼ばれる（_scene.Scene.emit）。
+公開メソッドは "om2.<クラス>.<メソッド>" として呼び出し回数を数える。
+"""
+
+from __future__ import annotations
+import numpy as np
+
+from maya import _scene
+from maya._scene import count_methods, counted
+
+
+def _sc():
+    return _scene.scene()
+
+
+class MSpace:
+    kTransform, kObject, kWorld = 1, 2, 4
+
+
+class MFn:
+    kTransform, kMesh = 110, 296
+    kMeshEdgeComponent, kMeshPolygonComponent, kMeshVertComponent = 542, 543, 546
+
+
+def _api_type(node) -> int:
+    return MFn.kMesh if node.type == "mesh" else MFn.kTransform
+
+
+# ----------------------------------------------------------------------
+# 値型
+# ----------------------------------------------------------------------
+class MPoint:
+    __slots__ = ("x", "y", "z", "w")
+
+    def __init__(self, x=0.0, y=0.0, z=0.0, w=1.0) -> None:
+        if not np.isscalar(x):                  # MPoint(MVector) など
+            x, y, z = x[0], x[1], x[2]
+        self.x, self.y, self.z, self.w = float(x), float(y), float(z), float(w)
+
+    def __len__(self) -> int:
+        return 4
+
+    def __getitem__(self, k: int) -> float:
+        return (self.x, self.y, self.z, self.w)[k]
+
+
+class MVector:
+    __slots__ = ("x", "y", "z")
+
+    def __init__(self, x=0.0, y=0.0, z=0.0) -> None:
+        if not np.isscalar(x):
+            x, y, z = x[0], x[1], x[2]
+        self.x, self.y, self.z = float(x), float(y), float(z)
+
+    def __len__(self) -> int:
+        return 3
+
+    def __getitem__(self, k: int) -> float:
+        return (self.x, self.y, self.z)[k]
+
+    def __add__(self, o) -> "MVector":
+        return MVector(self.x + o[0], self.y + o[1], self.z + o[2])
+
+    def __neg__(self) -> "MVector":
+        return MVector(-self.x, -self.y, -self.z)
+
+
+class MEulerRotation:
+    def __init__(self, x=0.0, y=0.0, z=0.0) -> None:
+        self.x, self.y, self.z = float(x), float(y), float(z)
+
+    def asMatrix(self) -> "MMatrix":
+        m = np.eye(4)
+        m[:3, :3] = _scene.euler_matrix((self.x, self.y, self.z))
+        return MMatrix(m.ravel().tolist())
+
+
+class MIntArray(list):
+    def __init__(self, n=0, v=0) -> None:
+        super().__init__([v] * n if isinstance(n, int) else n)
+
+
+class MMatrix(tuple):
+    """行優先 16 要素（引数無しは単位行列）"""
+
+    def __new__(cls, values=None):
+        return super().__new__(cls, np.eye(4).ravel().tolist()
+                               if values is None else values)
+
+
+class MTransformationMatrix:
+    def __init__(self, m: MMatrix) -> None:
+        self._m = np.asarray(m, np.float64).reshape(4, 4)
+
+
+class MObject:
+    """DAG ノード、またはコンポーネント（種類 + 番号配列）"""
+
+    _KIND = {"vtx": MFn.kMeshVertComponent, "e": MFn.kMeshEdgeComponent,
+             "f": MFn.kMeshPolygonComponent}
+
+    def __init__(self, kind: str | None = None, ids=(), node=None) -> None:
+        self._node = node
+        self._type = _api_type(node) if node is not None else self._KIND.get(kind)
+        self._ids  = np.asarray(ids, np.int64)
+
+    def isNull(self) -> bool:
+        return self._type is None
+
+    def hasFn(self, fn: int) -> bool:
+        return self._type == fn
+
+    def apiType(self) -> int:
+        return self._type
+
+
+MObject.kNullObj = MObject()
+
+
+@count_methods("om2")
+class MObjectHandle:
+    """インスタンスの複製は複製元と同じオブジェクトとみなす"""
+
+    def __init__(self, obj: MObject) -> None:
+        self._ident = (obj._node.ident or obj._node) if obj._node is not None else None
+
+    def hashCode(self) -> int:
+        return id(self._ident)
+
+    def isValid(self) -> bool:
+        return self._ident is not None
+
+    def isAlive(self) -> bool:
+        return self._ident is not None
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, MObjectHandle) and self._ident is other._ident
+
+    def __hash__(self) -> int:
+        return id(self._ident)
+
+
+def _node_of(obj):
+    """MDagPath / MObject → シーンの Node"""
+    return obj._node
+
+
+# ----------------------------------------------------------------------
+# DAG
+# ----------------------------------------------------------------------
+@count_methods("om2")
+class MDagPath:
+    def __init__(self, other: "MDagPath | None" = None) -> None:
+        self._node = other._node if other is not None else None
+
+    @staticmethod
+    @counted("om2.MDagPath.getAPathTo")
+    def getAPathTo(obj: MObject) -> "MDagPath":
+        p = MDagPath()
+        p._node = obj._node
+        return p
+
+    def fullPathName(self) -> str:
+        return self._node.path if self._node is not None else ""
+
+    def length(self) -> int:
+        return self._node.path.count("|") if self._node is not None else 0
+
+    def apiType(self) -> int:
+        return _api_type(self._node)
+
+    def hasFn(self, fn: int) -> bool:
+        return self.apiType() == fn
+
+    def isInstanced(self, indirect: bool = True) -> bool:
+        sc, node = _sc(), self._node
+        while node is not None:
+            if node.direct:
+                return True
+            if not indirect:
+                return False
+            node = sc.nodes[node.parent] if node.parent else None
+        return False
+
+    def node(self) -> MObject:
+        return MObject(node=self._node)
+
+    def inclusiveMatrix(self) -> MMatrix:
+        return MMatrix(_sc().world(self._node.path).ravel().tolist())
+
+    def inclusiveMatrixInverse(self) -> MMatrix:
+        return MMatrix(np.linalg.inv(_sc().world(self._node.path)).ravel().tolist())
+
+    def childCount(self) -> int:
+        return len(self._node.children)
+
+    def child(self, k: int) -> MObject:
+        return MObject(node=_sc().nodes[self._node.children[k]])
+
+    def _shapes(self) -> list[str]:
+        sc = _sc()
+        return [c for c in self._node.children if sc.nodes[c].type != "transform"]
+
+    def numberOfShapesDirectlyBelow(self) -> int:
+        return len(self._shapes())
+
+    def extendToShape(self, k: int = 0) -> "MDagPath":
+        self._node = _sc().nodes[self._shapes()[k]]
+        return self
+
+    def pop(self, n: int = 1) -> "MDagPath":
+        sc = _sc()
+        for _ in range(n):
+            parent = self._node.parent if self._node is not None else None
+            self._node = sc.nodes[parent] if parent else None
+        return self
+
+
+@count_methods("om2")
+class MSelectionList:
+    def __init__(self) -> None:
+        self._items: list[tuple] = []                   # (Node, コンポーネント)
+
+    def add(self, item) -> "MSelectionList":
+        sc = _sc()
+        if isinstance(item, tuple):                     # (MDagPath, MObject)
+            self._items.append((item[0]._node, item[1]))
+        elif "." in item:
+            node, kind, ids = _scene.parse_component(item)
+            self._items.append((sc.node(node), MObject(kind, ids)))
+        else:
+            self._items.append((sc.node(item), MObject.kNullObj))
+        return self
+
+    def length(self) -> int:
+        return len(self._items)
+
+    def isEmpty(self) -> bool:
+        return not self._items
+
+    def getDagPath(self, k: int) -> MDagPath:
+        p = MDagPath()
+        p._node = self._items[k][0]
+        return p
+
+    def getComponent(self, k: int):
+        return self.getDagPath(k), self._items[k][1]
+
+    def getSelectionStrings(self) -> list[str]:
+        kinds = {v: k for k, v in MObject._KIND.items()}
+        out = []
+        for node, comp in self._items:
+            if comp.isNull():
+                out.append(node.path)
+            else:
+                out += _scene.component_strings(node.path, kinds[comp._type], comp._ids)
+        return out
+
+
+class MGlobal:
+    @staticmethod
+    @counted("om2.MGlobal.getActiveSelectionList")
+    def getActiveSelectionList() -> MSelectionList:
+        sl = MSelectionList()
+        for s in _sc().selection:
+            sl.add(s)
+        return sl
+
+
+@count_methods("om2")
+class MItDag:
+    kDepthFirst, kBreadthFirst = 0, 1
+
+    def __init__(self) -> None:
+        self._items: list = []
+        self._k = 0
+
+    def reset(self, root: MDagPath, traversal=0, filter_=None) -> None:
+        sc = _sc()
+        want = "transform" if filter_ == MFn.kTransform else None
+        self._items = [sc.nodes[p] for p in sc.iter_dag(root._node.path)
+                       if want is None or sc.nodes[p].type == want]
+        self._k = 0
+
+    def isDone(self) -> bool:
+        return self._k >= len(self._items)
+
+    def getPath(self) -> MDagPath:
+        p = MDagPath()
+        p._node = self._items[self._k]
+        return p
+
+    def next(self) -> None:
+        self._k += 1
+
+    def prune(self) -> None:
+        """今のノードの子孫を飛ばす（次の next() で兄弟以降へ）"""
+        root = self._items[self._k].path + "|"
+        end = self._k + 1
+        while end < len(self._items) and self._items[end].path.startswith(root):
+            end += 1
+        self._k = end - 1
+
+
+@count_methods("om2")
+class MDagModifier:
+    """
+    createNode / renameNode / reparentNode / deleteNode を doIt でまとめて実行、undoIt で戻す
+
+    createNode は MObject を返すためにその場でノードを作り、undoIt で外して
+    再度の doIt で同じ Node を戻す（Maya と同じく MObject は使い続けられる）。
+    """
+
+    def __init__(self) -> None:
+        self._ops: list = []
+        self._created: list = []
+        self._undo: list = []                       # doIt が行った操作の逆
+
+    def createNode(self, type_: str, parent: MObject = MObject.kNullObj) -> MObject:
+        sc   = _sc()
+        obj  = MObject(node=None)
+        name = sc.unique_name(f"{type_}1")
+        path = sc.add(name, parent._node.path if parent._node is not None else None)
+        obj._node, obj._type = sc.nodes[path], MFn.kTransform
+        self._created.append(obj._node)
+        return obj
+
+    def renameNode(self, obj: MObject, name: str) -> None:
+        self._ops.append(("rename", obj, name))
+
+    def reparentNode(self, obj: MObject, parent: MObject) -> None:
+        self._ops.append(("parent", obj, parent))
+
+    def deleteNode(self, obj: MObject) -> None:
+        """子を持たないノードだけ（シェイプなど）"""
+        self._ops.append(("delete", obj, None))
+
+    def doIt(self) -> None:
+        sc = _sc()
+        if self._undo is None:                      # undoIt の後（やり直し）
+            for node in self._created:
+                sc.attach(node)
+        self._undo = []
+        for op, obj, arg in self._ops:
+            node = obj._node
+            if op == "rename":
+                self._undo.append(("rename", node, node.name))
+                sc.rename(node.path, arg)
+            elif op == "delete":
+                self._undo.append(("delete", node, None))
+                sc.detach(node.path)
+            else:                                       # ローカル値を保つ
+                old = sc.nodes[node.parent] if node.parent else None
+                self._undo.append(("parent", node, old))
+                sc.reparent(node.path, arg._node.path, keep_world=False)
+
+    def undoIt(self) -> None:
+        sc = _sc()
+        for op, node, arg in reversed(self._undo or []):
+            if op == "rename":
+                sc.rename(node.path, arg)
+            elif op == "delete":
+                sc.attach(node)
+            else:
+                sc.reparent(node.path, arg.path if arg is not None else None,
+                            keep_world=False)
+        for node in reversed(self._created):
+            sc.detach(node.path)
+        self._undo = None
+
+
+# ----------------------------------------------------------------------
+# プラグイン
+# ----------------------------------------------------------------------
+class MPxCommand:
+    """cmds.<名前> が creator() で作り、doIt を呼ぶ。isUndoable なら undo に積む"""
+
+    def __init__(self) -> None:
+        pass
+
+    def doIt(self, args) -> None:
+        pass
+
+    def redoIt(self) -> None:
+        pass
+
+    def undoIt(self) -> None:
+        pass
+
+    def isUndoable(self) -> bool:
+        return False
+
+
+class MFnPlugin:
+    def __init__(self, obj: MObject, vendor: str = "", version: str = "") -> None:
+        pass
+
+    def registerCommand(self, name: str, creator) -> None:
+        from maya import cmds
+        cmds._register_command(name, creator)
+
+    def deregisterCommand(self, name: str) -> None:
+        from maya import cmds
+        cmds._deregister_command(name)
+
+
+# ----------------------------------------------------------------------
+# 関数セット
+# ----------------------------------------------------------------------
+@count_methods("om2")
+class MFnDagNode:
+    def __init__(self, obj) -> None:
+        self._node = _node_of(obj)
+
+    @property
+    def _path(self) -> str:
+        return self._node.path
+
+    @property
+    def isIntermediateObject(self) -> bool:
+        return self._node.intermediate
+
+    def name(self) -> str:
+        return self._node.name
+
+
+@count_methods("om2")
+class MFnTransform(MFnDagNode):
+    def rotatePivot(self, space: int = MSpace.kTransform) -> MPoint:
+        p = _sc().world_rp(self._path) if space == MSpace.kWorld else self._node.rp
+        return MPoint(*p[:3])
+
+    def rotatePivotTranslation(self, space: int = MSpace.kTransform) -> MVector:
+        return MVector(*self._node.rpt)
+
+    def rotation(self, space: int = MSpace.kTransform) -> MEulerRotation:
+        return MEulerRotation(*self._node.r)
+
+    def translation(self, space: int = MSpace.kTransform) -> MVector:
+        return MVector(*self._node.t)
+
+    def setRotation(self, rot: MEulerRotation, space: int = MSpace.kTransform) -> None:
+        self._node.update(r=(rot.x, rot.y, rot.z))
+        _sc().changed(self._path, "rotate")
+
+    def setTranslation(self, vec: MVector, space: int = MSpace.kTransform) -> None:
+        self._node.update(t=(vec.x, vec.y, vec.z))
+        _sc().changed(self._path, "translate")
+
+    def setTransformation(self, tm: MTransformationMatrix) -> None:
+        self._node.update(rp=np.zeros(3), rpt=np.zeros(3))
+        self._node.matrix = tm._m
+        _sc().changed(self._path, "rotatePivot")
+        _sc().changed(self._path, "translate")
+
+
+@count_methods("om2")
+class MFnMesh(MFnDagNode):
+    def __init__(self, obj=None) -> None:
+        self._node = _node_of(obj) if obj is not None else None
+
+    def create(self, vertices, polygonCounts, polygonConnects,
+               parent: MObject = MObject.kNullObj) -> MObject:
+        sc   = _sc()
+        pts  = np.array([tuple(p)[:3] for p in vertices], np.float64)
+        path = sc.add(sc.unique_name(f"{parent._node.name}Shape"), parent._node.path,
+                      type_="mesh", mesh=_scene.Mesh(pts, polygonCounts, polygonConnects))
+        self._node = sc.nodes[path]
+        return MObject(node=self._node)
+
+    @property
+    def _mesh(self):
+        return self._node.mesh
+
+    def getUVSetNames(self) -> list[str]:
+        return list(self._mesh.uvsets)
+
+    def createUVSet(self, name: str) -> str:
+        self._mesh.uvset(name)
+        _sc().changed(self._path, "uvSet")
+        return name
+
+    def getUVs(self, uvset: str | None = None):
+        uv = self._mesh.uvset(uvset or self._mesh.current)
+        return list(uv["u"]), list(uv["v"])
+
+    @property
+    def numVertices(self) -> int:
+        return len(self._mesh.points)
+
+    def getVertices(self):
+        return MIntArray(self._mesh.counts), MIntArray(self._mesh.ids)
+
+    def getPoints(self, space: int = MSpace.kObject) -> list[MPoint]:
+        pts = self._mesh.points
+        if space == MSpace.kWorld:
+            w = _sc().world(self._path)
+            pts = pts @ w[:3, :3] + w[3, :3]
+        return [MPoint(*p) for p in pts]
+
+    def setPoints(self, pts, space: int = MSpace.kObject) -> None:
+        self._mesh.points = np.array([(p.x, p.y, p.z) for p in pts], np.float64)
+        _sc().changed(self._path, "pnts")
+
+    def getAssignedUVs(self, uvset: str | None = None):
+        ids = self._mesh.uvset(uvset or self._mesh.current)["ids"]
+        counts = self._mesh.counts if ids else [0] * len(self._mesh.counts)
+        return MIntArray(counts), MIntArray(ids)
+
+    def deleteUVSet(self, name: str) -> None:
+        del self._mesh.uvsets[name]
+        _sc().changed(self._path, "uvSet")
+
+    def clearUVs(self, uvset: str | None = None) -> None:
+        uv = self._mesh.uvset(uvset or self._mesh.current)
+        uv["u"], uv["v"], uv["ids"] = [], [], []
+        _sc().changed(self._path, "uvSet")
+
+    def setUVs(self, us, vs, uvset: str | None = None) -> None:
+        uv = self._mesh.uvset(uvset or self._mesh.current)
+        uv["u"], uv["v"] = list(us), list(vs)
+        _sc().changed(self._path, "uvSet")
+
+    def assignUVs(self, counts, ids, uvset: str | None = None) -> None:
+        self._mesh.uvset(uvset or self._mesh.current)["ids"] = list(ids)
+        _sc().changed(self._path, "uvSet")
+
+
+@count_methods("om2")
+class MFnSingleIndexedComponent:
+    def __init__(self, comp: MObject) -> None:
+        self._comp = comp
+
+    def getElements(self) -> MIntArray:
+        return MIntArray(self._comp._ids.tolist())
+
+    @property
+    def elementCount(self) -> int:
+        return len(self._comp._ids)
+
+
+class MTime:
+    kFilm = 6
+
+    def __init__(self, value: float = 0.0, unit: int = kFilm) -> None:
+        self.value, self.unit = float(value), unit
+
+    @staticmethod
+    def uiUnit() -> int:
+        return MTime.kFilm
+
+
+class MDGContext:
+    """時刻だけを持つ評価コンテキスト"""
+
+    _current = None
+
+    def __init__(self, time: MTime | None = None) -> None:
+        self._frame = time.value if time is not None else None
+
+    def makeCurrent(self) -> "MDGContext":
+        prev, MDGContext._current = MDGContext.current(), self
+        return prev
+
+    @staticmethod
+    def current() -> "MDGContext":
+        return MDGContext._current or MDGContext.kNormal
+
+
+MDGContext.kNormal = MDGContext()
+
+
+class MFnMatrixData:
+    def __init__(self, obj: MObject) -> None:
+        self._m = obj._data
+
+    def matrix(self) -> MMatrix:
+        return MMatrix(self._m.ravel().tolist())
+
+
+_PLUG_COMP = {"rotatePivot": "rp", "translate": "t", "rotate": "r", "scale": "s"}
+
+
+class MPlug:
+    """文字列アトリビュート / worldMatrix[0] / rotatePivot などの成分"""
+
+    def __init__(self, node, attr: str, index: int | None = None) -> None:
+        self._node, self._attr, self._index = node, attr, index
+
+    def asString(self) -> str:
+        return self._node.attrs[self._attr] or ""
+
+    def partialName(self, includeNodeName=False, includeNonMandatoryIndices=False,
+                    includeInstancedIndices=False, useAlias=False,
+                    useFullAttributePath=False, useLongNames=False) -> str:
+        return self._attr
+
+    def elementByLogicalIndex(self, i: int) -> "MPlug":
+        return MPlug(self._node, self._attr, i)
+
+    def child(self, k: int) -> "MPlug":
+        return MPlug(self._node, self._attr, k)
+
+    @property
+    def isConnected(self) -> bool:
+        return _PLUG_COMP.get(self._attr) in self._node.anim
+
+    @property
+    def isDestination(self) -> bool:
+        return self.isConnected                 # アニメーション = 入力接続
+
+    def asDouble(self, ctx: MDGContext | None = None) -> float:
+        frame = (ctx or MDGContext.current())._frame
+        return float(self._node.comp_at(_PLUG_COMP[self._attr], frame)[self._index])
+
+    def asMObject(self, ctx: MDGContext | None = None) -> MObject:
+        if self._attr != "worldMatrix":
+            raise NotImplementedError(self._attr)
+        obj = MObject()
+        obj._data = _sc().world_at(self._node.path, (ctx or MDGContext.current())._frame)
+        return obj
+
+
+@count_methods("om2")
+class MFnDependencyNode:
+    def __init__(self, obj: MObject) -> None:
+        self._node = _node_of(obj)
+
+    def hasAttribute(self, name: str) -> bool:
+        return name in self._node.attrs
+
+    def findPlug(self, name: str, wantNetworked: bool = False) -> MPlug:
+        return MPlug(self._node, name)
+
+    def getConnections(self) -> list[MPlug]:
+        """接続のあるプラグ（アニメーションしている成分だけ）"""
+        return [MPlug(self._node, a) for a, c in _PLUG_COMP.items() if c in self._node.anim]
+
+
+# ----------------------------------------------------------------------
+# メッセージ（コールバック ID はシーンが払い出す int）
+# ----------------------------------------------------------------------
+def _dag_path_of(node) -> MDagPath:
+    p = MDagPath()
+    p._node = node
+    return p
+
+
+class MMessage:
+    @staticmethod
+    @counted("om2.MMessage.removeCallback")
+    def removeCallback(cid: int) -> None:
+        _sc().remove_callback(cid)
+
+    @staticmethod
+    @counted("om2.MMessage.removeCallbacks")
+    def removeCallbacks(ids) -> None:
+        for cid in ids:
+            _sc().remove_callback(cid)
+
+
+class MNodeMessage:
+    kConnectionMade, kConnectionBroken, kAttributeEval, kAttributeSet = 0x01, 0x02, 0x04, 0x08
+
+    @staticmethod
+    @counted("om2.MNodeMessage.addAttributeChangedCallback")
+    def addAttributeChangedCallback(obj: MObject, fn, clientData=None) -> int:
+        """fn(msg, plug, otherPlug, clientData)。値の設定（kAttributeSet）だけ送る"""
+        return _sc().add_callback("attr", obj._node, lambda n, attr: fn(
+            MNodeMessage.kAttributeSet, MPlug(n, attr), MPlug(n, ""), clientData))
+
+    @staticmethod
+    @counted("om2.MNodeMessage.addNameChangedCallback")
+    def addNameChangedCallback(obj: MObject, fn, clientData=None) -> int:
+        """fn(node, prevName, clientData)"""
+        return _sc().add_callback("name", obj._node, lambda n, old: fn(
+            MObject(node=n), old, clientData))
+
+
+class MDagMessage:
+    kParentAdded, kParentRemoved, kChildAdded, kChildRemoved = 0, 1, 2, 3
+
+    @staticmethod
+    @counted("om2.MDagMessage.addAllDagChangesCallback")
+    def addAllDagChangesCallback(fn, clientData=None) -> int:
+        """fn(msgType, child, parent, clientData)。親の付け替えは新しい親への kChildAdded だけ"""
+        return _sc().add_callback("dag", None, lambda child, parent: fn(
+            MDagMessage.kChildAdded, _dag_path_of(child), _dag_path_of(parent), clientData))
+
+
+class MDGMessage:
+    @staticmethod
+    @counted("om2.MDGMessage.addTimeChangeCallback")
+    def addTimeChangeCallback(fn, clientData=None) -> int:
+        return _sc().add_callback("time", None, lambda t: fn(MTime(t), clientData))
+
+
+class MSceneMessage:
+    kBeforeNew, kBeforeOpen = 1, 6
+
+    @staticmethod
+    @counted("om2.MSceneMessage.addCallback")
+    def addCallback(msg: int, fn, clientData=None) -> int:
+        return _sc().add_callback("scene", None, lambda m: m == msg and fn(clientData))
@@ -0,0 +1,373 @@
+# -*- coding: utf-8 -*-
+"""
+maya.cmds スタンドイン
+
+本リポジトリのスクリプトが使うフラグの組み合わせだけを実装する。
+それ以外の使い方は NotImplementedError。
+"""
+
+from __future__ import annotations
+import importlib.util, os
+import numpy as np
+
+from maya import _scene
+from maya._scene import counted as _counted
+
+
+def _sc():
+    return _scene.scene()
+
+
+def _is_type(node, type_) -> bool:
+    return type_ is None or node.type == type_
+
+
+# ----------------------------------------------------------------------
+# 表示 / エラー
+# ----------------------------------------------------------------------
+@_counted("cmds.inViewMessage")
+def inViewMessage(**kwargs) -> None:
+    pass
+
+
+@_counted("cmds.warning")
+def warning(msg: str) -> None:
+    pass
+
+
+@_counted("cmds.error")
+def error(msg: str) -> None:
+    raise RuntimeError(msg)
+
+
+class _Chunk:
+    """undoInfo の openChunk 〜 closeChunk の間に積まれたコマンド（1 回の undo で戻す）"""
+
+    def __init__(self, cmds_) -> None:
+        self.cmds = cmds_
+
+    def undoIt(self) -> None:
+        for cmd in reversed(self.cmds):
+            cmd.undoIt()
+
+    def redoIt(self) -> None:
+        for cmd in self.cmds:
+            cmd.redoIt()
+
+
+_CHUNKS: list[int] = []                            # 開いているチャンクの開始位置
+
+
+@_counted("cmds.undoInfo")
+def undoInfo(openChunk=False, closeChunk=False, chunkName=None):
+    sc = _sc()
+    if openChunk:
+        _CHUNKS.append(len(sc.undo_stack))
+    elif closeChunk and _CHUNKS:
+        start = _CHUNKS.pop()
+        if not _CHUNKS and len(sc.undo_stack) - start > 1:
+            sc.undo_stack[start:] = [_Chunk(sc.undo_stack[start:])]
+    return None
+
+
+@_counted("cmds.undo")
+def undo() -> None:
+    sc = _sc()
+    if sc.undo_stack:
+        cmd = sc.undo_stack.pop()
+        cmd.undoIt()
+        sc.redo_stack.append(cmd)
+
+
+@_counted("cmds.flushUndo")
+def flushUndo() -> None:
+    sc = _sc()
+    sc.undo_stack.clear()
+    sc.redo_stack.clear()
+
+
+@_counted("cmds.redo")
+def redo() -> None:
+    sc = _sc()
+    if sc.redo_stack:
+        cmd = sc.redo_stack.pop()
+        cmd.redoIt()
+        sc.undo_stack.append(cmd)
+
+
+# ----------------------------------------------------------------------
+# プラグイン（OpenMaya 2.0 の Python プラグインのコマンドだけ）
+# ----------------------------------------------------------------------
+_PLUGINS: dict[str, object] = {}                   # フルパス → 読み込んだモジュール
+
+
+@_counted("cmds.pluginInfo")
+def pluginInfo(path, q=False, loaded=False) -> bool:
+    if q and loaded:
+        return os.path.abspath(path) in _PLUGINS
+    raise NotImplementedError("pluginInfo")
+
+
+@_counted("cmds.loadPlugin")
+def loadPlugin(path, quiet=False):
+    """Maya と同じく、プラグインのファイルを別モジュールとして読み込む"""
+    from maya.api import OpenMaya as om2
+    path = os.path.abspath(path)
+    if path not in _PLUGINS:
+        name = os.path.splitext(os.path.basename(path))[0]
+        spec = importlib.util.spec_from_file_location(f"_plugin_{name}", path)
+        mod  = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(mod)
+        mod.initializePlugin(om2.MObject())
+        _PLUGINS[path] = mod
+    return [os.path.splitext(os.path.basename(path))[0]]
+
+
+def _register_command(name: str, creator) -> None:
+    """MFnPlugin.registerCommand から呼ばれ、cmds.<name> を生やす"""
+    @_counted(f"cmds.{name}")
+    def run(*args):
+        cmd = creator()
+        cmd.doIt(args)
+        if cmd.isUndoable():
+            sc = _sc()
+            sc.undo_stack.append(cmd)
+            sc.redo_stack.clear()
+    run.__name__ = name
+    globals()[name] = run
+
+
+def _deregister_command(name: str) -> None:
+    globals().pop(name, None)
+
+
+# ----------------------------------------------------------------------
+# DAG
+# ----------------------------------------------------------------------
+@_counted("cmds.ls")
+def ls(*names, sl=False, l=False, long=False, type=None, fl=False, o=False):
+    sc = _sc()
+    src = [sc.resolve(n) for n in (sc.selection if sl else names)
+           if not (sl and "." in n)]
+    out = [p for p in src if _is_type(sc.nodes[p], type)]
+    return out if (l or long) else [sc.nodes[p].name for p in out]
+
+
+@_counted("cmds.select")
+def select(*names, r=False, cl=False, add=False):
+    sc = _sc()
+    if cl:
+        sc.selection = []
+        return
+    items = [n if "." in n else sc.resolve(n) for n in names]   # コンポーネントはそのまま
+    sc.selection = items if not add else sc.selection + items
+
+
+@_counted("cmds.listRelatives")
+def listRelatives(node, c=False, s=False, p=False, f=False, pa=False,
+                  ni=False, type=None, ad=False):
+    sc = _sc()
+    n = sc.node(node)
+    if p:
+        out = [n.parent] if n.parent else []
+    else:
+        out = [ch for ch in n.children
+               if (sc.nodes[ch].type != "transform") == bool(s)
+               and not (ni and sc.nodes[ch].intermediate)]
+        if c and not s:
+            out = [ch for ch in out if sc.nodes[ch].type == "transform"]
+    out = [q for q in out if _is_type(sc.nodes[q], type)]
+    if not out:
+        return None
+    return out if (f or pa) else [sc.nodes[q].name for q in out]
+
+
+@_counted("cmds.parent")
+def parent(*args, w=False, r=False):
+    """parent(子..., 親) / parent(子..., w=True)。ワールド位置を保つ（r=True ならローカル値）"""
+    sc    = _sc()
+    kids  = args if w else args[:-1]
+    dst   = None if w else sc.resolve(args[-1])
+    nodes = [sc.node(k) for k in kids]                 # 先に全部解決（Maya と同じ）
+    return [sc.nodes[sc.reparent(n.path, dst, keep_world=not r)].name
+            for n in nodes]
+
+
+@_counted("cmds.createNode")
+def createNode(type_, n=None):
+    sc = _sc()
+    return sc.nodes[sc.add(sc.unique_name(n or f"{type_}1"), type_=type_)].name
+
+
+@_counted("cmds.exactWorldBoundingBox")
+def exactWorldBoundingBox(node):
+    sc   = _sc()
+    path = sc.resolve(node)
+    w    = sc.world(path)
+    pts  = sc.nodes[path].mesh.points @ w[:3, :3] + w[3, :3]
+    return [*pts.min(axis=0).tolist(), *pts.max(axis=0).tolist()]
+
+
+@_counted("cmds.manipPivot")
+def manipPivot(**kwargs):
+    pass
+
+
+@_counted("cmds.nodeType")
+def nodeType(node) -> str:
+    return _sc().node(node).type
+
+
+@_counted("cmds.objExists")
+def objExists(node) -> bool:
+    try:
+        _sc().resolve(node)
+        return True
+    except RuntimeError:
+        return False
+
+
+@_counted("cmds.xform")
+def xform(node, q=False, ws=False, rp=False, m=False, piv=None, t=None, ro=None):
+    sc = _sc()
+    path = sc.resolve(node)
+    if q and rp:
+        return list(sc.world_rp(path)[:3]) if ws else list(sc.nodes[path].rp)
+    if q and m:
+        return list((sc.world(path) if ws else sc.nodes[path].matrix).ravel())
+    if not q and m is not None and not isinstance(m, bool):    # 行列の設定（ピボットは保つ）
+        mm = np.asarray(m, np.float64).reshape(4, 4)
+        par = sc.nodes[path].parent
+        if ws and par:
+            mm = mm @ np.linalg.inv(sc.world(par))
+        sc.nodes[path].matrix = mm
+        sc.changed(path, "translate")
+        return None
+    if piv is not None and ws:
+        inv = np.linalg.inv(sc.world(path))
+        sc.nodes[path].set_rp((np.append(piv, 1.0) @ inv)[:3])
+        sc.changed(path, "rotatePivot")
+        return None
+    raise NotImplementedError("xform")
+
+
+# ----------------------------------------------------------------------
+# アトリビュート
+# ----------------------------------------------------------------------
+@_counted("cmds.attributeQuery")
+def attributeQuery(attr, node=None, exists=False) -> bool:
+    return attr in _sc().node(node).attrs
+
+
+@_counted("cmds.addAttr")
+def addAttr(node, ln=None, dt=None, at=None):
+    _sc().node(node).attrs.setdefault(ln, None)
+
+
+@_counted("cmds.setAttr")
+def setAttr(plug, *values, type=None):
+    node, _, attr = plug.partition(".")
+    sc = _sc()
+    sc.node(node).attrs[attr] = values[0] if len(values) == 1 else values
+    sc.changed(sc.resolve(node), attr)
+
+
+@_counted("cmds.getAttr")
+def getAttr(plug):
+    node, _, attr = plug.partition(".")
+    return _sc().node(node).attrs[attr]
+
+
+# ----------------------------------------------------------------------
+# UV
+# ----------------------------------------------------------------------
+def _mesh(name):
+    n = _sc().node(name)
+    if n.mesh is None:
+        raise RuntimeError(f"{name} is not a mesh")
+    return n.mesh
+
+
+def _uv_changed(name) -> None:
+    sc = _sc()
+    sc.changed(sc.resolve(name), "uvSet")
+
+
+@_counted("cmds.polyUVSet")
+def polyUVSet(mesh, q=False, e=False, auv=False, create=False, copy=False,
+              uvSet=None, newUVSet=None, currentUVSet=False):
+    me = _mesh(mesh)
+    if q and auv:
+        return list(me.uvsets)
+    if q and currentUVSet:
+        return [me.current]
+    if create:
+        me.uvset(uvSet)
+        _uv_changed(mesh)
+        return [uvSet]
+    if copy:
+        src = me.uvset(uvSet or me.current)
+        me.uvsets[newUVSet] = {k: list(v) for k, v in src.items()}
+        _uv_changed(mesh)
+        return [newUVSet]
+    if e and currentUVSet:
+        me.current = uvSet
+        _uv_changed(mesh)
+        return None
+    raise NotImplementedError("polyUVSet")
+
+
+@_counted("cmds.polyProjection")
+def polyProjection(faces, md="x", ibd=True, ch=False):
+    """X 平面投影：フェース頂点ごとに (y, z) を UV にする"""
+    me = _mesh(faces)
+    uv = me.uvset(me.current)
+    pts = me.points[me.ids]
+    uv["u"], uv["v"] = pts[:, 1].tolist(), pts[:, 2].tolist()
+    uv["ids"] = list(range(len(me.ids)))
+    _uv_changed(faces)
+
+
+@_counted("cmds.polyEditUV")
+def polyEditUV(comp, q=False, u=None, v=None, su=None, sv=None):
+    me = _mesh(comp)
+    uv = me.uvset(me.current)
+    if q:
+        if not uv["u"]:
+            raise RuntimeError(f"{comp}: no UVs")
+        return [uv["u"][0], uv["v"][0]]
+    if su == 0 and sv == 0:                    # 1 点に潰して (u, v) へ
+        n = len(uv["u"])
+        uv["u"], uv["v"] = [u] * n, [v] * n
+        _uv_changed(comp)
+        return None
+    raise NotImplementedError("polyEditUV")
+
+
+@_counted("cmds.polyListComponentConversion")
+def polyListComponentConversion(comps, fe=False, ff=False, fv=False,
+                                tv=False, te=False, tf=False):
+    """→ 頂点だけ対応。連続区間ごとの "mesh.vtx[a:b]" を返す"""
+    if not tv:
+        raise NotImplementedError("polyListComponentConversion")
+    sc  = _sc()
+    out = {}
+    for c in ([comps] if isinstance(comps, str) else comps):
+        node, kind, idx = _scene.parse_component(c)
+        mesh = sc.nodes[sc.resolve(node)].mesh
+        ids  = mesh.edges()[idx].ravel() if kind == "e" else idx
+        out.setdefault(node, set()).update(ids.tolist())
+    return [c for n, v in out.items()
+            for c in _scene.component_strings(n, "vtx", sorted(v))]
+
+
+@_counted("cmds.pointPosition")
+def pointPosition(comp, world=True):
+    node, _, rest = comp.partition(".vtx[")
+    if not rest:
+        raise RuntimeError(f"{comp} is not a vertex")
+    sc = _sc()
+    path = sc.resolve(node)
+    n = sc.nodes[path]
+    p = n.mesh.points[int(rest.rstrip("]"))]
+    return list((np.append(p, 1.0) @ sc.world(path))[:3]) if world else list(p)
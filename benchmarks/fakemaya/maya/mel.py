@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+"""maya.mel スタンドイン"""
+from maya._scene import counted
+
+_PROCS = {"bakeCustomOrient"}                # Maya 2023+ として振る舞う
+
+
+@counted("mel.eval")
+def eval(cmd: str):                         # noqa: A001  (maya.mel と同名)
+    if cmd.startswith("exists "):
+        return int(cmd.split()[1].strip('"') in _PROCS)
+    raise NotImplementedError(cmd)
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""
+run_bench.py
+-----------------------------------
+Pivot Painter 2 ツールのベンチマーク（Maya 不要）
+
+benchmarks/fakemaya の maya.cmds / maya.api.OpenMaya スタンドイン上に
+synth.build_tree で合成階層を作り、工程ごとの所要時間と
+cmds / om2 の呼び出し回数（Transform あたり）を計測する。
+
+    traversal        : take_snapshot
+    traversal_inst   : take_snapshot（synth.build_instanced。葉クラスタを枝ごとにインスタンス）
+    uv_layout_legacy : PP2UVAutoSquare (polyProjection / polyEditUV)  ※ --legacy-cap 以下のみ
+    uv_layout_batch  : PP2UVAutoSquare(batch=True)
+    sampling         : read_uvs + grid_from_uvs（レイアウト記録が無い時の経路）
+    layout_record    : layout_cells（pp2Layout から復元）
+    encode           : encode_pivot_position + encode_xvector
+    runtime          : encode → pp2_runtime.decode_textures → simulate（16 フレーム）
+    write            : write_textures（EXR + PNG）
+    validate         : pp2_validate.validate_snapshot（write の EXR / PNG を読み戻して検証）
+    export_pivotpos / export_xvector / export_combined : 各エクスポーターの export()
+    export_frames    : PP2Exporter.export_frames（4 フレームのフリップブック）
+    index_build      : pp2_index.enable() 後の初回 snapshot（走査 + コールバック登録）
+    index_refresh    : 末尾 10 Transform を動かした後の snapshot（印の付いた分だけ読み直す）
+    pivot_orient     : 全 Transform を選択して PivotOrienter(batch=True)
+    pivot_center     : 全 Transform の全頂点を選択して PivotMover
+    shell_extract    : synth.build_combined の結合 mesh を PP2ShellExtractor でシェル分け
+                       （ノードは作らず pp2_uv まで）
+
+ツールの print 出力は計測中は捨てる。
+
+使い方
+    python benchmarks/run_bench.py --sizes 100 1000 10000
+    python benchmarks/run_bench.py --save-baseline            # baseline.json を更新
+    python benchmarks/run_bench.py --check --tolerance 0.5    # 退行なら終了コード 1
+
+--check は呼び出し回数が 1 回でも増えるか、所要時間が (1 + tolerance) 倍かつ
+--min-delta 秒を超えて遅くなった工程を退行として報告する。
+"""
+
+from __future__ import annotations
+import argparse, gc, io, json, os, sys, tempfile, time
+from contextlib import redirect_stdout
+import numpy as np
+
+_here = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.dirname(_here), os.path.join(_here, "fakemaya"), _here]
+
+import maya.cmds as cmds                                         # noqa: E402
+import maya.api.OpenMaya as om2                                  # noqa: E402
+from maya import _scene                                          # noqa: E402
+from synth import build_combined, build_instanced, build_tree    # noqa: E402
+
+import pp2_index                                                 # noqa: E402
+from pp2_encode import encode_pivot_position, encode_xvector, grid_from_uvs  # noqa: E402
+from pp2_exporter import PP2Exporter                             # noqa: E402
+from pp2_pivotposition import PP2PivotPosExporter                # noqa: E402
+from pp2_runtime import PP2Wind, decode_textures, simulate       # noqa: E402
+from pp2_shells import PP2ShellExtractor                         # noqa: E402
+from pp2_snapshot import layout_cells, read_uvs, take_snapshot   # noqa: E402
+from pp2_validate import validate_snapshot                       # noqa: E402
+from pp2_writers import write_textures                           # noqa: E402
+from pivot_center import PivotMover                              # noqa: E402
+from pivot_orient import PivotOrienter                           # noqa: E402
+from PP2_XVector import PP2XVectorExporter                       # noqa: E402
+from set_pp2UV import PP2UVAutoSquare                            # noqa: E402
+
+BASELINE = os.path.join(_here, "baseline.json")
+
+
+# ----------------------------------------------------------------------
+def _measure(n: int, fn):
+    gc.collect()                # 前の工程のごみの回収をこの工程の時間に入れない
+    _scene.reset_calls()
+    with redirect_stdout(io.StringIO()):
+        t0  = time.perf_counter()
+        ret = fn()
+        dt  = time.perf_counter() - t0
+    calls = _scene.CALLS
+    cmds_n = sum(v for k, v in calls.items() if k.startswith("cmds."))
+    om2_n  = sum(v for k, v in calls.items() if k.startswith("om2."))
+    rec = {
+        "seconds": round(dt, 4),
+        "cmds": cmds_n,
+        "om2": om2_n,
+        "calls_per_node": round((cmds_n + om2_n) / n, 3),
+    }
+    return rec, ret
+
+
+def bench_size(n: int, out_dir: str, legacy_cap: int, seed: int = 0) -> dict:
+    """n Transform の木で全工程を計測する"""
+    res: dict[str, dict] = {}
+
+    if n <= legacy_cap:
+        root = build_tree(n, seed)
+        res["uv_layout_legacy"], _ = _measure(
+            n, lambda: PP2UVAutoSquare(root).execute())
+
+    root = build_tree(n, seed)
+    res["traversal"], snap = _measure(n, lambda: take_snapshot(root, uvset=None))
+    res["uv_layout_batch"], _ = _measure(
+        n, lambda: PP2UVAutoSquare(root, batch=True).execute())
+    cmds.flushUndo()            # 退避した UV を undo キューに残したまま後の工程を測らない
+
+    def _sample():
+        read_uvs(snap, "pp2_uv")
+        return grid_from_uvs(snap.uvs)
+
+    res["sampling"], _ = _measure(n, _sample)
+    res["layout_record"], (cells, grid) = _measure(
+        n, lambda: layout_cells(snap, "pp2_uv"))
+
+    def _encode():
+        encode_pivot_position(snap.pivots, snap.parents, cells, grid)
+        encode_xvector(snap.matrices, snap.depths, cells, grid)
+
+    res["encode"], _ = _measure(n, _encode)
+
+    def _runtime():
+        piv = encode_pivot_position(snap.pivots, snap.parents, cells, grid)
+        xv  = encode_xvector(snap.matrices, snap.depths, cells, grid)
+        simulate(decode_textures(piv, xv), PP2Wind(), np.arange(16) / 24.0)
+
+    res["runtime"], _ = _measure(n, _runtime)
+    res["write"], written = _measure(
+        n, lambda: write_textures(snap, cells, grid, out_dir, f"w{n}"))
+    res["validate"], _ = _measure(
+        n, lambda: validate_snapshot(snap, cells, written["outputs"]["pivotpos"],
+                                     written["outputs"]["xvector"], grid))
+
+    res["export_pivotpos"], _ = _measure(
+        n, lambda: PP2PivotPosExporter(root, out_dir, f"p{n}").export())
+    res["export_xvector"], _ = _measure(
+        n, lambda: PP2XVectorExporter(root, out_dir, f"x{n}").export())
+    res["export_combined"], _ = _measure(
+        n, lambda: PP2Exporter(root, out_dir, f"c{n}").export())
+    res["export_frames"], _ = _measure(
+        n, lambda: PP2Exporter(root, out_dir, f"f{n}").export_frames(range(1, 5)))
+
+    pp2_index.enable()
+    res["index_build"], _ = _measure(n, lambda: pp2_index.snapshot(root))
+    for p in snap.paths[-10:]:
+        path = om2.MSelectionList().add(p).getDagPath(0)
+        om2.MFnTransform(path).setTranslation(om2.MVector(0.0, 1.0, 0.0))
+    res["index_refresh"], _ = _measure(n, lambda: pp2_index.snapshot(root))
+    pp2_index.disable()
+
+    cmds.select(*snap.paths, r=True)
+    res["pivot_orient"], _ = _measure(
+        n, lambda: PivotOrienter(batch=True).orient_selected())
+
+    sc = _scene.scene()
+    cmds.select(*[f"{s}.vtx[0:{len(sc.nodes[s].mesh.points) - 1}]"
+                  for ms in snap.meshes for s in ms], r=True)
+    res["pivot_center"], _ = _measure(
+        n, lambda: PivotMover().move_to_selection_center())
+
+    inst = build_instanced(n, seed)
+    res["traversal_inst"], _ = _measure(n, lambda: take_snapshot(inst, uvset=None))
+
+    mesh, _ = build_combined(n, seed)
+    res["shell_extract"], _ = _measure(
+        n, lambda: PP2ShellExtractor(mesh).execute())
+    return res
+
+
+def run(sizes, legacy_cap: int, out_dir: str | None = None) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = out_dir or tmp
+        results = {}
+        for n in sizes:
+            print(f"[bench] n={n}", flush=True)
+            results[str(n)] = bench_size(n, out_dir, legacy_cap)
+            for stage, r in results[str(n)].items():
+                print(f"  {stage:<18} {r['seconds']:>9.4f}s  "
+                      f"cmds={r['cmds']:<8} om2={r['om2']:<8} "
+                      f"calls/node={r['calls_per_node']}")
+    return results
+
+
+# ----------------------------------------------------------------------
+def compare(results: dict, baseline: dict, tolerance: float, min_delta: float):
+    """baseline より悪化した (size, stage, 理由) のリスト"""
+    bad = []
+    for size, stages in results.items():
+        for stage, r in stages.items():
+            b = baseline.get(size, {}).get(stage)
+            if b is None:
+                continue
+            calls, b_calls = r["cmds"] + r["om2"], b["cmds"] + b["om2"]
+            if calls > b_calls:
+                bad.append((size, stage, f"calls {b_calls} → {calls}"))
+            if (r["seconds"] > b["seconds"] * (1.0 + tolerance)
+                    and r["seconds"] - b["seconds"] > min_delta):
+                bad.append((size, stage,
+                            f"time {b['seconds']:.4f}s → {r['seconds']:.4f}s"))
+    return bad
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Pivot Painter 2 benchmarks (fake maya)")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000],
+                    help="Transform 数（10^6 まで）")
+    ap.add_argument("--legacy-cap", type=int, default=10000,
+                    help="uv_layout_legacy を計測する最大 Transform 数")
+    ap.add_argument("--out", help="結果 JSON の保存先")
+    ap.add_argument("--write-dir", help="テクスチャの書き出し先（既定: 一時フォルダ）")
+    ap.add_argument("--baseline", default=BASELINE)
+    ap.add_argument("--save-baseline", action="store_true")
+    ap.add_argument("--check", action="store_true", help="baseline と比較して退行なら 1")
+    ap.add_argument("--tolerance", type=float, default=0.5,
+                    help="所要時間の許容倍率（0.5 → 1.5 倍まで）")
+    ap.add_argument("--min-delta", type=float, default=0.05,
+                    help="これ未満の時間差は退行とみなさない（秒）")
+    args = ap.parse_args(argv)
+
+    results = run(args.sizes, args.legacy_cap, args.write_dir)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"[bench] baseline → {args.baseline}")
+
+    if args.check:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        bad = compare(results, baseline, args.tolerance, args.min_delta)
+        for size, stage, why in bad:
+            print(f"[bench] REGRESSION n={size} {stage}: {why}")
+        if bad:
+            return 1
+        print("[bench] no regression")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+synth.py
+-----------------------------------
+ベンチマーク用の合成階層（幹 → 枝 → 葉）を maya スタンドインのシーンに作る
+
+各 Transform は四角形 1 枚の mesh シェイプ（map1 付き）とランダムなローカル行列を持つ。
+板はピボットから片側に伸びるので、BBox 中心とピボットは一致しない。
+
+build_combined は同じ 3 階層を四角形のシェルとして 1 つの mesh に結合したもの
+（pp2_shells 用。正解の親シェル番号も返す）。
+"""
+
+from __future__ import annotations
+import math
+import numpy as np
+
+from maya import _scene
+
+_QUAD_PTS = np.array([[0, 0, -.5], [0, 1, -.5], [0, 1, .5], [0, 0, .5]],
+                     np.float64)                  # ピボットから +Y 側に伸びる板
+_QUAD_UV  = ([0.0, 1.0, 1.0, 0.0], [0.0, 0.0, 1.0, 1.0])
+
+
+def _quad() -> _scene.Mesh:
+    me = _scene.Mesh(_QUAD_PTS, [4], [0, 1, 2, 3])
+    uv = me.uvset("map1")
+    uv["u"], uv["v"], uv["ids"] = list(_QUAD_UV[0]), list(_QUAD_UV[1]), [0, 1, 2, 3]
+    return me
+
+
+def _local_matrices(rng: np.random.Generator, n: int) -> np.ndarray:
+    """ランダムな回転 (軸 + 角度) と平行移動を持つ (n, 4, 4) 行ベクトル形式の行列"""
+    axis  = rng.normal(size=(n, 3))
+    axis /= np.linalg.norm(axis, axis=1, keepdims=True)
+    ang   = rng.uniform(-np.pi, np.pi, n)
+    c, s  = np.cos(ang)[:, None, None], np.sin(ang)[:, None, None]
+    k     = np.zeros((n, 3, 3))
+    k[:, 0, 1], k[:, 0, 2], k[:, 1, 2] = -axis[:, 2], axis[:, 1], -axis[:, 0]
+    k    -= k.transpose(0, 2, 1)
+    rot   = np.eye(3) + s * k + (1 - c) * (k @ k)
+
+    m = np.zeros((n, 4, 4))
+    m[:, :3, :3] = rot.transpose(0, 2, 1)          # 列ベクトル → 行ベクトル
+    m[:, 3, :3]  = rng.uniform(-10, 10, (n, 3))
+    m[:, 3, 3]   = 1.0
+    return m
+
+
+def build_tree(n: int, seed: int = 0, root: str = "trunk") -> str:
+    """
+    n 個の Transform からなる 3 階層の木をシーンに作り、ルートのフルパスを返す
+
+    枝の数は √(n-1) 程度、葉は枝へ均等に振り分ける。
+    """
+    sc  = _scene.new_scene()
+    rng = np.random.default_rng(seed)
+    mtx = _local_matrices(rng, n)
+
+    n_branch = max(1, min(n - 1, int(math.isqrt(max(n - 1, 1)))))
+    n_leaf   = n - 1 - n_branch
+
+    def add(name, parent, k):
+        path = sc.add(name, parent, matrix=mtx[k])
+        sc.add(name + "Shape", path, type_="mesh", mesh=_quad())
+        return path
+
+    top = add(root, None, 0)
+    branches = [add(f"branch{b}", top, 1 + b) for b in range(n_branch)]
+    for j in range(n_leaf):
+        add(f"leaf{j}", branches[j % n_branch], 1 + n_branch + j)
+    return top
+
+
+def build_instanced(n: int, seed: int = 0, cluster: int = 20, root: str = "trunk") -> str:
+    """
+    枝ごとに同じ葉クラスタをインスタンスした木（Transform 約 n 個）を作る
+
+    クラスタ = ルート Transform 1 + 葉 cluster 枚。最初の枝の子が元で、
+    残りの枝にはそのインスタンスを置く。ルートのフルパスを返す。
+    """
+    sc  = _scene.new_scene()
+    rng = np.random.default_rng(seed)
+    n_branch = max(1, (n - 1) // (cluster + 2))
+    mtx = _local_matrices(rng, n_branch + cluster + 2)
+
+    def add(name, parent, k):
+        path = sc.add(name, parent, matrix=mtx[k])
+        sc.add(name + "Shape", path, type_="mesh", mesh=_quad())
+        return path
+
+    top = add(root, None, 0)
+    branches = [add(f"branch{b}", top, 1 + b) for b in range(n_branch)]
+    src = sc.add("cluster", branches[0], matrix=mtx[1 + n_branch])
+    for j in range(cluster):
+        add(f"leaf{j}", src, 2 + n_branch + j)
+    for b in branches[1:]:
+        sc.instance(src, b)
+    return top
+
+
+def _strip(base, tip, width, side, segs: int = 1):
+    """
+    base → tip に伸びる幅 width、長さ方向 segs 分割の帯（シェル 1 つずつ）
+
+    Returns
+    -------
+    points (S, 2 * (segs + 1), 3), ids (S, segs * 4)（シェル内の頂点番号）
+    """
+    t   = np.linspace(0.0, 1.0, segs + 1)[None, :, None]
+    mid = base[:, None] + (tip - base)[:, None] * t
+    off = (side * (width * 0.5))[:, None]
+    pts = np.concatenate([mid - off, mid + off], 1)         # 左列 → 右列
+    k   = np.arange(segs)
+    ids = np.stack([k, k + 1, segs + 2 + k, segs + 1 + k], 1).ravel()
+    return pts, np.broadcast_to(ids, (len(base), len(ids)))
+
+
+def _unit(v) -> np.ndarray:
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+def build_combined(n: int, seed: int = 0, name: str = "foliage"):
+    """
+    幹 1・枝 √(n-1) 程度・葉 残り のシェルを結合した mesh をシーンに作る
+
+    幹 / 枝は長さ方向に分割した帯、葉は四角形 1 枚。
+
+    Returns
+    -------
+    (Transform のフルパス, 正解の親シェル番号 (n,))。シェル番号は頂点順
+    （0 = 幹、1.. = 枝、その後ろが葉）
+    """
+    sc  = _scene.new_scene()
+    rng = np.random.default_rng(seed)
+    n_branch = max(1, min(n - 1, int(math.isqrt(max(n - 1, 1)))))
+    n_leaf   = n - 1 - n_branch
+    x = np.array([[1.0, 0.0, 0.0]])
+
+    # 幹 : 原点から +Y に 10
+    shells = [_strip(np.zeros((1, 3)), np.array([[0.0, 10.0, 0.0]]), 0.4, x, 20)]
+
+    # 枝 : 幹の途中から水平寄りに 4
+    h   = rng.uniform(2.0, 9.5, n_branch)
+    ang = rng.uniform(0.0, 2 * np.pi, n_branch)
+    d   = _unit(np.stack([np.cos(ang), rng.uniform(0.1, 0.5, n_branch),
+                          np.sin(ang)], 1))
+    b0  = np.stack([np.zeros(n_branch), h, np.zeros(n_branch)], 1) + d * 0.25
+    b1  = b0 + d * 4.0
+    shells.append(_strip(b0, b1, 0.15, _unit(np.cross(d, (0.0, 1.0, 0.0))), 8))
+
+    # 葉 : 枝の途中から 0.6 の板
+    owner = np.arange(n_leaf) % n_branch
+    t   = rng.uniform(0.2, 1.0, n_leaf)[:, None]
+    l0  = b0[owner] + (b1[owner] - b0[owner]) * t + (0.0, 0.05, 0.0)
+    ld  = _unit(rng.normal(size=(n_leaf, 3)) * 0.3 + (0.0, 1.0, 0.0))
+    shells.append(_strip(l0, l0 + ld * 0.6, 0.3, _unit(np.cross(ld, x))))
+
+    pts, ids, counts, base = [], [], [], 0
+    for p, f in shells:
+        off = base + np.arange(len(p))[:, None] * p.shape[1]
+        pts.append(p.reshape(-1, 3))
+        ids.append((f + off).ravel())
+        counts.append(np.full(f.size // 4, 4))
+        base += p.shape[0] * p.shape[1]
+    me = _scene.Mesh(np.concatenate(pts), np.concatenate(counts).tolist(),
+                     np.concatenate(ids).tolist())
+    uv = me.uvset("map1")
+    uv["u"], uv["v"], uv["ids"] = [0.0], [0.0], [0] * len(me.ids)
+
+    path = sc.add(name, None)
+    sc.add(name + "Shape", path, type_="mesh", mesh=me)
+    parents = np.concatenate(([-1], np.zeros(n_branch, np.int64), 1 + owner))
+    return path, parents
@@ -3,52 +3,150 @@
 # ---------------------------------------------------------------------
 #  1. 頂点 / エッジ / フェースを選択して実行
 #  2. 選択成分のワールド座標を平均 → その Transform のピボットを移動
+#     （オブジェクト選択なら全頂点。placement で重心 / BBox 中心 / 付け根を選ぶ）
+#
+#  選択はフラット化せずコンポーネント配列のまま読み、mesh ごとに
+#  MFnMesh.getPoints を 1 回だけ呼んで pp2_analysis で一括計算する。
+#  エッジ / フェースは頂点番号へまとめて変換する。
 # =====================================================================
+import numpy as np
 import maya.cmds as cmds
 import maya.api.OpenMaya as om2
 
+from pp2_analysis import MeshStats, PIVOT_MODES, pivot_points
+
 
 class PivotMover:
     """選択頂点（複数可）の中心にピボットを移動するユーティリティ"""
 
+    def __init__(self, placement="centroid"):
+        """
+        placement : "centroid" 選択頂点の重心（従来どおり）
+                    "bbox"     選択頂点の AABB 中心
+                    "base"     最長主軸上の、今のピボットに近い端（枝の付け根）
+        """
+        if placement not in PIVOT_MODES:
+            raise ValueError(f"placement は {PIVOT_MODES} のいずれか: {placement}")
+        self.placement = placement
+
     # ---------------------------------------------------------------
     # 内部 util
     # ---------------------------------------------------------------
     @staticmethod
-    def _transform_from_component(comp):
+    def _mesh_and_transform(path):
+        """
+        path: コンポーネントの持ち主 (mesh シェイプ or その Transform)
+        戻り値: (mesh の MDagPath, Transform のフルパス)
+        """
+        shape = om2.MDagPath(path)
+        if not shape.hasFn(om2.MFn.kMesh):
+            shape.extendToShape()
+        xform = om2.MDagPath(shape)
+        xform.pop()
+        return shape, xform.fullPathName()
+
+    @staticmethod
+    def _face_vertices(shape, faces):
+        """フェース番号配列 → 頂点番号配列（getVertices 1 回で一括変換）"""
+        counts, ids = om2.MFnMesh(shape).getVertices()
+        counts = np.asarray(counts, np.int64)
+        ids    = np.asarray(ids, np.int64)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        n      = counts[faces]
+        # 各フェースの頂点範囲 [start, start + n) を 1 本の添字配列に展開
+        first  = np.repeat(starts[faces] - np.concatenate(([0], np.cumsum(n)[:-1])), n)
+        return ids[first + np.arange(n.sum())]
+
+    def _selected_vertices(self):
         """
-        comp: 'xxx|yyyShape.vtx[3]' のようなコンポーネントパス
-        戻り値: トップレベル Transform ノード
+        選択 → {Transform: {mesh フルパス: (MDagPath, 頂点番号配列)}}
+
+        エッジは polyListComponentConversion 1 回で頂点へ変換する。
         """
-        obj = cmds.ls(comp, o=True, long=True)[0]         # コンポ→オブジェクト
-        if cmds.nodeType(obj) == "mesh":                  # shape の場合は親へ
-            obj = cmds.listRelatives(obj, p=True, pa=True)[0]
-        return obj
+        sel   = om2.MGlobal.getActiveSelectionList()
+        found = {}
+        edges = om2.MSelectionList()
+
+        def add(shape, xform, idx):
+            meshes = found.setdefault(xform, {})
+            key    = shape.fullPathName()
+            prev   = meshes.get(key, (shape, np.empty(0, np.int64)))[1]
+            meshes[key] = (shape, np.concatenate((prev, idx)))
+
+        for k in range(sel.length()):
+            try:
+                path, comp = sel.getComponent(k)
+            except RuntimeError:
+                continue                                  # DG ノードなど
+            if comp.isNull():                             # オブジェクト選択 → 全頂点
+                if not path.hasFn(om2.MFn.kTransform):
+                    path.pop()
+                xform = path.fullPathName()
+                for j in range(path.numberOfShapesDirectlyBelow()):
+                    shape = om2.MDagPath(path)
+                    shape.extendToShape(j)
+                    fn = om2.MFnMesh(shape) if shape.hasFn(om2.MFn.kMesh) else None
+                    if fn is not None and not fn.isIntermediateObject:
+                        add(shape, xform, np.arange(fn.numVertices, dtype=np.int64))
+                continue
+            if comp.hasFn(om2.MFn.kMeshEdgeComponent):
+                edges.add((path, comp))
+                continue
+
+            shape, xform = self._mesh_and_transform(path)
+            idx = np.asarray(om2.MFnSingleIndexedComponent(comp).getElements(),
+                             np.int64)
+            if comp.hasFn(om2.MFn.kMeshPolygonComponent):
+                idx = self._face_vertices(shape, idx)
+            elif not comp.hasFn(om2.MFn.kMeshVertComponent):
+                cmds.warning(f"{path.fullPathName()}: 頂点 / エッジ / フェース以外はスキップします。")
+                continue
+            add(shape, xform, idx)
+
+        if not edges.isEmpty():
+            conv = om2.MSelectionList()
+            for s in cmds.polyListComponentConversion(
+                    edges.getSelectionStrings(), fe=True, tv=True) or []:
+                conv.add(s)
+            for k in range(conv.length()):
+                path, comp = conv.getComponent(k)
+                shape, xform = self._mesh_and_transform(path)
+                add(shape, xform, np.asarray(
+                    om2.MFnSingleIndexedComponent(comp).getElements(), np.int64))
+        return found
 
     # ---------------------------------------------------------------
     # メイン処理
     # ---------------------------------------------------------------
     def move_to_selection_center(self):
         """現在の頂点選択の中心にピボットを移動"""
-        sel = cmds.ls(sl=True, fl=True)  # flat list で取得
-        if not sel:
+        verts_by_xform = self._selected_vertices()
+        if not verts_by_xform:
             cmds.warning("頂点を選択してください。")
             return
 
-        verts_by_xform = {}
-        for v in sel:
-            try:
-                pos = cmds.pointPosition(v, world=True)
-            except RuntimeError:
-                cmds.warning(f"{v} は頂点ではありません。スキップします。")
-                continue
+        # Transform ごとに選択頂点を連結 → 一括で統計
+        xforms, chunks = list(verts_by_xform), []
+        for xform in xforms:
+            pts = []
+            for shape, idx in verts_by_xform[xform].values():
+                world = np.array(om2.MFnMesh(shape).getPoints(om2.MSpace.kWorld),
+                                 np.float64)
+                pts.append(world[np.unique(idx), :3])
+            chunks.append(np.concatenate(pts))
+        stats = MeshStats(np.concatenate(chunks), [len(c) for c in chunks])
 
-            xform = self._transform_from_component(v)
-            verts_by_xform.setdefault(xform, []).append(om2.MVector(pos))
+        pivots = None
+        if self.placement == "base":
+            sl = om2.MSelectionList()
+            for xform in xforms:
+                sl.add(xform)
+            pivots = [tuple(om2.MFnTransform(sl.getDagPath(k))
+                            .rotatePivot(om2.MSpace.kWorld))[:3]
+                      for k in range(len(xforms))]
 
-        for xform, vecs in verts_by_xform.items():
-            center = sum(vecs, om2.MVector()) / len(vecs)
-            cmds.xform(xform, ws=True, piv=(center.x, center.y, center.z))
+        for xform, center in zip(xforms, pivot_points(stats, self.placement, pivots)):
+            cmds.xform(xform, ws=True, piv=tuple(center.tolist()))
             print(f"[PivotToSelectionCenter] {xform} → {center}")
 
         cmds.inViewMessage(
@@ -63,6 +161,9 @@ class PivotMover:
 # mover = PivotMover()
 # mover.move_to_selection_center()
 #
+# 枝の付け根 / BBox 中心に置く
+# PivotMover(placement="base").move_to_selection_center()
+#
 # -----------------------------------------------------------
 if __name__ == "__main__":
     PivotMover().move_to_selection_center()
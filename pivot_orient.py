@@ -4,15 +4,25 @@
 #  選択 Transform / Shape について：
 #    1. ピボットはそのまま         （位置のみ使用）
 #    2. バウンディングボックス中心を取得
+#       （axis="centroid" なら重心、"principal" なら最長主軸 = 枝の伸びる向き）
 #    3. vec = center - pivot  を +X に合わせる回転を計算
 #    4. Maya 2023+ : manipPivot + bakeCustomOrient
 #       Maya 2022- : orientGrp(親) を挿入して回転を打ち消す
+#
+#  batch=True : 全オブジェクトの回転を NumPy でまとめて計算し、OpenMaya で
+#               pp2Undoable コマンド 1 回として適用する（1 万個以上向け。Ctrl+Z 可）
+#    Maya 2023+ : rotate を直接書き換え、mesh 頂点と子 Transform のローカル値を補正
+#    Maya 2022- : orient 親を MDagModifier でまとめて作成・親子付け
 # =====================================================================
 import math, numpy as np
 import maya.cmds as cmds
 import maya.api.OpenMaya as om
 import maya.mel as mel
 
+from pp2_analysis import AXIS_MODES, MeshStats, x_directions
+from pp2_snapshot import gather_world_points
+from pp2_undo import EditLog, commit
+
 
 class PivotOrienter:
     """選択オブジェクトのピボットを BBox 中心方向へ向けるユーティリティ"""
@@ -40,13 +50,278 @@ class PivotOrienter:
         # 子側のローカル回転を打ち消す
         cmds.setAttr(tr + ".rotate", -rx, -ry, -rz)
 
+    # ---------- batch util : 配列版 ----------
+    @staticmethod
+    def _rotations_from_x(vecs):
+        """
+        +X を各 vec に重ねる最短回転（MQuaternion(+X, vec) の配列版）
+
+        戻り値: (N, 3, 3) 行ベクトル形式の回転行列（行 0 = vec の単位ベクトル）
+        """
+        v = vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+        q = np.empty((len(v), 4))                        # (w, x, y, z)
+        q[:, 0] = 1.0 + v[:, 0]                          # 1 + dot(+X, v)
+        q[:, 1] = 0.0                                    # cross(+X, v)
+        q[:, 2] = -v[:, 2]
+        q[:, 3] = v[:, 1]
+        flip = q[:, 0] < 1e-9                            # v ≒ −X は Z 軸周り 180°
+        q[flip] = (0.0, 0.0, 0.0, 1.0)
+        q /= np.linalg.norm(q, axis=1, keepdims=True)
+
+        w, x, y, z = q.T
+        m = np.empty((len(q), 3, 3))
+        m[:, 0] = np.stack([1 - 2*(y*y + z*z), 2*(x*y + w*z), 2*(x*z - w*y)], 1)
+        m[:, 1] = np.stack([2*(x*y - w*z), 1 - 2*(x*x + z*z), 2*(y*z + w*x)], 1)
+        m[:, 2] = np.stack([2*(x*z + w*y), 2*(y*z - w*x), 1 - 2*(x*x + y*y)], 1)
+        return m
+
+    @staticmethod
+    def _euler_xyz(m):
+        """(N, 3, 3) 行ベクトル形式の回転行列 → XYZ オイラー角 [rad] (N, 3)"""
+        sy = -m[:, 0, 2]
+        cy = np.hypot(m[:, 0, 0], m[:, 0, 1])
+        ry = np.arctan2(sy, cy)
+        ok = cy > 1e-9
+        rx = np.where(ok, np.arctan2(m[:, 1, 2], m[:, 2, 2]),
+                      np.arctan2(m[:, 1, 0] * np.sign(sy), m[:, 1, 1]))
+        rz = np.where(ok, np.arctan2(m[:, 0, 1], m[:, 0, 0]), 0.0)
+        return np.stack([rx, ry, rz], 1)
+
+    @staticmethod
+    def _rotation_part(mtx):
+        """(N, 16) 行列 → 行を正規化した (N, 3, 3) 回転部分"""
+        r = np.asarray(mtx, np.float64).reshape(-1, 4, 4)[:, :3, :3]
+        return r / np.linalg.norm(r, axis=2, keepdims=True)
+
+    @staticmethod
+    def _meshes(path):
+        """Transform 直下の非 intermediate mesh の MDagPath"""
+        out = []
+        for k in range(path.numberOfShapesDirectlyBelow()):
+            sp = om.MDagPath(path)
+            sp.extendToShape(k)
+            if sp.apiType() == om.MFn.kMesh and not om.MFnDagNode(sp).isIntermediateObject:
+                out.append(sp)
+        return out
+
+    def _collect(self):
+        """
+        選択 → Transform ごとの (MObject, ピボット, +X を向ける方向)
+
+        方向は先頭 mesh のワールド頂点から pp2_analysis でまとめて求める
+        （axis="bbox" なら exactWorldBoundingBox 相当）。
+        """
+        sel = om.MGlobal.getActiveSelectionList()
+        seen, objs, pivots, shapes = set(), [], [], []
+        for k in range(sel.length()):
+            try:
+                path = sel.getDagPath(k)
+            except (RuntimeError, TypeError):
+                continue                                  # DG ノード
+            if not path.hasFn(om.MFn.kTransform):
+                path.pop()                                # Shape → 親 Transform
+            name = path.fullPathName()
+            if not name or name in seen:
+                continue
+            seen.add(name)
+
+            meshes = self._meshes(path)
+            if not meshes:
+                continue
+            p = om.MFnTransform(path).rotatePivot(om.MSpace.kWorld)
+            objs.append(path.node())
+            pivots.append((p.x, p.y, p.z))
+            shapes.append(meshes[0])
+
+        pivots = np.array(pivots, np.float64).reshape(-1, 3)
+        if not objs:
+            return objs, pivots, pivots
+        stats = MeshStats(*gather_world_points(shapes))
+        for k in np.flatnonzero(~stats.valid):
+            cmds.warning(f"Skip (empty mesh): {shapes[k].fullPathName()}")
+        keep = stats.valid
+        objs = [o for o, v in zip(objs, keep) if v]
+        return objs, pivots[keep], x_directions(stats, self.axis, pivots)[keep]
+
+    # ---------- batch : rotate 直接書き換え ----------
+    def _apply_rotations(self, objs, rots, log):
+        """
+        各 Transform のワールド向きを rots にし、見た目が変わらないよう
+        mesh 頂点（オブジェクト空間）と子 Transform のローカル値を補正する
+
+        親子の両方が選ばれていても崩れないよう深さごとに浅い順で処理する（親を
+        書き換えた後のワールド行列から子の回転を決める）。子は親子付けし直さない
+        ので名前もパスも変わらない。編集はすべて log に記録する（undo / redo 用）。
+        """
+        paths = [om.MDagPath.getAPathTo(o) for o in objs]
+        depth = np.array([p.length() for p in paths])
+        for d in np.unique(depth):
+            idx = np.flatnonzero(depth == d)
+            lvl = [paths[i] for i in idx]
+
+            w_old, p_rot = [], []
+            for p in lvl:
+                pp = om.MDagPath(p)
+                pp.pop()
+                p_rot.append(list(pp.inclusiveMatrix()) if pp.length() else
+                             list(om.MMatrix()))
+                w_old.append(list(p.inclusiveMatrix()))
+            local = rots[idx] @ self._rotation_part(p_rot).transpose(0, 2, 1)
+
+            for p, e in zip(lvl, self._euler_xyz(local).tolist()):
+                fn = om.MFnTransform(p)
+                log.set(lambda r, fn=fn: fn.setRotation(r, om.MSpace.kTransform),
+                        fn.rotation(om.MSpace.kTransform), om.MEulerRotation(*e))
+
+            w_new = np.array([list(p.inclusiveMatrix()) for p in lvl])
+            delta = (np.array(w_old).reshape(-1, 4, 4)           # 旧ローカル → 新ローカル
+                     @ np.linalg.inv(w_new.reshape(-1, 4, 4)))
+            for p, dm in zip(lvl, delta):
+                for sp in self._meshes(p):
+                    fm  = om.MFnMesh(sp)
+                    old = fm.getPoints(om.MSpace.kObject)
+                    pts = np.array(old).reshape(-1, 4) @ dm
+                    log.set(lambda q, fm=fm: fm.setPoints(q, om.MSpace.kObject),
+                            old, [om.MPoint(*q) for q in pts.tolist()])
+                for c in range(p.childCount()):
+                    child = p.child(c)
+                    if child.hasFn(om.MFn.kTransform):
+                        self._compensate_child(om.MFnTransform(child), dm, log)
+
+    @classmethod
+    def _compensate_child(cls, fn, delta, log):
+        """
+        親のローカル空間が delta (4x4) だけ動いた子の rotate / translate を、
+        ワールド行列が変わらない値に書き換える
+
+            M  = … · R · [rp] · [rpt] · [T]   →   M · delta
+            R' = R · D
+            T' = (rp + rpt + T) · D + d − rp − rpt      （D, d = delta の 3x3 / 移動）
+
+        scale / shear / rotateAxis / ピボットはそのまま。親の scale が非一様で
+        D が回転でない時は R · D に最も近い回転を使う。
+        """
+        d3    = delta[:3, :3]
+        r_old = fn.rotation(om.MSpace.kTransform)
+        t_old = fn.translation(om.MSpace.kTransform)
+        r = np.array(list(r_old.asMatrix())).reshape(4, 4)[:3, :3] @ d3
+        u, _, vt = np.linalg.svd(r)
+        rx, ry, rz = cls._euler_xyz((u @ vt)[None])[0].tolist()
+
+        base = (np.array(list(fn.rotatePivot(om.MSpace.kTransform)))[:3]
+                + np.array(list(fn.rotatePivotTranslation(om.MSpace.kTransform)))[:3])
+        t = (base + np.array(list(t_old))[:3]) @ d3 + delta[3, :3] - base
+        log.set(lambda e: fn.setRotation(e, om.MSpace.kTransform),
+                r_old, om.MEulerRotation(rx, ry, rz))
+        log.set(lambda v: fn.setTranslation(v, om.MSpace.kTransform),
+                t_old, om.MVector(*t.tolist()))
+
+    # ---------- batch : orient 親をまとめて挿入 (Maya 2022-) ----------
+    def _insert_orient_parents(self, objs, rots, pivots, log):
+        """
+        ori_<名前> を各 Transform の親として一括作成し、ワールド位置を保ったまま
+        ぶら下げる（ori がピボット位置で +X → BBox 中心の向きを持つ）
+
+        MDagModifier は doIt / undoIt の組で、Transform の書き換えは前後の値で
+        log に記録する（undo / redo 用）。
+        """
+        paths = [om.MDagPath.getAPathTo(o) for o in objs]
+        w_old = np.array([list(p.inclusiveMatrix()) for p in paths])
+
+        mod, oris, p_inv = om.MDagModifier(), [], []
+        for o, path in zip(objs, paths):
+            pp = om.MDagPath(path)
+            pp.pop()
+            parent = pp.node() if pp.length() else om.MObject.kNullObj
+            ori = mod.createNode("transform", parent)
+            mod.renameNode(ori, "ori_" + om.MFnDagNode(o).name())
+            oris.append(ori)
+            p_inv.append(list(pp.inclusiveMatrixInverse()) if pp.length()
+                         else list(om.MMatrix()))
+        log.call(mod.doIt, mod.undoIt)
+
+        # ori : ワールド = [rots | pivot]（新規ノードなので undo は mod.undoIt が消す）
+        w_ori = np.zeros((len(objs), 4, 4))
+        w_ori[:, :3, :3] = rots
+        w_ori[:, 3, :3]  = pivots
+        w_ori[:, 3, 3]   = 1.0
+        ori_local = w_ori @ np.array(p_inv).reshape(-1, 4, 4)
+        for ori, m in zip(oris, ori_local):
+            fn = om.MFnTransform(ori)
+            tm = om.MTransformationMatrix(om.MMatrix(m.ravel().tolist()))
+            log.call(lambda fn=fn, tm=tm: fn.setTransformation(tm), lambda: None)
+
+        mod = om.MDagModifier()
+        for o, ori in zip(objs, oris):
+            mod.reparentNode(o, ori)
+        log.call(mod.doIt, mod.undoIt)
+
+        # 子側：回転はワールド向き × ori⁻¹、移動はピボットが ori 原点に来る値
+        local = self._rotation_part(w_old) @ rots.transpose(0, 2, 1)
+        for o, (rx, ry, rz) in zip(objs, self._euler_xyz(local).tolist()):
+            fn = om.MFnTransform(o)
+            log.set(lambda e, fn=fn: fn.setRotation(e, om.MSpace.kTransform),
+                    fn.rotation(om.MSpace.kTransform), om.MEulerRotation(rx, ry, rz))
+            rp = om.MVector(fn.rotatePivot(om.MSpace.kTransform))
+            rp += fn.rotatePivotTranslation(om.MSpace.kTransform)
+            log.set(lambda v, fn=fn: fn.setTranslation(v, om.MSpace.kTransform),
+                    fn.translation(om.MSpace.kTransform), -rp)
+
+    def orient_batch(self):
+        """
+        選択全体を一括で処理する
+
+        MFn* / MDagModifier による編集はそれだけでは undo キューに積まれないので、
+        前後の値を EditLog に記録して pp2Undoable コマンド 1 回として登録する
+        （Ctrl+Z で全体が戻る）。
+        """
+        objs, pivots, vecs = self._collect()
+        if not objs:
+            cmds.warning("Nothing selected.")
+            return
+
+        ok   = ~np.all(np.isclose(vecs, 0.0), axis=1)
+        for o in np.flatnonzero(~ok):
+            cmds.warning(f"Skip (pivot == center): "
+                         f"{om.MDagPath.getAPathTo(objs[o]).fullPathName()}")
+        objs  = [o for o, k in zip(objs, ok) if k]
+        rots  = self._rotations_from_x(vecs[ok])
+
+        if objs:
+            log = EditLog()
+            if self.has_bake:
+                apply = lambda: self._apply_rotations(objs, rots, log)
+            else:
+                apply = lambda: self._insert_orient_parents(objs, rots, pivots[ok], log)
+            commit(apply, log.undo, log.redo)
+
+        cmds.inViewMessage(
+            amg=f"<hl>BBox-Pivot oriented : {len(objs)} obj</hl>",
+            pos="topCenter",
+            fade=True,
+        )
+
     # ---------- メイン処理 ----------
-    def __init__(self):
+    def __init__(self, batch=False, axis="bbox"):
+        """
+        axis : +X を向ける方向
+               "bbox"      BBox 中心 − ピボット（従来どおり）
+               "centroid"  頂点の重心 − ピボット
+               "principal" 最長主軸（重心側へ。枝の向き）
+        """
+        if axis not in AXIS_MODES:
+            raise ValueError(f"axis は {AXIS_MODES} のいずれか: {axis}")
         # Maya 2023 以降なら bakeCustomOrient が利用可能
         self.has_bake = mel.eval('exists "bakeCustomOrient"')
+        self.batch    = batch
+        self.axis     = axis
 
     def orient_selected(self):
         """現在の選択に対してピボットを BBox 方向へ向ける"""
+        if self.batch:
+            self.orient_batch()
+            return
+
         sel = cmds.ls(sl=True, long=True)
         if not sel:
             cmds.warning("Nothing selected.")
@@ -69,13 +344,19 @@ class PivotOrienter:
 
             # ピボット（world）と BBox 中心（world）
             pivot = np.array(cmds.xform(node, q=True, ws=True, rp=True), dtype=np.float64)
-            bb = cmds.exactWorldBoundingBox(shape)
-            center = np.array(
-                [(bb[0] + bb[3]) / 2.0, (bb[1] + bb[4]) / 2.0, (bb[2] + bb[5]) / 2.0],
-                dtype=np.float64,
-            )
-
-            vec = center - pivot
+            if self.axis == "bbox":
+                bb = cmds.exactWorldBoundingBox(shape)
+                center = np.array(
+                    [(bb[0] + bb[3]) / 2.0, (bb[1] + bb[4]) / 2.0, (bb[2] + bb[5]) / 2.0],
+                    dtype=np.float64,
+                )
+                vec = center - pivot
+            else:
+                stats = MeshStats(*gather_world_points([shape]))
+                if not stats.valid[0]:
+                    cmds.warning(f"Skip (empty mesh): {node}")
+                    continue
+                vec = x_directions(stats, self.axis, pivot[None])[0]
             if np.allclose(vec, 0):
                 cmds.warning(f"Skip (pivot == center): {node}")
                 continue
@@ -109,6 +390,12 @@ class PivotOrienter:
 # orienter = PivotOrienter()
 # orienter.orient_selected()
 #
+# 1 万個以上は一括モード
+# PivotOrienter(batch=True).orient_selected()
+#
+# 枝は最長主軸へ向ける
+# PivotOrienter(batch=True, axis="principal").orient_selected()
+#
 # -----------------------------------------------------------
 if __name__ == "__main__":
     # Maya Script Editor でそのまま走らせても OK
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+pp2
+-----------------------------------
+Pivot Painter 2 ツール群のパッケージ入口（サブモジュールは遅延 import）
+
+    import pp2                                   # numpy も Maya もまだ読まない
+    pp2.pivot_center.PivotMover().move_to_selection_center()
+    pp2.exporter.PP2Exporter(base_name="tree01").export()
+
+pp2.<名前> に初めて触れた時に、対応する同じフォルダのモジュール
+（pp2_exporter.py など）を読む。シェルフボタンは使うツールの分しか待たない。
+既存の import pp2_exporter などもそのまま使える（同じモジュールを指す）。
+"""
+
+from __future__ import annotations
+import importlib
+
+MODULES = {                         # pp2.<名前> → モジュール名
+    "analysis":      "pp2_analysis",
+    "background":    "pp2_async",
+    "atlas":         "pp2_atlas",
+    "batch":         "pp2_batch",
+    "cache":         "pp2_cache",
+    "encode":        "pp2_encode",
+    "env":           "pp2_env",
+    "exporter":      "pp2_exporter",
+    "hierarchy":     "pp2_hierarchy",
+    "index":         "pp2_index",
+    "layout":        "pp2_layout",
+    "lod":           "pp2_lod",
+    "pivotposition": "pp2_pivotposition",
+    "profile":       "pp2_profile",
+    "runtime":       "pp2_runtime",
+    "shells":        "pp2_shells",
+    "snapshot":      "pp2_snapshot",
+    "undo":          "pp2_undo",
+    "validate":      "pp2_validate",
+    "writers":       "pp2_writers",
+    "xvector":       "PP2_XVector",
+    "uv":            "set_pp2UV",
+    "pivot_center":  "pivot_center",
+    "pivot_orient":  "pivot_orient",
+}
+
+def __getattr__(name: str):
+    if name not in MODULES:
+        raise AttributeError(f"module 'pp2' has no attribute {name!r}")
+    mod = importlib.import_module(MODULES[name])
+    globals()[name] = mod
+    return mod
+
+
+def __dir__():
+    return sorted(set(globals()) | set(MODULES))
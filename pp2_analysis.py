@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+pp2_analysis.py
+-----------------------------------
+Pivot Painter 2 用：Maya 非依存のメッシュ形状解析
+
+多数の mesh のワールド頂点を 1 本の (P, 3) 配列に連結し、mesh ごとの頂点数
+counts (N,) と組で受け取って、重心・AABB・主軸 (PCA) を NumPy の一括演算で求める。
+頂点配列の取得は pp2_snapshot.gather_world_points。
+
+    stats = MeshStats(points, counts)
+    stats.centroids   (N, 3)     頂点の平均
+    stats.mins/maxs   (N, 3)     AABB
+    stats.axes        (N, 3, 3)  主軸（行 0 が最長。分散の大きい順）
+    stats.extents     (N, 3)     各主軸方向の分散
+    stats.valid       (N,)       頂点のある mesh か（無い mesh の統計は NaN）
+
+ピボット位置 / +X 方向の選び方
+    pivot_points(stats, mode, pivots) : "centroid" / "bbox" / "base"
+    x_directions(stats, mode, pivots) : "bbox" / "centroid" / "principal"
+"""
+
+from __future__ import annotations
+import numpy as np
+
+PIVOT_MODES = ("centroid", "bbox", "base")
+AXIS_MODES  = ("bbox", "centroid", "principal")
+
+
+def segment_starts(counts) -> np.ndarray:
+    """mesh ごとの頂点数 → 連結配列での先頭位置"""
+    counts = np.asarray(counts, np.int64)
+    return np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.int64)
+
+
+class MeshStats:
+    """連結頂点配列から mesh ごとの形状統計をまとめて求める"""
+
+    def __init__(self, points, counts) -> None:
+        """
+        Parameters
+        ----------
+        points : (P, 3) 全 mesh のワールド頂点を連結したもの
+        counts : (N,)   mesh ごとの頂点数
+
+        頂点の無い mesh（counts == 0）は valid が False になり、統計は NaN。
+        呼び出し側で valid を見て飛ばす。
+        """
+        self.points = np.asarray(points, np.float64).reshape(-1, 3)
+        self.counts = np.asarray(counts, np.int64)
+        if (self.counts < 0).any() or self.counts.sum() != len(self.points):
+            raise ValueError("counts が頂点数と合いません")
+        self.valid  = self.counts > 0
+        self.starts = segment_starts(self.counts)
+
+        # 空の区間は reduceat が扱えないので、頂点のある mesh の先頭だけで区切る
+        k, vs = int(self.valid.sum()), self.starts[self.valid]
+        n = self.counts[self.valid, None].astype(np.float64)
+        centroids = self._full(np.add.reduceat(self.points, vs, axis=0) / n if k else
+                               np.empty((0, 3)))
+        self.centroids = centroids
+        self.mins = self._full(np.minimum.reduceat(self.points, vs, axis=0) if k else
+                               np.empty((0, 3)))
+        self.maxs = self._full(np.maximum.reduceat(self.points, vs, axis=0) if k else
+                               np.empty((0, 3)))
+
+        # 共分散 = E[(p−μ)(p−μ)ᵀ]：重心を引いてから 6 成分の積和を reduceat で求める
+        # （(P, 3, 3) の一時配列を作らない。重心を引くのは桁落ち防止）
+        d   = self.points - np.repeat(centroids[self.valid], self.counts[self.valid], axis=0)
+        cov = np.empty((k, 3, 3))
+        for i, j in ((0, 0), (1, 1), (2, 2), (0, 1), (0, 2), (1, 2)):
+            cov[:, i, j] = cov[:, j, i] = (np.add.reduceat(d[:, i] * d[:, j], vs)
+                                           if k else 0.0)
+        cov /= n[:, :, None]
+        w, v = np.linalg.eigh(cov)                   # 昇順・列ベクトル
+        self.extents = self._full(w[:, ::-1])
+        self.axes    = self._full(v[:, :, ::-1].transpose(0, 2, 1))
+
+    def _full(self, a: np.ndarray) -> np.ndarray:
+        """頂点のある mesh だけの配列 → (N, ...)（空の mesh の行は NaN）"""
+        out = np.full((len(self.counts),) + a.shape[1:], np.nan)
+        out[self.valid] = a
+        return out
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    @property
+    def bbox_centers(self) -> np.ndarray:
+        return (self.mins + self.maxs) * 0.5
+
+    @property
+    def bbox_sizes(self) -> np.ndarray:
+        return self.maxs - self.mins
+
+    # ------------------------------------------------------------------
+    def signed_axis(self, k: int, toward) -> np.ndarray:
+        """主軸 k を toward (N, 3) と同じ向きになるよう符号を揃える"""
+        a = self.axes[:, k].copy()
+        a[np.einsum("ij,ij->i", a, np.asarray(toward, np.float64)) < 0.0] *= -1.0
+        return a
+
+    def project_range(self, axis, origin) -> tuple[np.ndarray, np.ndarray]:
+        """方向 axis (N, 3) 上での頂点の射影範囲 (min, max)。origin (N, 3) 基準"""
+        m   = self.valid
+        cnt = self.counts[m]
+        rel = self.points - np.repeat(np.asarray(origin, np.float64)[m], cnt, axis=0)
+        t   = np.einsum("ij,ij->i", rel, np.repeat(np.asarray(axis)[m], cnt, axis=0))
+        if not m.any():
+            return self._full(np.empty(0)), self._full(np.empty(0))
+        return (self._full(np.minimum.reduceat(t, self.starts[m])),
+                self._full(np.maximum.reduceat(t, self.starts[m])))
+
+
+# ----------------------------------------------------------------------
+# ピボット / 向きの選択
+# ----------------------------------------------------------------------
+def pivot_points(stats: MeshStats, mode: str = "centroid", pivots=None) -> np.ndarray:
+    """
+    新しいピボット位置 (N, 3)
+
+    centroid : 頂点の重心
+    bbox     : AABB 中心
+    base     : 最長主軸上の、現在のピボット (pivots) に近い方の端
+               （枝なら付け根。pivots が None なら重心を基準に負側の端）
+    """
+    if mode == "centroid":
+        return stats.centroids.copy()
+    if mode == "bbox":
+        return stats.bbox_centers
+    if mode == "base":
+        c    = stats.centroids
+        axis = stats.axes[:, 0] if pivots is None else \
+            stats.signed_axis(0, c - np.asarray(pivots, np.float64))
+        lo, _ = stats.project_range(axis, c)
+        return c + axis * lo[:, None]
+    raise ValueError(f"未知のピボット位置: {mode} ({'/'.join(PIVOT_MODES)})")
+
+
+def x_directions(stats: MeshStats, mode: str = "bbox", pivots=None) -> np.ndarray:
+    """
+    ピボットの +X を向ける方向 (N, 3)（正規化しない。長さ 0 はスキップ対象）
+
+    bbox      : AABB 中心 − ピボット
+    centroid  : 重心 − ピボット
+    principal : 最長主軸（重心がある側へ符号を揃える。枝なら先端方向）
+    """
+    pivots = np.asarray(pivots, np.float64)
+    if mode == "bbox":
+        return stats.bbox_centers - pivots
+    if mode == "centroid":
+        return stats.centroids - pivots
+    if mode == "principal":
+        toward = stats.centroids - pivots
+        axis   = stats.signed_axis(0, toward)
+        # 最長主軸が決まらない（球・点）ものは重心方向
+        flat = stats.extents[:, 0] <= stats.extents[:, 1] * (1.0 + 1e-9)
+        axis[flat] = toward[flat]
+        return axis
+    raise ValueError(f"未知の向き: {mode} ({'/'.join(AXIS_MODES)})")
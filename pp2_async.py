@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+pp2_async.py
+-----------------------------------
+Pivot Painter 2 用：エンコード / 書き出しのバックグラウンド実行
+
+シーンに触れる工程（スナップショット・グリッド）はメインスレッドで済ませ、
+NumPy のエンコードと EXR / PNG の圧縮・書き出しだけをスレッドプールで走らせる。
+どちらも大半の時間 GIL を離すので、複数ルートを並列に書き出せる。
+
+    job = submit(PP2BackgroundJob("tree01", total=4), work, on_done=finish)
+    job.progress   # 0..1
+    job.cancel()   # 次の工程の手前で止める（PP2Cancelled）
+
+進捗 / 完了のコールバックは maya.utils.executeDeferred でメインスレッドに戻して呼ぶ
+（Maya の外では直接呼ぶ）。
+"""
+
+from __future__ import annotations
+import os, threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+
+_POOL: ThreadPoolExecutor | None = None
+_LOCK = threading.Lock()
+
+
+class PP2Cancelled(Exception):
+    """PP2BackgroundJob.cancel() で中断された"""
+
+
+def pool(workers: int | None = None) -> ThreadPoolExecutor:
+    """共有スレッドプール（初回に作る。workers は初回だけ有効）"""
+    global _POOL
+    with _LOCK:
+        if _POOL is None:
+            _POOL = ThreadPoolExecutor(
+                max_workers=workers or min(4, os.cpu_count() or 1),
+                thread_name_prefix="pp2")
+        return _POOL
+
+
+def shutdown(wait: bool = True) -> None:
+    """共有プールを閉じる（次の submit で作り直す）"""
+    global _POOL
+    with _LOCK:
+        if _POOL is not None:
+            _POOL.shutdown(wait=wait)
+            _POOL = None
+
+
+def call_on_main(fn, *args) -> None:
+    """fn(*args) を Maya のメインスレッドで呼ぶ（Maya の外では今すぐ呼ぶ）"""
+    try:
+        import maya.utils
+    except ImportError:
+        fn(*args)
+        return
+    maya.utils.executeDeferred(fn, *args)
+
+
+# ----------------------------------------------------------------------
+class PP2BackgroundJob:
+    """バックグラウンドで走る 1 回分の書き出し"""
+
+    def __init__(self, name: str, total: int = 1, on_progress=None) -> None:
+        """
+        Parameters
+        ----------
+        name        : 表示用の名前
+        total       : 工程数（progress の分母）
+        on_progress : 工程の開始 / 終了ごとに on_progress(job) をメインスレッドで呼ぶ
+        """
+        self.name    = name
+        self.total   = max(1, int(total))
+        self.done_n  = 0
+        self.current: str | None = None
+        self.future: Future | None = None
+        self.on_progress = on_progress
+        self._cancel = threading.Event()
+
+    # ------------------------------------------------------------------
+    @property
+    def progress(self) -> float:
+        return min(1.0, self.done_n / self.total)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def cancel(self) -> None:
+        """未開始ならキャンセル、実行中なら次の工程の手前で止める"""
+        self._cancel.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    def done(self) -> bool:
+        return self.future is not None and self.future.done()
+
+    def result(self, timeout: float | None = None):
+        """完了を待って戻り値を返す（中断なら PP2Cancelled、失敗ならその例外）"""
+        if self.future.cancelled():
+            raise PP2Cancelled(self.name)
+        return self.future.result(timeout)
+
+    # ------------------------------------------------------------------
+    @contextmanager
+    def stage(self, name: str):
+        """ワーカー側の工程。開始前に中断を確かめ、前後で進捗を通知する"""
+        if self.cancelled:
+            raise PP2Cancelled(self.name)
+        self.current = name
+        self._report()
+        yield
+        self.done_n += 1
+        self._report()
+
+    def _report(self) -> None:
+        if self.on_progress is not None:
+            call_on_main(self.on_progress, self)
+
+
+def submit(job: PP2BackgroundJob, fn, *args, on_done=None) -> PP2BackgroundJob:
+    """
+    fn(*args) を共有プールで実行する
+
+    on_done : 完了（成功・失敗・中断とも）時に on_done(job) をメインスレッドで呼ぶ
+    """
+    job.future = pool().submit(fn, *args)
+    if on_done is not None:
+        job.future.add_done_callback(lambda _f: call_on_main(on_done, job))
+    return job
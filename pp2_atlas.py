@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+pp2_atlas.py
+-----------------------------------
+Pivot Painter 2 用：複数アセットを 1 組のテクスチャにまとめるアトラス（Maya 非依存）
+
+各ルート（アセット）に共通の列数で行ブロックを割り当て、上から順に積む。
+ブロック内のセルの並べ方は ordering（pp2_layout.ORDERINGS）で選べる。
+
+    行 0 ─┬─ asset0 (row_offset 0,  rows r0)
+          ├─ asset1 (row_offset r0, rows r1)
+          └─ ...
+
+セル番号はアトラス全体での番号 (row * cols + col) なので、
+_pack_parent の親テクセル番号もアトラス空間になる（encode がそのまま使う）。
+ルートの親は単体出力と同じく自分自身のテクセル（pp2_encode.parent_cells）。
+PivotPosition の ΔX / ΔY はアセットごとに自分のルート基準。
+
+各アセットの行オフセット・行数・RowHeight はマニフェスト JSON
+（<base>_atlas.json）に記録する。
+"""
+
+from __future__ import annotations
+import json, os
+from contextlib import nullcontext
+import numpy as np
+
+from pp2_encode import empty_texture, encode_pivot_position, encode_xvector
+from pp2_layout import PP2Layout, best_cols, order_cells, relative_paths
+from pp2_writers import output_paths, save_image
+
+
+class PP2Atlas:
+    """
+    アセットごとの行ブロック割り当て
+
+    Attributes
+    ----------
+    cols, rows : アトラス全体の列数 / 行数
+    names      : アセット名（マニフェスト用）
+    offsets    : (A,) 各アセットの先頭行
+    block_rows : (A,) 各アセットの行数
+    layouts    : アセットごとの PP2Layout（グリッドはアトラス全体、セルは全体番号）
+    """
+
+    def __init__(self, snaps, names=None, mincol: int = 5, uvset: str = "pp2_uv",
+                 ordering: str = "dfs") -> None:
+        """
+        Parameters
+        ----------
+        snaps  : アセットごとの PP2Snapshot
+        names  : アセット名（None ならルートの短い名前）
+        mincol : 最小列数（列数は全 Transform 数に対して best_cols で決める）
+        ordering : 各アセットの行ブロック内でのセルの並べ方
+        """
+        self.snaps = list(snaps)
+        if not self.snaps:
+            raise ValueError("アセットがありません")
+        self.names = list(names) if names else [s.root.rpartition("|")[2]
+                                                for s in self.snaps]
+        sizes = np.array([len(s) for s in self.snaps], np.int64)
+
+        self.cols       = best_cols(int(sizes.sum()), mincol)
+        self.block_rows = -(-sizes // self.cols)                 # ceil
+        self.offsets    = np.concatenate(([0], np.cumsum(self.block_rows)[:-1]))
+        self.rows       = int(self.block_rows.sum())
+        self.starts     = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+
+        self.layouts = [
+            PP2Layout(self.cols, self.rows, relative_paths(s.paths),
+                      off * self.cols + order_cells(s.parents, s.depths,
+                                                    self.cols, r, ordering),
+                      uvset, ordering)
+            for s, off, r in zip(self.snaps, self.offsets.tolist(),
+                                 self.block_rows.tolist())
+        ]
+
+    # ------------------------------------------------------------------
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.rows, self.cols
+
+    @property
+    def row_height(self) -> float:
+        return 1.0 / self.rows
+
+    def merged(self) -> dict:
+        """
+        全アセットを連結した配列（親はアトラス内の通し番号に付け替え）
+
+        ルートの親は単体出力と同じく -1 のまま（エンコード時に自分自身のセルになる）。
+        """
+        parents = np.concatenate([
+            np.where(s.parents >= 0, s.parents + st, -1)
+            for s, st in zip(self.snaps, self.starts.tolist())])
+        return {
+            "pivots":   np.concatenate([s.pivots for s in self.snaps]),
+            "matrices": np.concatenate([s.matrices for s in self.snaps]),
+            "depths":   np.concatenate([s.depths for s in self.snaps]),
+            "parents":  parents,
+            "cells":    np.concatenate([lay.cells for lay in self.layouts]),
+        }
+
+    def encode(self, outputs=("pivotpos", "xvector")) -> dict[str, np.ndarray]:
+        """アトラスの RGBA 配列 {出力名: (rows, cols, 4)}"""
+        m, tex = self.merged(), {}
+        if "pivotpos" in outputs:
+            out = empty_texture(self.shape)
+            for st, s in zip(self.starts.tolist(), self.snaps):
+                encode_pivot_position(m["pivots"], m["parents"], m["cells"],
+                                      self.shape, root=st, out=out,
+                                      index=np.arange(st, st + len(s)))
+            tex["pivotpos"] = out
+        if "xvector" in outputs:
+            tex["xvector"] = encode_xvector(m["matrices"], m["depths"],
+                                            m["cells"], self.shape)
+        return tex
+
+    # ------------------------------------------------------------------
+    def manifest(self, textures: dict[str, str] | None = None) -> dict:
+        """マニフェスト（UE のマテリアルインスタンス設定用）"""
+        return {
+            "version":    1,
+            "cols":       self.cols,
+            "rows":       self.rows,
+            "row_height": self.row_height,
+            "textures":   textures or {},
+            "assets": [
+                {
+                    "name":       name,
+                    "root":       s.root,
+                    "nodes":      len(s),
+                    "row_offset": int(off),
+                    "rows":       int(r),
+                    "v_offset":   off / self.rows,
+                    "row_height": self.row_height,
+                }
+                for name, s, off, r in zip(self.names, self.snaps,
+                                           self.offsets.tolist(),
+                                           self.block_rows.tolist())
+            ],
+        }
+
+
+# ----------------------------------------------------------------------
+def write_atlas(
+    atlas: PP2Atlas,
+    out_dir: str,
+    base_name: str,
+    outputs=("pivotpos", "xvector"),
+    stage=None,
+    exr_options: dict | None = None,
+    formats: dict | None = None,
+) -> dict:
+    """
+    アトラスのテクスチャとマニフェストを書き出す
+
+    formats : {出力名: 形式}（pp2_writers.WRITERS のキー）
+
+    Returns
+    -------
+    {"outputs": {出力名: パス}, "manifest": マニフェストのパス}
+    """
+    stage = stage or (lambda name: nullcontext())
+    os.makedirs(out_dir, exist_ok=True)
+    targets = output_paths(out_dir, base_name, outputs, formats)
+    paths   = {k: p for k, (p, _) in targets.items()}
+
+    with stage("encode"):
+        tex = atlas.encode(outputs)
+    for name, (path, fmt) in targets.items():
+        with stage(f"write_{name}"):
+            save_image(path, tex[name], fmt, exr_options)
+
+    manifest = os.path.join(out_dir, f"{base_name}_atlas.json")
+    with open(manifest, "w", encoding="utf-8") as f:
+        json.dump(atlas.manifest({k: os.path.basename(p) for k, p in paths.items()}),
+                  f, indent=2)
+    return {"outputs": paths, "manifest": manifest}
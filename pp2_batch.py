@@ -0,0 +1,492 @@
+# -*- coding: utf-8 -*-
+"""
+pp2_batch.py
+-----------------------------------
+Pivot Painter 2 用：複数シーンのヘッドレス一括エクスポート（mayapy）
+
+シーン 1 つを 1 ワーカープロセスに割り当て、
+UV レイアウト → PivotPosition EXR / X-Vector PNG 書き出しを並列に行い、
+結果を JSON サマリにまとめる。
+
+シーンへのアクセスは SceneAdapter 経由
+    maya : maya.standalone で .ma / .mb / .fbx を開く（mayapy で実行）
+    json : 階層を記述した JSON を読むシーン代替（Maya 不要。
+           パイプラインと並列スケジューリングの確認用）
+    shells : maya と同じだが、roots に結合 mesh を渡すとシェル分けした階層を
+             ノードを作らずに書き出す（pp2_shells）
+
+使い方
+    mayapy pp2_batch.py tree01.ma tree02.fbx --roots trunk --out D:/PP2_out --workers 4
+    mayapy pp2_batch.py --jobs jobs.json --out D:/PP2_out --summary D:/PP2_out/summary.json
+    mayapy pp2_batch.py forest.ma --roots tree01 tree02 tree03 --atlas --out D:/PP2_out
+        （シーン内のルートを 1 組のアトラスに。<scene>_atlas.json に行オフセット）
+    mayapy pp2_batch.py tree01.ma --roots trunk --lods 2 1 --out D:/PP2_out
+        （LOD0 に加えて深さ 2 以上 / 1 以上をたたんだ LOD。<scene>_lods.json）
+    mayapy pp2_batch.py tree01.ma --roots trunk --validate --out D:/PP2_out
+        （書き出したテクスチャを読み戻して pp2_validate で検証。問題があればジョブは失敗）
+        jobs.json = [{"scene": "tree01.ma", "roots": ["trunk"]}, ...]
+    python pp2_batch.py forest.json --adapter json --roots trunk --out /tmp/pp2
+"""
+
+from __future__ import annotations
+import argparse, json, os, sys, time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+
+from pp2_atlas import PP2Atlas, write_atlas
+from pp2_hierarchy import PP2Snapshot
+from pp2_layout import ORDERINGS, PP2Layout
+from pp2_lod import lod_chain, write_lods
+from pp2_validate import validate_atlas, validate_snapshot
+from pp2_writers import write_textures
+
+OUTPUTS = ("pivotpos", "xvector")
+
+
+# ----------------------------------------------------------------------
+# シーン アダプタ
+# ----------------------------------------------------------------------
+class SceneAdapter(ABC):
+    """バッチ処理が使うシーン操作の最小インターフェース（欠けていれば作る時に TypeError）"""
+
+    @abstractmethod
+    def open(self, path: str) -> None:
+        """シーンを開く（直前のシーンは破棄してよい）"""
+
+    @abstractmethod
+    def snapshot(self, root: str) -> PP2Snapshot:
+        """root 以下の階層スナップショット（UV は不要）"""
+
+    @abstractmethod
+    def write_layout(self, root: str, snap: PP2Snapshot, layout: PP2Layout) -> None:
+        """layout を pp2_uv とレイアウト記録に書き込む"""
+
+    @abstractmethod
+    def save(self) -> None:
+        """開いているシーンを上書き保存"""
+
+
+class MayaSceneAdapter(SceneAdapter):
+    """maya.standalone 上で実シーンを扱う（ワーカーごとに 1 回初期化）"""
+
+    def __init__(self) -> None:
+        import maya.standalone
+        maya.standalone.initialize(name="python")
+        import maya.cmds as cmds
+        self.cmds = cmds
+        self.path: str | None = None
+
+    def open(self, path: str) -> None:
+        cmds = self.cmds
+        if path.lower().endswith(".fbx"):
+            cmds.loadPlugin("fbxmaya", quiet=True)
+            cmds.file(new=True, force=True)
+            cmds.file(path, i=True, type="FBX", ignoreVersion=True)
+        else:
+            cmds.file(path, open=True, force=True, ignoreVersion=True)
+        self.path = path
+
+    def snapshot(self, root: str) -> PP2Snapshot:
+        from pp2_snapshot import take_snapshot
+        return take_snapshot(root, uvset=None)
+
+    def write_layout(self, root: str, snap: PP2Snapshot, layout: PP2Layout) -> None:
+        from set_pp2UV import PP2UVAutoSquare
+        tool = PP2UVAutoSquare(snap.root, uvset=layout.uvset, batch=True)
+        tool.write_layout(snap.meshes, layout)
+
+    def save(self) -> None:
+        if self.path and self.path.lower().endswith(".fbx"):
+            self.cmds.file(self.path, force=True, exportAll=True,
+                           type="FBX export")
+        else:
+            self.cmds.file(save=True, force=True)
+
+
+class JsonSceneAdapter(SceneAdapter):
+    """
+    JSON で書いた階層をシーンの代わりに使う（Maya 不要）
+
+        {"nodes": [{"path": "|trunk", "matrix": [16 要素], "pivot": [x, y, z]},
+                   {"path": "|trunk|branch1", ...}, ...]}
+
+    nodes は深さ優先順。matrix 省略時は単位行列、pivot 省略時は matrix の平行移動。
+    write_layout はノードに "uv"、ルートに "pp2Layout" を書き、save で JSON に戻す。
+    """
+
+    def __init__(self) -> None:
+        self.path: str | None = None
+        self.data: dict = {}
+
+    def open(self, path: str) -> None:
+        with open(path, encoding="utf-8") as f:
+            self.data = json.load(f)
+        self.path = path
+
+    def _subtree(self, root: str) -> list[dict]:
+        nodes = self.data["nodes"]
+        if not root.startswith("|"):
+            root = next((n["path"] for n in nodes
+                         if n["path"].rpartition("|")[2] == root), root)
+        sub = [n for n in nodes
+               if n["path"] == root or n["path"].startswith(root + "|")]
+        if not sub:
+            raise ValueError(f"root が見つかりません: {root}")
+        return sub
+
+    def snapshot(self, root: str) -> PP2Snapshot:
+        sub = self._subtree(root)
+        ident = [1.0, 0, 0, 0, 0, 1.0, 0, 0, 0, 0, 1.0, 0, 0, 0, 0, 1.0]
+        mtx = [n.get("matrix", ident) for n in sub]
+        piv = [n.get("pivot", m[12:15]) for n, m in zip(sub, mtx)]
+        return PP2Snapshot.from_paths([n["path"] for n in sub], mtx, piv)
+
+    def write_layout(self, root: str, snap: PP2Snapshot, layout: PP2Layout) -> None:
+        sub = self._subtree(snap.root)
+        us, vs = layout.cell_centers()
+        for n, u, v in zip(sub, us.tolist(), vs.tolist()):
+            n["uv"] = [u, v]
+        sub[0][PP2Layout.ATTR] = layout.to_json()
+
+    def save(self) -> None:
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f)
+
+
+def _shell_adapter() -> SceneAdapter:
+    """結合 mesh をシェル階層として扱う（pp2_shells。roots は mesh 名）"""
+    from pp2_shells import MayaShellAdapter
+    return MayaShellAdapter()
+
+
+ADAPTERS = {
+    "maya":   MayaSceneAdapter,
+    "json":   JsonSceneAdapter,
+    "shells": _shell_adapter,
+}
+
+
+# ----------------------------------------------------------------------
+# パイプライン（アダプタ以外は Maya 非依存）
+# ----------------------------------------------------------------------
+@contextmanager
+def _timed(timings: dict, name: str):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - t0
+
+
+def export_root(
+    adapter: SceneAdapter,
+    root: str,
+    out_dir: str,
+    base_name: str,
+    outputs=OUTPUTS,
+    mincol: int = 5,
+    uvset: str = "pp2_uv",
+    cache: bool = False,
+    exr_options: dict | None = None,
+    ordering: str = "dfs",
+    lods=(),
+    formats: dict | None = None,
+    validate: bool = False,
+) -> dict:
+    """
+    1 ルート分：UV レイアウト → テクスチャ書き出し。結果を dict で返す
+
+    lods    : LOD1, LOD2, ... の max_depth。指定すると pp2_lod で LOD もまとめて
+              書き出す（cache は使わない）
+    formats : {出力名: 形式}（pp2_writers.WRITERS のキー）
+    validate : 書き出したテクスチャを読み戻して検証し、要約を "validation"
+               （テクスチャの組ごと。LOD があれば LOD 順）に入れる
+    """
+    timings: dict[str, float] = {}
+
+    with _timed(timings, "snapshot"):
+        snap = adapter.snapshot(root)
+
+    with _timed(timings, "layout"):
+        layout = PP2Layout.for_paths(snap.paths, mincol, uvset, ordering)
+        adapter.write_layout(root, snap, layout)
+    cells, grid = layout.cells, layout.shape
+
+    extra = {}
+    if lods:
+        with _timed(timings, "lod"):
+            chain = lod_chain(snap, lods, cells, grid, mincol, uvset, ordering)
+        res = write_lods(chain, out_dir, base_name, outputs,
+                         lambda name: _timed(timings, name), exr_options, formats)
+        extra = {"lods": [{"max_depth": lod.max_depth, "nodes": len(lod),
+                           "row_height": lod.row_height, "outputs": w}
+                          for lod, w in zip(chain, res["outputs"])],
+                 "manifest": res["manifest"]}
+        sets = [(lod.snap, lod.layout, w) for lod, w in zip(chain, res["outputs"])]
+        res = {"outputs": res["outputs"][0], "skipped": False,
+               "recomputed": {k: len(snap) for k in outputs}}
+    else:
+        res = write_textures(snap, cells, grid, out_dir, base_name, outputs,
+                             lambda name: _timed(timings, name), cache,
+                             exr_options, formats)
+        sets = [(snap, layout, res["outputs"])]
+
+    if validate:
+        with _timed(timings, "validate"):
+            extra["validation"] = [
+                validate_snapshot(s, lay.cells, w.get("pivotpos"), w.get("xvector"),
+                                  lay.shape).summary()
+                for s, lay, w in sets]
+
+    return {
+        "root":       snap.root,
+        "nodes":      len(snap),
+        "cols":       layout.cols,
+        "rows":       layout.rows,
+        "row_height": layout.row_height,
+        "ordering":   layout.ordering,
+        "parent_distance": layout.parent_distance(snap.parents),
+        "memo":       snap.memo,
+        "outputs":    res["outputs"],
+        "skipped":    res["skipped"],
+        "recomputed": res["recomputed"],
+        "timings":    timings,
+        **extra,
+    }
+
+
+def export_atlas(
+    adapter: SceneAdapter,
+    roots: list[str],
+    out_dir: str,
+    base_name: str,
+    outputs=OUTPUTS,
+    mincol: int = 5,
+    uvset: str = "pp2_uv",
+    exr_options: dict | None = None,
+    ordering: str = "dfs",
+    formats: dict | None = None,
+    validate: bool = False,
+) -> dict:
+    """複数ルートを 1 組のアトラスに：行ブロック割り当て → UV → テクスチャ + マニフェスト"""
+    timings: dict[str, float] = {}
+
+    with _timed(timings, "snapshot"):
+        snaps = [adapter.snapshot(r) for r in roots]
+
+    with _timed(timings, "layout"):
+        atlas = PP2Atlas(snaps, mincol=mincol, uvset=uvset, ordering=ordering)
+        for root, snap, layout in zip(roots, snaps, atlas.layouts):
+            adapter.write_layout(root, snap, layout)
+
+    res = write_atlas(atlas, out_dir, base_name, outputs,
+                      lambda name: _timed(timings, name), exr_options, formats)
+
+    extra = {}
+    if validate:
+        with _timed(timings, "validate"):
+            extra["validation"] = [validate_atlas(
+                atlas, res["outputs"].get("pivotpos"), res["outputs"].get("xvector")).summary()]
+
+    return {
+        "root":       [s.root for s in snaps],
+        "nodes":      sum(map(len, snaps)),
+        "cols":       atlas.cols,
+        "rows":       atlas.rows,
+        "row_height": atlas.row_height,
+        "outputs":    res["outputs"],
+        "manifest":   res["manifest"],
+        "skipped":    False,
+        "recomputed": {k: sum(map(len, snaps)) for k in res["outputs"]},
+        "timings":    timings,
+        **extra,
+    }
+
+
+def run_job(adapter: SceneAdapter, job: dict) -> dict:
+    """
+    1 シーン分のジョブを実行する。例外は結果の "error" に記録して返す
+
+    job = {"scene", "roots", "out_dir", "outputs", "mincol", "uvset", "save", "cache",
+           "exr", "atlas", "ordering", "lods", "formats", "validate"}
+    atlas が真なら roots をまとめて 1 組のアトラスに書き出す（cache は使わない）
+    validate が真なら検証に通らなかった時点でジョブを失敗にする（save もしない）
+    """
+    scene = job["scene"]
+    roots = job["roots"]
+    stem  = os.path.splitext(os.path.basename(scene))[0]
+    res   = {"scene": scene, "ok": False, "pid": os.getpid(),
+             "roots": [], "error": None}
+
+    t0 = time.perf_counter()
+    try:
+        adapter.open(scene)
+        if job.get("atlas"):
+            res["roots"].append(export_atlas(
+                adapter, roots, job["out_dir"], stem,
+                job.get("outputs", OUTPUTS),
+                job.get("mincol", 5), job.get("uvset", "pp2_uv"), job.get("exr"),
+                job.get("ordering", "dfs"), job.get("formats"),
+                job.get("validate", False)))
+        else:
+            for root in roots:
+                base = stem if len(roots) == 1 else f"{stem}_{root.rpartition('|')[2]}"
+                res["roots"].append(export_root(
+                    adapter, root, job["out_dir"], base,
+                    job.get("outputs", OUTPUTS),
+                    job.get("mincol", 5), job.get("uvset", "pp2_uv"),
+                    job.get("cache", False), job.get("exr"),
+                    job.get("ordering", "dfs"), job.get("lods", ()),
+                    job.get("formats"), job.get("validate", False)))
+        bad = [r["root"] for r in res["roots"]
+               if not all(v["ok"] for v in r.get("validation", ()))]
+        if bad:
+            raise ValueError(f"テクスチャの検証に失敗しました: {bad}")
+        if job.get("save"):
+            adapter.save()
+        res["ok"] = True
+    except Exception as e:                          # ジョブ単位で失敗を記録
+        res["error"] = f"{type(e).__name__}: {e}"
+    res["elapsed"] = time.perf_counter() - t0
+    return res
+
+
+# ----------------------------------------------------------------------
+# プロセスプール
+# ----------------------------------------------------------------------
+_adapter: SceneAdapter | None = None
+
+
+def _init_worker(adapter_name: str) -> None:
+    global _adapter
+    _adapter = ADAPTERS[adapter_name]()
+
+
+def _run_in_worker(job: dict) -> dict:
+    return run_job(_adapter, job)
+
+
+def run_batch(
+    jobs: list[dict],
+    adapter: str = "maya",
+    workers: int | None = None,
+    progress=None,
+) -> dict:
+    """
+    jobs をワーカープロセスに 1 シーンずつ振り分けて実行し、サマリを返す
+
+    progress : 1 ジョブ終わるごとに progress(done, total, result) を呼ぶ
+    サマリの "jobs" は終わった順ではなく jobs と同じ並び（同じシーンが何度あってもよい）
+    """
+    # プロセスプールは実行する時にだけ読む（pp2_shells などの import を軽くする）
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs) or 1))
+    results: list[dict | None] = [None] * len(jobs)
+    done = 0
+
+    t0 = time.perf_counter()
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                             initializer=_init_worker,
+                             initargs=(adapter,)) as pool:
+        futures = {pool.submit(_run_in_worker, job): i for i, job in enumerate(jobs)}
+        for fut in as_completed(futures):
+            results[futures[fut]] = res = fut.result()
+            done += 1
+            if progress:
+                progress(done, len(jobs), res)
+
+    return {
+        "adapter": adapter,
+        "workers": workers,
+        "elapsed": time.perf_counter() - t0,
+        "ok":      sum(r["ok"] for r in results),
+        "failed":  sum(not r["ok"] for r in results),
+        "jobs":    results,
+    }
+
+
+# ----------------------------------------------------------------------
+# CLI
+# ----------------------------------------------------------------------
+def _build_jobs(args) -> list[dict]:
+    if args.jobs:
+        with open(args.jobs, encoding="utf-8") as f:
+            jobs = json.load(f)
+    else:
+        jobs = [{"scene": s} for s in args.scenes]
+
+    for job in jobs:
+        job.setdefault("roots", args.roots)
+        job.setdefault("out_dir", args.out)
+        job.setdefault("outputs", args.outputs)
+        job.setdefault("mincol", args.mincol)
+        job.setdefault("uvset", args.uvset)
+        job.setdefault("save", args.save)
+        job.setdefault("cache", args.cache)
+        job.setdefault("atlas", args.atlas)
+        job.setdefault("ordering", args.ordering)
+        job.setdefault("lods", args.lods)
+        job.setdefault("formats", dict(f.split("=", 1) for f in args.format))
+        job.setdefault("validate", args.validate)
+        job.setdefault("exr", {"compression": args.exr_compression,
+                               "half_rgb": args.exr_half})
+        if not job["roots"]:
+            raise SystemExit(f"root が指定されていません: {job['scene']}")
+    return jobs
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(
+        description="Pivot Painter 2 textures: headless batch export")
+    ap.add_argument("scenes", nargs="*", help=".ma / .mb / .fbx（json アダプタでは .json）")
+    ap.add_argument("--jobs", help='[{"scene": ..., "roots": [...]}, ...] の JSON')
+    ap.add_argument("--roots", nargs="+", default=[], help="全シーン共通のルート Transform")
+    ap.add_argument("--out", default="PP2_out", help="出力フォルダ")
+    ap.add_argument("--outputs", nargs="+", choices=OUTPUTS, default=list(OUTPUTS))
+    ap.add_argument("--adapter", choices=sorted(ADAPTERS), default="maya")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--mincol", type=int, default=5)
+    ap.add_argument("--uvset", default="pp2_uv")
+    ap.add_argument("--save", action="store_true", help="UV レイアウト後にシーンを保存")
+    ap.add_argument("--cache", action="store_true",
+                    help="<base>.pp2cache.npz で変更のないアセットを省略・差分のみ再計算")
+    ap.add_argument("--atlas", action="store_true",
+                    help="シーン内の roots を 1 組のテクスチャ（アトラス）にまとめる")
+    ap.add_argument("--ordering", choices=ORDERINGS, default="dfs",
+                    help="pp2_uv のセルの並べ方（親子テクセルの近さ）")
+    ap.add_argument("--lods", type=int, nargs="+", default=[],
+                    help="LOD1, LOD2, ... でたたむ深さ（例: 2 1）")
+    ap.add_argument("--format", nargs="+", default=[], metavar="OUTPUT=FORMAT",
+                    help="出力ごとの書き出し形式（例: pivotpos=npy。exr / png / npy）")
+    ap.add_argument("--validate", action="store_true",
+                    help="書き出したテクスチャを読み戻して検証（問題があればジョブ失敗）")
+    ap.add_argument("--exr-compression", choices=("none", "zip", "piz"), default="zip")
+    ap.add_argument("--exr-half", action="store_true", help="EXR の RGB を half で保存")
+    ap.add_argument("--summary", help="サマリ JSON（既定: <out>/pp2_batch_summary.json）")
+    args = ap.parse_args(argv)
+
+    jobs = _build_jobs(args)
+    if not jobs:
+        ap.error("シーンを指定してください")
+
+    def _progress(done, total, r):
+        state = "ok" if r["ok"] else f"FAILED ({r['error']})"
+        print(f"[PP2] {done}/{total} {r['scene']}: {state}  {r['elapsed']:.2f}s",
+              flush=True)
+
+    summary = run_batch(jobs, args.adapter, args.workers, _progress)
+
+    path = args.summary or os.path.join(args.out, "pp2_batch_summary.json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    print(f"[PP2] ok={summary['ok']} failed={summary['failed']} "
+          f"{summary['elapsed']:.2f}s → {path}")
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
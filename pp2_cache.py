@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+pp2_cache.py
+-----------------------------------
+Pivot Painter 2 用：差分再エクスポート用キャッシュ（Maya 非依存）
+
+出力フォルダに <base>.pp2cache.npz を置き、Transform ごとのハッシュ
+（ワールド行列 / rotate pivot / 親 / 深度 / セル）と、エンコード済みの
+テクスチャ配列・書き出したファイルの情報を保存する。
+
+次回のエクスポートでは
+    • ハッシュも出力ファイルも変わっていない → 書き出しごとスキップ
+    • 一部だけ変わった                   → 変わった Transform のテクセルだけ再計算
+    • 数・グリッドが変わった / キャッシュ無し → 全体を再計算
+"""
+
+from __future__ import annotations
+import json, os, zipfile
+from typing import Callable
+import numpy as np
+
+from pp2_encode import empty_texture, parent_cells
+
+
+def _mix64(x: np.ndarray) -> np.ndarray:
+    """splitmix64 の最終化（uint64 配列、桁あふれは意図どおり）"""
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xBF58476D1CE4E5B9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def node_hashes(matrices, pivots, parents, depths, cells) -> np.ndarray:
+    """
+    Transform ごとの 64-bit ハッシュを一括計算する
+
+    親は親テクセル番号として含めるので、親の移動（セル変更）も検出される。
+    """
+    n = len(cells)
+    words = np.empty((n, 16 + 3 + 3), np.uint64)
+    words[:, 0:16]  = np.ascontiguousarray(matrices, np.float64).reshape(n, 16).view(np.uint64)
+    words[:, 16:19] = np.ascontiguousarray(pivots, np.float64).reshape(n, 3).view(np.uint64)
+    words[:, 19]    = parent_cells(parents, cells).astype(np.uint64)
+    words[:, 20]    = np.asarray(depths, np.int64).astype(np.uint64)
+    words[:, 21]    = np.asarray(cells, np.int64).astype(np.uint64)
+
+    with np.errstate(over="ignore"):
+        h = np.full(n, 0x9E3779B97F4A7C15, np.uint64)
+        for j in range(words.shape[1]):
+            h = _mix64(h ^ words[:, j])
+    return h
+
+
+def _canonical(options: dict | None):
+    """書き出し設定を meta に保存した時と同じ形（JSON 往復）にそろえる（既定値だけなら None）"""
+    options = {k: v for k, v in (options or {}).items() if v}
+    if not options:
+        return None
+    return json.loads(json.dumps(options, sort_keys=True, default=str))
+
+
+def _file_stat(path: str):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+# ----------------------------------------------------------------------
+class PP2ExportCache:
+    """
+    1 アセット分の差分エクスポート キャッシュ
+
+    使い方
+        cache = PP2ExportCache(path)
+        if cache.begin(hashes, cells, grid, {"pivotpos": exr, ...}, options):
+            return                                  # 変更なし
+        tex = cache.encode("pivotpos", fn, root_dependent=True)   # fn(out, index)
+        ...（書き出し）
+        cache.commit({"pivotpos": exr, ...})
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.recomputed: dict[str, int] = {}    # 出力ごとに再計算した Transform 数
+        self._prev = self._load(path)
+        self._hashes = None
+        self._cells  = None
+        self._shape  = None
+        self._options = None
+        self._textures: dict[str, np.ndarray] = {}
+
+    # ------------------------------------------------------------------
+    @classmethod
+    def _load(cls, path: str):
+        try:
+            with np.load(path, allow_pickle=False) as z:
+                meta = json.loads(str(z["meta"]))
+                if meta.get("version") != cls.VERSION:
+                    return None
+                return {
+                    "meta":     meta,
+                    "hashes":   z["hashes"],
+                    "cells":    z["cells"],
+                    "textures": {k[4:]: z[k] for k in z.files if k.startswith("tex_")},
+                }
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+            return None   # 壊れた / 途中までのキャッシュは無いものとして全体を再計算
+
+    # ------------------------------------------------------------------
+    def begin(self, hashes, cells, shape, outputs: dict[str, str],
+              options: dict | None = None) -> bool:
+        """
+        今回の入力を登録し、前回から何も変わっていなければ True
+
+        options : 書き出しの設定（pp2_writers.cache_options。既定値を埋めたもの）。
+                  前回と違えばテクセルが同じでもファイルは作り直す（スキップしない）
+        """
+        self._hashes = np.asarray(hashes, np.uint64)
+        self._cells  = np.asarray(cells, np.int64)
+        self._shape  = tuple(int(s) for s in shape)
+        self._options = _canonical(options)
+        self.recomputed = {}
+
+        p = self._prev
+        if p is None or tuple(p["meta"]["shape"]) != self._shape:
+            return False
+        if p["meta"].get("options") != self._options:
+            return False
+        if not np.array_equal(p["hashes"], self._hashes):
+            return False
+        files = p["meta"]["files"]
+        return all(name in p["textures"] and name in files
+                   and files[name][0] == path
+                   and files[name][1] == _file_stat(path)
+                   for name, path in outputs.items())
+
+    def encode(
+        self,
+        name: str,
+        fn: Callable[..., np.ndarray],
+        root_dependent: bool = False,
+    ) -> np.ndarray:
+        """
+        fn(out=..., index=...) で name のテクスチャを作る（変化分だけ再計算）
+
+        root_dependent : ルート Transform の変化で全テクセルが変わる出力
+                         （PivotPosition は root 基準の差分なので True）
+        """
+        n, p = len(self._hashes), self._prev
+        old = p["textures"].get(name) if p else None
+        if (old is None
+                or tuple(p["meta"]["shape"]) != self._shape
+                or len(p["hashes"]) != n
+                or (root_dependent and n and p["hashes"][0] != self._hashes[0])):
+            tex = fn(out=None, index=None)
+            self.recomputed[name] = n
+        else:
+            dirty = np.flatnonzero(p["hashes"] != self._hashes)
+            tex   = empty_texture(self._shape)
+            tex[...] = old
+            if len(dirty):
+                r, c = np.divmod(p["cells"][dirty], self._shape[1])
+                tex[r, c] = 0.0                     # 旧セルを空けてから書き直す
+                fn(out=tex, index=dirty)
+            self.recomputed[name] = len(dirty)
+        self._textures[name] = tex
+        return tex
+
+    def commit(self, outputs: dict[str, str]) -> None:
+        """書き出し後に呼ぶ。今回のハッシュ・テクスチャ・ファイル情報を保存"""
+        meta = {
+            "version": self.VERSION,
+            "shape":   list(self._shape),
+            "options": self._options,
+            "files":   {k: [v, _file_stat(v)] for k, v in outputs.items()},
+        }
+        arrays = {f"tex_{k}": v for k, v in self._textures.items() if k in outputs}
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, meta=np.array(json.dumps(meta)),
+                     hashes=self._hashes, cells=self._cells, **arrays)
+        os.replace(tmp, self.path)
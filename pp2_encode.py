@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+pp2_encode.py
+-----------------------------------
+Pivot Painter 2 用：Maya 非依存のテクスチャ エンコード コア
+
+Transform ごとの値を配列でまとめて受け取り、PivotPosition (EXR) /
+X-Vector (PNG) の RGBA 配列を NumPy の一括演算で埋める。
+maya を import しないので、Maya ライセンス無しで試験・計測できる。
+
+入力配列 (N = Transform 数。並びは _enum_tree の列挙順)
+    matrices : (N, 16) ワールド行列 (xform -m と同じ行優先 16 要素)
+    pivots   : (N, 3)  ワールド rotate pivot
+    parents  : (N,)    親の列挙インデックス (ルートは -1)
+    depths   : (N,)    階層深度
+    cells    : (N,)    テクセル番号 (row * nC + col)
+"""
+
+from __future__ import annotations
+import numpy as np
+
+DEPTH_ALPHA = {0: 19/255.0, 1: 7/255.0, 2: 5.5/255.0, 3: 5/255.0}
+DEPTH_ALPHA_DEFAULT = 5/255.0
+
+PARENT_OFFSET = 1024            # _pack_parent のオフセット
+PARENT_SCALE  = float(2**24)    # 〃 正規化係数
+
+_ALPHA_LUT = np.array([DEPTH_ALPHA[d] for d in range(len(DEPTH_ALPHA))],
+                      np.float32)
+
+
+# ----------------------------------------------------------------------
+# 個別エンコード
+# ----------------------------------------------------------------------
+def pack_parent(idx):
+    """親テクセル番号 → A チャンネル値（_pack_parent の配列版）"""
+    return (PARENT_OFFSET + np.asarray(idx, np.float64)) / PARENT_SCALE
+
+
+def depth_alpha(depths) -> np.ndarray:
+    """階層深度 → α（テーブル外は DEPTH_ALPHA_DEFAULT）"""
+    d   = np.asarray(depths, np.int64)
+    out = np.full(d.shape, DEPTH_ALPHA_DEFAULT, np.float32)
+    ok  = (d >= 0) & (d < len(_ALPHA_LUT))
+    out[ok] = _ALPHA_LUT[d[ok]]
+    return out
+
+
+def parent_cells(parents, cells, own=None) -> np.ndarray:
+    """
+    親の列挙インデックス → 親テクセル番号（ルートは自分自身のセル）
+
+    own : parents と同じ並びの、各要素自身のテクセル番号（None なら cells。
+          一部の要素だけ渡す時に使う）
+
+    旧エクスポーターはルートの親を enum2grid.get(-1, 0) = セル 0 にしていた。
+    dfs ではセル 0 がルート自身なので同じ値だが、bfs / sibling / morton では
+    セル 0 が無関係な要素になるため、並べ方・アトラスによらず自分自身を指す。
+    """
+    parents = np.asarray(parents, np.int64)
+    cells   = np.asarray(cells, np.int64)
+    own     = cells if own is None else np.asarray(own, np.int64)
+    return np.where(parents >= 0, cells[parents], own)
+
+
+# ----------------------------------------------------------------------
+# グリッド
+# ----------------------------------------------------------------------
+def grid_from_uvs(uv, ndigits: int = 6):
+    """
+    pp2_uv の代表座標 (N, 2) からテクセル番号を求める
+
+    U 昇順を列、V 降順を行とし、丸めた値が同じものは同じ列 / 行にまとめる。
+
+    Returns
+    -------
+    cells : (N,) テクセル番号
+    shape : (nR, nC)
+    """
+    uv = np.round(np.asarray(uv, np.float64).reshape(-1, 2), ndigits)
+    cols, c_idx = np.unique(uv[:, 0], return_inverse=True)
+    rows, r_idx = np.unique(-uv[:, 1], return_inverse=True)
+    nR, nC = len(rows), len(cols)
+    return r_idx.ravel() * nC + c_idx.ravel(), (nR, nC)
+
+
+def empty_texture(shape) -> np.ndarray:
+    """
+    0 で埋めた (nR, nC, 4) float32 テクスチャ
+
+    実体はチャンネル分離 (4, nR, nC) で、返すのはその転置ビュー。
+    EXR ライターがチャンネルごとの行ブロックをコピーせずに渡せる。
+    """
+    return np.zeros((4, shape[0], shape[1]), np.float32).transpose(1, 2, 0)
+
+
+def _rows_cols(cells, shape, index):
+    cells = np.asarray(cells, np.int64)
+    sel   = slice(None) if index is None else np.asarray(index, np.int64)
+    r, c  = np.divmod(cells[sel], shape[1])
+    return sel, r, c
+
+
+# ----------------------------------------------------------------------
+# テクスチャ
+# ----------------------------------------------------------------------
+def encode_pivot_position(
+    pivots,
+    parents,
+    cells,
+    shape,
+    root: int = 0,
+    out: np.ndarray | None = None,
+    index=None,
+) -> np.ndarray:
+    """
+    PivotPosition の RGBA 配列を作る
+
+        R = ΔX (root 基準)   G = Z (絶対)   B = ΔY   A = _pack_parent(親テクセル)
+
+    Parameters
+    ----------
+    root  : ルート Transform の列挙インデックス
+    out   : 書き込み先 (nR, nC, 4)。None なら empty_texture で確保
+    index : 書き込む Transform の列挙インデックス（None なら全件）
+    """
+    pivots  = np.asarray(pivots, np.float64).reshape(-1, 3)
+    parents = np.asarray(parents, np.int64)
+    if out is None:
+        out = empty_texture(shape)
+
+    sel, r, c = _rows_cols(cells, shape, index)
+    p  = pivots[sel]
+    dv = p - pivots[root]
+
+    block = np.empty((len(p), 4), np.float64)
+    block[:, 0] = dv[:, 0]
+    block[:, 1] = p[:, 2]
+    block[:, 2] = dv[:, 1]
+    block[:, 3] = pack_parent(parent_cells(parents[sel], cells, np.asarray(cells)[sel]))
+    out[r, c] = block
+    return out
+
+
+def encode_xvector(
+    matrices,
+    depths,
+    cells,
+    shape,
+    out: np.ndarray | None = None,
+    index=None,
+) -> np.ndarray:
+    """
+    X-Vector の RGBA 配列を作る（0..1 の float、8-bit 化は保存側）
+
+        R = +X.x   G = +X.z   B = +X.y   (−1..1 → 0..1)   A = 深度 α
+
+    長さ 0 の +X 軸は (0, 0, 0) として扱う。
+    """
+    matrices = np.asarray(matrices, np.float64).reshape(-1, 16)
+    depths   = np.asarray(depths, np.int64)
+    if out is None:
+        out = empty_texture(shape)
+
+    sel, r, c = _rows_cols(cells, shape, index)
+    x   = matrices[sel, 0:3]                        # ローカル+X → ワールド
+    nrm = np.linalg.norm(x, axis=1, keepdims=True)
+    x   = np.divide(x, nrm, out=np.zeros_like(x), where=nrm > 0.0)
+
+    block = np.empty((len(x), 4), np.float32)
+    block[:, 0] = x[:, 0] * 0.5 + 0.5
+    block[:, 1] = x[:, 2] * 0.5 + 0.5
+    block[:, 2] = x[:, 1] * 0.5 + 0.5
+    block[:, 3] = depth_alpha(depths[sel])
+    out[r, c] = block
+    return out
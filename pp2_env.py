@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+pp2_env.py
+-----------------------------------
+Pivot Painter 2 用：外部ライブラリの置き場所と遅延 import（全ツール共通）
+
+Pillow / OpenEXR / Imath は画像を実際に書き出す時にだけ require() で読む。
+その時に初めて、次のフォルダを sys.path に足す（1 回だけ）。
+
+    third_party/              このフォルダの 1 つ上（従来の置き場所）
+    $PP2_SITE_PACKAGES        os.pathsep 区切りで複数可
+    D:\\Maya2023\\Lib\\site-packages  従来の既定。存在する時だけ
+
+各ツールの import 時には何もしないので、シェルフボタンの初回クリックで
+画像ライブラリやパス走査の分を待たされない。
+"""
+
+from __future__ import annotations
+import importlib, os, sys
+
+ENV_VAR     = "PP2_SITE_PACKAGES"
+LEGACY_SITE = r"D:\Maya2023\Lib\site-packages"     # Pillow などを置いていた既定の場所
+
+_added = False
+
+
+def module_dir() -> str:
+    """ツール群（pp2_*.py）の置かれたフォルダ"""
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def site_dirs() -> list[str]:
+    """require() が探す追加フォルダ（存在するものだけ、優先順）"""
+    dirs = [os.path.join(os.path.dirname(module_dir()), "third_party")]
+    dirs += [p for p in os.environ.get(ENV_VAR, "").split(os.pathsep) if p]
+    dirs.append(LEGACY_SITE)
+    return [d for d in dirs if os.path.isdir(d)]
+
+
+def add_site_dirs() -> None:
+    """site_dirs() を sys.path に足す（2 回目以降は何もしない）"""
+    global _added
+    if _added:
+        return
+    import site
+    for d in site_dirs():
+        if d not in sys.path:
+            site.addsitedir(d)
+    _added = True
+
+
+def require(name: str, feature: str = ""):
+    """
+    モジュール name を import して返す（初回は site_dirs() を足してから）
+
+    見つからなければ、何のために要るか (feature) と探した場所を添えて ImportError
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    add_site_dirs()
+    try:
+        return importlib.import_module(name)
+    except ImportError as e:
+        where = ", ".join(site_dirs()) or "(追加フォルダなし)"
+        raise ImportError(
+            f"{name} が見つかりません{f'（{feature}に必要）' if feature else ''}。"
+            f"pip で入れるか {ENV_VAR} に置き場所を指定してください。探した場所: {where}"
+        ) from e
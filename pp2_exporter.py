@@ -0,0 +1,449 @@
+# -*- coding: utf-8 -*-
+"""
+pp2_exporter.py
+-----------------------------------
+Pivot Painter 2 用：PivotPosition EXR / X-Vector PNG 一括エクスポーター
+
+階層走査・グリッド構築を 1 回だけ行い、指定したテクスチャをまとめて書き出す。
+グリッドは PP2UVAutoSquare が記録したレイアウト (pp2Layout) を優先し、
+無い / 古い時だけ pp2_uv をサンプルして再構築する。各工程の所要時間を記録する。
+ordering を指定すると、記録がその並べ方でなければ先に pp2_uv を並べ直す（pp2_layout）。
+profile を指定すると cmds 呼び出し回数なども含めたレポートを JSON に保存する。
+export_async() はスナップショットだけをメインスレッドで取り、エンコードと書き出しを
+バックグラウンド（pp2_async）で行う。
+export_frames() はフレーム範囲を DG コンテキストで評価し、走査・グリッドは 1 回だけで
+フレームごとに縦積み EXR / X-Vector 連番へ逐次書き出す（フリップブック）。
+export_lods() は同じスナップショットから、深い階層を祖先にたたんだ LOD テクスチャを
+まとめて書き出す（pp2_lod）。
+
+    outputs = ("pivotpos", "xvector")
+        pivotpos : <base_name>_pivotpos.exr   (PP2PivotPosExporter と同じ内容)
+        xvector  : <base_name>_xvector.png    (PP2XVectorExporter と同じ内容)
+
+PP2AtlasExporter は複数のルートを 1 組のテクスチャ（アトラス）にまとめ、
+各ルートの行オフセット / RowHeight を <base_name>_atlas.json に記録する（pp2_atlas）。
+"""
+
+from __future__ import annotations
+import os, time
+from concurrent.futures import CancelledError
+from contextlib import contextmanager
+from typing import Iterable, Optional
+import numpy as np
+import maya.cmds as cmds
+
+from pp2_async import PP2BackgroundJob, PP2Cancelled, submit
+from pp2_atlas import PP2Atlas, write_atlas
+from pp2_encode import grid_from_uvs
+from pp2_profile import NULL_PROFILER, make_profiler
+from pp2_layout import ORDERINGS, PP2Layout
+from pp2_lod import lod_chain, write_lods
+from pp2_index import read_uvs, snapshot
+from pp2_snapshot import FrameSampler, layout_cells, read_layout
+from pp2_writers import write_flipbook, write_textures
+from set_pp2UV import PP2UVAutoSquare
+
+
+class PP2Exporter:
+    """PivotPosition / X-Vector を 1 パスで書き出すユーティリティ"""
+
+    UVSET   = "pp2_uv"                      # PP2 用 UV
+    SRC_UV  = "map1"                        # pp2_uv が無い時のコピー元
+    OUTPUTS = ("pivotpos", "xvector")
+
+    # ------------------------------------------------------------------
+    def __init__(
+        self,
+        root:      Optional[str] = None,
+        out_dir:   Optional[str] = None,
+        base_name: str           = "",
+        outputs:   Optional[Iterable[str]] = None,
+        cache:     bool          = False,
+        exr_compression: str     = "zip",
+        exr_half:  bool          = False,
+        profile:   bool | str    = False,
+        ordering:  Optional[str] = None,
+        formats:   Optional[dict] = None,
+    ):
+        """
+        Parameters
+        ----------
+        root      : ルート Transform 名（None なら現在の選択）
+        out_dir   : 保存フォルダ
+        base_name : ファイル名ベース（<base>_pivotpos.exr / <base>_xvector.png）
+        outputs   : 書き出すテクスチャ（OUTPUTS の部分集合。None なら両方）
+        cache     : True なら出力フォルダの <base>.pp2cache.npz で差分だけ再計算し、
+                    変更が無ければ書き出しを省略する（pp2_cache）
+        exr_compression : PivotPosition EXR の圧縮 ("none" / "zip" / "piz")
+        exr_half  : True なら EXR の RGB を half で保存（範囲外なら ValueError）
+        profile   : True / パスなら工程ごとの時間・cmds 呼び出し回数・テクスチャサイズを
+                    JSON に保存する（True なら <out_dir>/<base>.pp2profile.json）
+        ordering  : セルの並べ方（pp2_layout.ORDERINGS）。記録済みレイアウトが
+                    この並べ方でなければ書き出し前に pp2_uv を並べ直す
+                    （None なら記録 / 今の pp2_uv のまま）
+        formats   : {出力名: 形式}。pp2_writers.WRITERS のキー（"exr" / "png" / "npy" など）。
+                    既定は pivotpos=exr / xvector=png
+        """
+        if ordering is not None and ordering not in ORDERINGS:
+            raise ValueError(f"ordering は {ORDERINGS} のいずれか: {ordering}")
+        self.outputs = tuple(outputs or self.OUTPUTS)
+        unknown = set(self.outputs) - set(self.OUTPUTS)
+        if unknown:
+            raise ValueError(f"未知の出力: {sorted(unknown)}")
+
+        self.root      = root or self._require_selection()
+        self.out_dir   = out_dir or r"D:/PP2_out2"
+        self.base_name = base_name or "pp2"
+        self.cache     = cache
+        self.exr_options = {"compression": exr_compression, "half_rgb": exr_half}
+        self.profile   = profile
+        self.ordering  = ordering
+        self.formats   = dict(formats or {})
+        self.profiler  = NULL_PROFILER
+        self.timings: dict[str, float] = {}
+
+    # ------------------------------------------------------------------
+    # public API
+    # ------------------------------------------------------------------
+    def export(self) -> dict[str, str]:
+        """テクスチャを書き出し、{出力名: パス} を返す"""
+        self.timings  = {}
+        self.profiler = make_profiler(
+            self.profile, "PP2Exporter",
+            os.path.join(self.out_dir, f"{self.base_name}.pp2profile.json"))
+
+        with self.profiler.attach():
+            written, msg = self._export()
+        self._report(msg)
+        return written
+
+    def export_frames(self, frames) -> dict:
+        """
+        フレームごとのピボット / X-Vector をフリップブックとして書き出す
+
+        frames : フレーム番号の列（range(1, 25) など。UI の時間単位）
+
+        階層走査とグリッドはここで 1 回だけ行い、各フレームは FrameSampler で
+        worldMatrix / rotatePivot をまとめて評価して、そのまま書き出しへ流す。
+        キャッシュ（cache=True）は使わない。
+
+        Returns
+        -------
+        write_flipbook の戻り値（outputs / manifest / frames）
+        """
+        frames = list(frames)
+        if not frames:
+            raise ValueError("フレームがありません")
+        self.timings  = {}
+        self.profiler = make_profiler(
+            self.profile, "PP2Exporter",
+            os.path.join(self.out_dir, f"{self.base_name}.pp2profile.json"))
+
+        with self.profiler.attach():
+            snap, cells, grid, source = self._prepare()
+            with self._stage("sampler"):
+                sampler = FrameSampler(snap)
+
+            def samples():
+                for f in frames:
+                    with self._stage("sample"):
+                        s = sampler.sample(f)
+                    yield (f,) + s
+
+            res = write_flipbook(samples(), len(frames), snap.parents, snap.depths,
+                                 cells, grid, self.out_dir, self.base_name,
+                                 self.outputs, self._stage, self.exr_options)
+
+        self.profiler.note(nodes=len(snap), grid=list(grid), layout=source,
+                           frames=len(frames), memo=snap.memo)
+        if "pivotpos" in res["outputs"]:
+            self.profiler.note_texture("pivotpos", res["outputs"]["pivotpos"],
+                                       (grid[0] * len(frames), grid[1]))
+        total = sum(self.timings.values())
+        print(f"[PP2] manifest → {res['manifest']}")
+        self._report(f"[PP2] {len(snap)} nodes / {grid[0]}x{grid[1]} x {len(frames)} frames "
+                     f"→ {', '.join(res['outputs'])}  ({total:.2f}s)")
+        return res
+
+    def export_lods(self, levels=(3, 2, 1)) -> dict:
+        """
+        LOD0（export() と同じテクスチャ）と、levels の各深さで階層をたたんだ
+        LOD テクスチャを 1 回の走査で書き出す
+
+        levels : LOD1, LOD2, ... の max_depth（この深さ以上を祖先にまとめる）
+
+        Returns
+        -------
+        {"outputs": [{出力名: パス}, ...（LOD 順）], "manifest": <base>_lods.json,
+         "row_heights": [LOD ごとの RowHeight]}
+        """
+        self.timings  = {}
+        self.profiler = make_profiler(
+            self.profile, "PP2Exporter",
+            os.path.join(self.out_dir, f"{self.base_name}.pp2profile.json"))
+
+        with self.profiler.attach():
+            snap, cells, grid, source = self._prepare()
+            with self._stage("lod"):
+                lods = lod_chain(snap, levels, cells, grid, PP2UVAutoSquare.MINCOL,
+                                 self.UVSET, self.ordering or "dfs")
+            res = write_lods(lods, self.out_dir, self.base_name, self.outputs,
+                             self._stage, self.exr_options, self.formats)
+
+        res["row_heights"] = [lod.row_height for lod in lods]
+        self.profiler.note(nodes=len(snap), grid=list(grid), layout=source,
+                           memo=snap.memo, lods=[{"max_depth": lod.max_depth, "nodes": len(lod),
+                                  "grid": list(lod.layout.shape)} for lod in lods])
+        for i, (lod, written) in enumerate(zip(lods, res["outputs"])):
+            for k, path in written.items():
+                self.profiler.note_texture(f"lod{i}_{k}", path, lod.layout.shape)
+
+        total = sum(self.timings.values())
+        print(f"[PP2] manifest → {res['manifest']}")
+        for i, lod in enumerate(lods):
+            print(f"★ LOD{i}: {len(lod)} nodes  {lod.layout.rows}x{lod.layout.cols}  "
+                  f"RowHeight = {lod.row_height:.5f}")
+        self._report(f"[PP2] {len(lods)} LODs / {len(snap)} nodes "
+                     f"→ {', '.join(f'{len(l)}' for l in lods)} nodes  ({total:.2f}s)")
+        return res
+
+    def _report(self, msg: str) -> None:
+        """プロファイル保存と完了メッセージ"""
+        if self.profiler.enabled:
+            path = self.profiler.save()
+            msg += "  | " + self.profiler.summary()
+            print(f"[PP2] profile → {path}")
+
+        cmds.inViewMessage(amg=msg, pos="midCenter", fade=True)
+        print("[PP2] " + "  ".join(f"{k}={v:.3f}s"
+                                   for k, v in self.timings.items()))
+
+    def export_async(self, on_done=None, on_progress=None) -> PP2BackgroundJob:
+        """
+        スナップショットとグリッドだけをここ（メインスレッド）で取り、
+        エンコード・書き出しは pp2_async の共有プールで行う
+
+        完了時は export() と同じ inViewMessage を出し、on_done(job) を呼ぶ。
+        job.result() は {出力名: パス}。job.cancel() で次の工程の手前で止まる。
+        """
+        self.timings  = {}
+        self.profiler = make_profiler(
+            self.profile, "PP2Exporter",
+            os.path.join(self.out_dir, f"{self.base_name}.pp2profile.json"))
+        with self.profiler.attach():
+            snap, cells, grid, source = self._prepare()
+
+        job = PP2BackgroundJob(f"{self.base_name} ({self.root})",
+                               total=2 * len(self.outputs), on_progress=on_progress)
+
+        @contextmanager
+        def stage(name):
+            with job.stage(name), self._stage(name):
+                yield
+
+        msg = []
+
+        def work():
+            res = write_textures(snap, cells, grid, self.out_dir, self.base_name,
+                                 self.outputs, stage, self.cache, self.exr_options,
+                                 self.formats)
+            written, text = self._finish(snap, grid, source, res)
+            msg.append(text)
+            return written
+
+        def finish(job):
+            try:
+                job.result()
+            except (PP2Cancelled, CancelledError):
+                cmds.inViewMessage(amg=f"[PP2] {job.name}: キャンセルしました",
+                                   pos="midCenter", fade=True)
+            except Exception as e:
+                cmds.warning(f"[PP2] {job.name}: {type(e).__name__}: {e}")
+            else:
+                self._report(msg[0])
+            if on_done is not None:
+                on_done(job)
+
+        return submit(job, work, on_done=finish)
+
+    # ------------------------------------------------------------------
+    # internal helpers
+    # ------------------------------------------------------------------
+    def _prepare(self):
+        """シーンに触れる工程。(snap, cells, grid, グリッドの出所) を返す"""
+        with self._stage("snapshot"):
+            snap = snapshot(self.root)
+
+        if self.ordering is not None:
+            self._relayout(snap)
+
+        with self._stage("grid"):
+            found, source = layout_cells(snap, self.UVSET), "record"
+            if found is None:
+                # レイアウト記録が無い / 古い → pp2_uv から再構築
+                read_uvs(snap, self.UVSET)
+                for i in np.flatnonzero(~snap.has_uv):
+                    snap.uvs[i] = self._sample_uv(snap.shapes[i], snap.paths[i])
+                found, source = grid_from_uvs(snap.uvs), "uv"
+            cells, grid = found
+        return snap, cells, grid, source
+
+    def _export(self):
+        """export() の本体。({出力名: パス}, inViewMessage の文言) を返す"""
+        snap, cells, grid, source = self._prepare()
+        res = write_textures(snap, cells, grid, self.out_dir, self.base_name,
+                             self.outputs, self._stage, self.cache,
+                             self.exr_options, self.formats)
+        return self._finish(snap, grid, source, res)
+
+    def _finish(self, snap, grid, source, res):
+        """write_textures の結果 → ({出力名: パス}, inViewMessage の文言)"""
+        written = res["outputs"]
+        state = "変更なし・スキップ" if res["skipped"] else ", ".join(written)
+
+        self.profiler.note(nodes=len(snap), grid=list(grid), layout=source,
+                           skipped=res["skipped"], recomputed=res["recomputed"],
+                           memo=snap.memo)
+        for k, path in written.items():
+            self.profiler.note_texture(k, path, grid)
+
+        total = sum(self.timings.values())
+        reused = f" (instances {snap.memo['hits']})" if snap.memo["hits"] else ""
+        msg = (f"[PP2] {len(snap)} nodes{reused} / {grid[0]}x{grid[1]} "
+               f"→ {state}  ({total:.2f}s)")
+        return written, msg
+
+    def _relayout(self, snap) -> None:
+        """記録済みレイアウトが self.ordering と違えば pp2_uv を並べ直す"""
+        rec = read_layout(snap.root)
+        if (rec is not None and rec.ordering == self.ordering
+                and layout_cells(snap, self.UVSET, rec) is not None):
+            return
+        with self._stage("layout"):
+            layout = PP2Layout.for_paths(snap.paths, PP2UVAutoSquare.MINCOL,
+                                         self.UVSET, self.ordering)
+            PP2UVAutoSquare(snap.root, uvset=self.UVSET, batch=True,
+                            ordering=self.ordering).write_layout(snap.meshes, layout)
+
+    @staticmethod
+    def _require_selection() -> str:
+        sel = cmds.ls(sl=True, l=True, type="transform")
+        if not sel:
+            cmds.error("幹 Transform を 1 つ選択してください")
+        return sel[0]
+
+    @contextmanager
+    def _stage(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            with self.profiler.stage(name):
+                yield
+        finally:
+            self.timings[name] = (self.timings.get(name, 0.0)
+                                  + time.perf_counter() - t0)
+
+    # ----------------------------------------------------------
+    def _sample_uv(self, mesh: str | None, tr: str):
+        """pp2_uv が無い mesh は map1 から複製してから UV[0] を読む"""
+        if mesh is None:
+            cmds.error(f"mesh がありません: {tr}")
+        if self.UVSET not in (cmds.polyUVSet(mesh, q=True, auv=True) or []):
+            cmds.polyUVSet(mesh, copy=True,
+                           uvSet=self.SRC_UV, newUVSet=self.UVSET)
+
+        # polyEditUV -uvSet は使わず、一時的にカレントを切り替えてサンプル
+        cur = cmds.polyUVSet(mesh, q=True, currentUVSet=True)[0]
+        cmds.polyUVSet(mesh, e=True, uvSet=self.UVSET, currentUVSet=True)
+        uv = cmds.polyEditUV(f"{mesh}.map[0]", q=True)
+        cmds.polyUVSet(mesh, e=True, uvSet=cur, currentUVSet=True)
+        return uv
+
+
+# ----------------------------------------------------------------------
+class PP2AtlasExporter(PP2Exporter):
+    """複数ルートをアセットごとの行ブロックに詰めて 1 組のテクスチャに書き出す"""
+
+    def __init__(
+        self,
+        roots:     Optional[Iterable[str]] = None,
+        out_dir:   Optional[str] = None,
+        base_name: str           = "",
+        outputs:   Optional[Iterable[str]] = None,
+        mincol:    int           = 5,
+        exr_compression: str     = "zip",
+        exr_half:  bool          = False,
+        profile:   bool | str    = False,
+        ordering:  str           = "dfs",
+        formats:   Optional[dict] = None,
+    ):
+        """
+        Parameters
+        ----------
+        roots  : ルート Transform 名のリスト（None なら選択中の Transform すべて）
+        mincol : 最小列数（列数はアトラス全体の Transform 数で決める）
+        ordering : 各ルートの行ブロック内でのセルの並べ方
+        その他は PP2Exporter と同じ（cache は使わない）
+        """
+        self.roots = list(roots or cmds.ls(sl=True, l=True, type="transform") or [])
+        if not self.roots:
+            cmds.error("ルート Transform を 1 つ以上選択してください")
+        super().__init__(self.roots[0], out_dir, base_name or "pp2_atlas",
+                         outputs, False, exr_compression, exr_half, profile,
+                         ordering, formats)
+        self.mincol = mincol
+        self.atlas: PP2Atlas | None = None
+
+    def _export(self):
+        with self._stage("snapshot"):
+            snaps = [snapshot(r) for r in self.roots]
+
+        with self._stage("layout"):
+            # 各ルートの pp2_uv をアトラスのセル中心へ書き換え、記録も残す
+            self.atlas = atlas = PP2Atlas(snaps, mincol=self.mincol, uvset=self.UVSET,
+                                          ordering=self.ordering)
+            for snap, layout in zip(snaps, atlas.layouts):
+                PP2UVAutoSquare(snap.root, uvset=self.UVSET, batch=True
+                                ).write_layout(snap.meshes, layout)
+
+        res = write_atlas(atlas, self.out_dir, self.base_name, self.outputs,
+                          self._stage, self.exr_options, self.formats)
+        written = res["outputs"]
+
+        nodes = sum(map(len, snaps))
+        self.profiler.note(nodes=nodes, roots=len(snaps), grid=list(atlas.shape),
+                           layout="atlas",
+                           memo={k: sum(s.memo[k] for s in snaps) for k in ("hits", "misses")})
+        for k, path in written.items():
+            self.profiler.note_texture(k, path, atlas.shape)
+
+        total = sum(self.timings.values())
+        msg = (f"[PP2] atlas {len(snaps)} roots / {nodes} nodes / "
+               f"{atlas.rows}x{atlas.cols}  RowHeight={atlas.row_height:.5f} "
+               f"→ {', '.join(written)}  ({total:.2f}s)")
+        print(f"[PP2] manifest → {res['manifest']}")
+        return written, msg
+
+
+# ----------------------------------------------------------------------
+# 使い方
+# ----------------------------------------------------------------------
+# 1) ルート Transform を選択
+# 2) >>> from pp2_exporter import PP2Exporter
+#    >>> PP2Exporter(out_dir="D:/PP2_out", base_name="tree01").export()
+#    >>> PP2Exporter(outputs=("xvector",)).export()     # X-Vector のみ
+#    >>> PP2Exporter(cache=True).export()               # 差分のみ再計算
+#    >>> PP2Exporter(ordering="morton").export()        # 親子テクセルが近い並べ方で
+#    >>> PP2Exporter(profile=True).export()             # <base>.pp2profile.json
+#    >>> PP2Exporter(base_name="tree01").export_frames(range(1, 25))  # フリップブック
+#    >>> PP2Exporter(base_name="tree01").export_lods((2, 1))  # 葉 → 枝 → 幹だけの LOD
+#
+#    書き出し中も作業を続ける（複数ルートは並列に書き出される）
+#    >>> jobs = [PP2Exporter(r, base_name=r).export_async() for r in ("tree01", "tree02")]
+#    >>> jobs[0].progress, jobs[0].cancel()
+#
+#    複数の木を 1 組のテクスチャに（ルートを複数選択）
+#    >>> from pp2_exporter import PP2AtlasExporter
+#    >>> PP2AtlasExporter(out_dir="D:/PP2_out", base_name="forest").export()
+# ----------------------------------------------------------------------
+if __name__ == "__main__":
+    PP2Exporter().export()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+pp2_hierarchy.py
+-----------------------------------
+Pivot Painter 2 用：階層スナップショットの入れ物（Maya 非依存）
+
+PP2Snapshot は pp2_snapshot.take_snapshot が Maya から埋めるほか、
+バッチ処理のシーン代替やテストからは from_paths で直接組み立てられる。
+"""
+
+from __future__ import annotations
+import numpy as np
+
+
+class PP2Snapshot:
+    """
+    root 以下の Transform 階層のスナップショット
+
+    並びは深さ優先・子は listRelatives 順（旧 _enum_tree と同じ）。
+
+    Attributes
+    ----------
+    paths    : list[str]          Transform の DAG フルパス
+    parents  : (N,) int64         親の列挙インデックス（ルートは -1）
+    depths   : (N,) int64         root からの階層深度
+    shapes   : list[str | None]   最初の非 intermediate mesh（無ければ None）
+    meshes   : list[list[str]]    非 intermediate mesh すべて
+    matrices : (N, 16) float64    ワールド行列（xform -q -ws -m と同じ並び）
+    pivots   : (N, 3)  float64    ワールド rotate pivot
+    uvs      : (N, 2)  float64    uvset の UV[0]（取れなければ NaN）
+    has_uv   : (N,) bool          uvs が有効か
+    memo     : dict               インスタンスの使い回し {"hits": 写したノード数, "misses": 読んだ数}
+    """
+
+    def __init__(self, n: int = 0) -> None:
+        self.paths:  list[str]        = []
+        self.shapes: list[str | None] = []
+        self.meshes: list[list[str]]  = []
+        self.parents  = np.full(n, -1, np.int64)
+        self.depths   = np.zeros(n, np.int64)
+        self.matrices = np.zeros((n, 16), np.float64)
+        self.pivots   = np.zeros((n, 3), np.float64)
+        self.uvs      = np.full((n, 2), np.nan, np.float64)
+        self.has_uv   = np.zeros(n, bool)
+        self.memo     = {"hits": 0, "misses": n}
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    @property
+    def root(self) -> str:
+        return self.paths[0]
+
+    def copy(self) -> PP2Snapshot:
+        """配列・リストを複製したスナップショット（pp2_index が内部の状態を渡す時に使う）"""
+        snap = PP2Snapshot(0)
+        snap.paths  = list(self.paths)
+        snap.shapes = list(self.shapes)
+        snap.meshes = [list(m) for m in self.meshes]
+        for k in ("parents", "depths", "matrices", "pivots", "uvs", "has_uv", "memo"):
+            setattr(snap, k, getattr(self, k).copy())
+        return snap
+
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_paths(
+        cls,
+        paths: list[str],
+        matrices=None,
+        pivots=None,
+        meshes: list[list[str]] | None = None,
+    ) -> PP2Snapshot:
+        """
+        DAG フルパス列（先頭がルート、深さ優先順）からスナップショットを組む
+
+        親・深度はパスの親子関係から求める。Maya を使わないテストや
+        バッチ用のシーン代替（JSON など）から使う。
+        """
+        snap = cls(len(paths))
+        snap.paths  = list(paths)
+        snap.meshes = [list(m) for m in meshes] if meshes else [[] for _ in paths]
+        snap.shapes = [m[0] if m else None for m in snap.meshes]
+
+        root_depth = paths[0].count("|")
+        index = {p: i for i, p in enumerate(paths)}
+        for i, p in enumerate(paths[1:], 1):
+            snap.parents[i] = index.get(p.rpartition("|")[0], -1)
+            snap.depths[i]  = p.count("|") - root_depth
+        if matrices is not None:
+            snap.matrices[:] = np.asarray(matrices, np.float64).reshape(-1, 16)
+        if pivots is not None:
+            snap.pivots[:] = np.asarray(pivots, np.float64).reshape(-1, 3)
+        return snap
@@ -0,0 +1,342 @@
+# -*- coding: utf-8 -*-
+"""
+pp2_index.py
+-----------------------------------
+Pivot Painter 2 用：セッション中持ち続ける階層インデックス
+
+enable() しておくと、各ツール（PP2UVAutoSquare / 各エクスポーター）は
+root ごとに 1 つの PP2SceneIndex を使い回す。最初の 1 回だけ take_snapshot と
+同じ走査をし、以降は Maya のメッセージコールバックが印を付けたノードだけを読み直す。
+
+    MNodeMessage.addAttributeChangedCallback（各 Transform） → そのノード以下の行列 / ピボット
+    MNodeMessage.addAttributeChangedCallback（先頭の mesh）  → 持ち主 Transform の UV
+    MNodeMessage.addNameChangedCallback（各 Transform）      → 構造（パスが変わる）
+    MNodeMessage.addAttributeChangedCallback（ルートの祖先） → 全ノードの行列
+    MNodeMessage.addNameChangedCallback（ルートの祖先）      → ルートのパスが変わる
+    MDagMessage.addAllDagChangesCallback                     → root 以下なら構造
+    MDGMessage.addTimeChangeCallback                         → 全ノードの行列（アニメーション）
+    MSceneMessage kBeforeNew / kBeforeOpen                   → すべてのインデックスを破棄
+
+構造が変わった時だけ全体を走査し直す（コールバックも張り直す）。
+ルート自身（と祖先）の名前・親が変わったインデックスは次の参照時に捨てて作り直す。
+
+コンストレイント・ドリブンキー・エクスプレッション・アニメーションカーブ
+（カレントフレームでのキー編集）で動くノードは、値が変わっても Transform に
+メッセージが来ない。行列に効くアトリビュートに入力接続のあるノード（driven）は
+refresh() のたびに子孫ごと読み直し、ルートの祖先が driven なら毎回全体を読み直す。
+接続を調べられないノードも driven とみなす。
+
+    import pp2_index
+    pp2_index.enable()                  # userSetup.py などで 1 回
+    snap = pp2_index.snapshot("|tree01")   # 2 回目以降はほぼ変更分だけ
+    pp2_index.scene_index("|tree01").stats
+        {"mode": "partial", "matrices": 12, "uvs": 0}
+
+enable() しなければ snapshot() / read_uvs() は pp2_snapshot のものをそのまま呼ぶ。
+"""
+
+from __future__ import annotations
+import numpy as np
+import maya.api.OpenMaya as om2
+
+from pp2_hierarchy import PP2Snapshot
+from pp2_layout import PP2Layout
+from pp2_snapshot import _dag_path, _first_uv, take_snapshot
+from pp2_snapshot import read_uvs as _read_uvs
+
+# 行列に効かないアトリビュート（pp2Layout の保存で階層全体を汚さない）
+IGNORED_ATTRS = frozenset((PP2Layout.ATTR,))
+
+_CONNECTION = om2.MNodeMessage.kConnectionMade | om2.MNodeMessage.kConnectionBroken
+_CHANGED = om2.MNodeMessage.kAttributeSet | _CONNECTION
+
+# 入力接続があると、値が変わってもその Transform にメッセージが来ないアトリビュート
+# （子プラグ translateX / shearXY なども末尾の XYZ を落として照合する）
+DRIVEN_ATTRS = frozenset((
+    "translate", "rotate", "scale", "shear", "rotatePivot", "rotatePivotTranslate",
+    "scalePivot", "scalePivotTranslate", "rotateAxis", "rotateOrder", "jointOrient",
+    "inheritsTransform", "offsetParentMatrix"))
+
+_INDEXES: dict[str, "PP2SceneIndex"] = {}
+_SCENE_CBS: list[int] = []
+
+
+# ----------------------------------------------------------------------
+def _remove_callbacks(ids: list[int]) -> None:
+    if not ids:
+        return
+    try:
+        om2.MMessage.removeCallbacks(ids)
+    except RuntimeError:                            # ノードごと消えたコールバック
+        pass
+
+
+def _is_driven(obj) -> bool:
+    """obj の行列に効くアトリビュートに入力接続があるか（調べられなければ True）"""
+    try:
+        plugs = om2.MFnDependencyNode(obj).getConnections()
+        return any(p.isDestination
+                   and p.partialName(useLongNames=True).rstrip("XYZ") in DRIVEN_ATTRS
+                   for p in plugs)
+    except RuntimeError:
+        return True
+
+
+class PP2SceneIndex:
+    """
+    root 以下の Transform 階層のインデックス
+
+    Attributes
+    ----------
+    root  : ルートのフルパス
+    uvset : UV[0] を追いかける UV セット名
+    stale : ルート自身の名前・親が変わった（scene_index() が作り直す）
+    stats : 直近の refresh() の内訳
+            {"mode": "full" / "partial" / "clean", "matrices": 読み直した数, "uvs": 同}
+    """
+
+    def __init__(self, root: str, uvset: str = "pp2_uv") -> None:
+        self.root  = _dag_path(root).fullPathName()
+        self.uvset = uvset
+        self.stale = False
+        self.stats: dict = {}
+        self._ids: list[int] = []
+        self._build()
+
+    def __len__(self) -> int:
+        return len(self._snap)
+
+    # ------------------------------------------------------------------
+    def snapshot(self, uvs: bool = False) -> PP2Snapshot:
+        """
+        最新の状態のスナップショット（複製なので書き換えてよい）
+
+        uvs : True なら self.uvset の UV[0] も埋める（変わった mesh だけ読み直す）
+        """
+        self.refresh()
+        if uvs:
+            self._refresh_uvs()
+        snap = self._snap.copy()
+        if not uvs:
+            snap.uvs[:]    = np.nan
+            snap.has_uv[:] = False
+        return snap
+
+    def refresh(self) -> dict:
+        """印の付いたノードを読み直す。構造が変わっていれば全体を走査し直す"""
+        if self._topology:
+            self._build()
+            self.stats = {"mode": "full", "matrices": len(self), "uvs": 0}
+            return self.stats
+
+        for i in self._recheck:                     # 接続が変わったノード
+            (self._driven.add if _is_driven(self._dags[i].node())
+             else self._driven.discard)(i)
+        self._recheck.clear()
+        if self._recheck_anc:
+            self._anc_driven  = any(_is_driven(o) for o in self._ancestors)
+            self._recheck_anc = False
+
+        if self._all_mtx or self._anc_driven:
+            idx = np.arange(len(self))
+        elif self._dirty or self._driven:
+            mark = np.zeros(len(self), bool)
+            for i in self._dirty | self._driven:    # 子孫は列挙順で i の直後に続く
+                mark[i:self._end[i]] = True
+            idx = np.flatnonzero(mark)
+        else:
+            idx = np.empty(0, np.int64)
+
+        snap = self._snap
+        for i in idx.tolist():
+            path = self._dags[i]
+            snap.matrices[i] = list(path.inclusiveMatrix())
+            p = om2.MFnTransform(path).rotatePivot(om2.MSpace.kWorld)
+            snap.pivots[i] = (p.x, p.y, p.z)
+        self._dirty.clear()
+        self._all_mtx = False
+        self.stats = {"mode": "partial" if len(idx) else "clean",
+                      "matrices": len(idx), "uvs": 0}
+        return self.stats
+
+    def fill_uvs(self, snap: PP2Snapshot) -> bool:
+        """
+        snap の uvs / has_uv を埋める（self.uvset の UV[0]）
+
+        snap が今のインデックスと同じ階層でなければ何もせず False
+        """
+        if self.stale or self._topology or snap.paths != self._snap.paths:
+            return False
+        self._refresh_uvs()
+        snap.uvs[:]    = self._snap.uvs
+        snap.has_uv[:] = self._snap.has_uv
+        return True
+
+    def close(self) -> None:
+        """コールバックを外す（以後このインデックスは使わない）"""
+        _remove_callbacks(self._ids)
+        self._ids = []
+        self.stale = True
+
+    # ------------------------------------------------------------------
+    # 構築
+    # ------------------------------------------------------------------
+    def _build(self) -> None:
+        """全体を走査し、ノードごとのコールバックを張り直す"""
+        _remove_callbacks(self._ids)
+        dags: list = []
+        self._snap = snap = take_snapshot(self.root, uvset=None, dags=dags)
+        self._dags   = [d for d, _ in dags]
+        self._shapes = [sps[0] if sps else None for _, sps in dags]
+
+        # 部分木の終わり（列挙は深さ優先なので i の子孫は i+1 .. end-1）
+        n = len(snap)
+        size = np.ones(n, np.int64)
+        parents = snap.parents.tolist()
+        for i in range(n - 1, 0, -1):
+            size[parents[i]] += size[i]
+        self._end = np.arange(n) + size
+
+        self._dirty: set[int] = set()
+        self._recheck: set[int] = set()
+        self._all_mtx  = False
+        self._topology = False
+        self._uv_ok    = np.zeros(n, bool)         # UV は初めて要る時に読む
+
+        # ルートより上の Transform（ワールド行列に効くがインデックスの外）
+        anc, self._ancestors = om2.MDagPath(self._dags[0]), []
+        while anc.length() > 1:
+            anc.pop()
+            self._ancestors.append(anc.node())
+        self._anc_keys    = {om2.MObjectHandle(o).hashCode() for o in self._ancestors}
+        self._anc_driven  = any(_is_driven(o) for o in self._ancestors)
+        self._recheck_anc = False
+
+        ids = [om2.MDagMessage.addAllDagChangesCallback(self._on_dag),
+               om2.MDGMessage.addTimeChangeCallback(self._on_time)]
+        self._driven: set[int] = set()
+        for i, (path, sps) in enumerate(dags):
+            obj = path.node()
+            if _is_driven(obj):
+                self._driven.add(i)
+            ids.append(om2.MNodeMessage.addAttributeChangedCallback(obj, self._on_xform, i))
+            ids.append(om2.MNodeMessage.addNameChangedCallback(obj, self._on_name, i))
+            if sps:
+                ids.append(om2.MNodeMessage.addAttributeChangedCallback(
+                    sps[0].node(), self._on_mesh, i))
+        for obj in self._ancestors:
+            ids.append(om2.MNodeMessage.addAttributeChangedCallback(obj, self._on_ancestor))
+            ids.append(om2.MNodeMessage.addNameChangedCallback(obj, self._on_ancestor_name))
+        self._ids = ids
+
+    def _refresh_uvs(self) -> None:
+        snap = self._snap
+        todo = np.flatnonzero(~self._uv_ok)
+        for i in todo.tolist():
+            shape = self._shapes[i]
+            uv = _first_uv(shape, self.uvset) if shape is not None else None
+            snap.uvs[i]    = uv if uv is not None else (np.nan, np.nan)
+            snap.has_uv[i] = uv is not None
+        self._uv_ok[:] = True
+        self.stats["uvs"] = len(todo)
+
+    # ------------------------------------------------------------------
+    # コールバック（印を付けるだけ。値の読み直しは refresh() まで待つ）
+    # ------------------------------------------------------------------
+    def _under(self, full: str) -> bool:
+        return full == self.root or full.startswith(self.root + "|")
+
+    def _on_xform(self, msg, plug, other, i) -> None:
+        if msg & _CHANGED and plug.partialName(useLongNames=True) not in IGNORED_ATTRS:
+            self._dirty.add(i)
+            if msg & _CONNECTION:
+                self._recheck.add(i)
+
+    def _on_ancestor(self, msg, plug, other, data) -> None:
+        if msg & _CHANGED:
+            self._all_mtx = True
+            if msg & _CONNECTION:
+                self._recheck_anc = True
+
+    def _on_ancestor_name(self, node, prev, data) -> None:
+        self.stale = True                           # ルートのフルパスが変わった
+
+    def _on_mesh(self, msg, plug, other, i) -> None:
+        if msg & _CHANGED:
+            self._uv_ok[i] = False
+
+    def _on_name(self, node, prev, i) -> None:
+        self._topology = True
+        if i == 0:
+            self.stale = True
+
+    def _on_dag(self, msg, child, parent, data) -> None:
+        c = child.fullPathName()
+        if c == self.root or (self._anc_keys and               # 祖先の親が変わった
+                              om2.MObjectHandle(child.node()).hashCode() in self._anc_keys):
+            self.stale = True
+        if self._under(c) or self._under(parent.fullPathName()):
+            self._topology = True
+
+    def _on_time(self, time, data) -> None:
+        self._all_mtx = True
+
+
+# ----------------------------------------------------------------------
+# セッション
+# ----------------------------------------------------------------------
+def enabled() -> bool:
+    return bool(_SCENE_CBS)
+
+
+def enable() -> None:
+    """各ツールがインデックスを使うようにする（シーンを開き直すと自動で破棄）"""
+    if _SCENE_CBS:
+        return
+    for msg in (om2.MSceneMessage.kBeforeNew, om2.MSceneMessage.kBeforeOpen):
+        _SCENE_CBS.append(om2.MSceneMessage.addCallback(msg, lambda *_: clear()))
+
+
+def disable() -> None:
+    """インデックスをすべて破棄し、毎回走査する従来の動作に戻す"""
+    clear()
+    if _SCENE_CBS:
+        om2.MMessage.removeCallbacks(_SCENE_CBS)
+        _SCENE_CBS.clear()
+
+
+def clear() -> None:
+    """作ったインデックスを破棄する（コールバックも外す）"""
+    for idx in _INDEXES.values():
+        idx.close()
+    _INDEXES.clear()
+
+
+def scene_index(root: str, uvset: str = "pp2_uv") -> PP2SceneIndex:
+    """root のインデックス（無い / 使えなくなっていれば作る）"""
+    for key in [k for k, v in _INDEXES.items() if v.stale]:
+        _INDEXES.pop(key).close()
+    full = root if root in _INDEXES else _dag_path(root).fullPathName()
+    idx  = _INDEXES.get(full)
+    if idx is None or idx.uvset != uvset:
+        if idx is not None:
+            idx.close()
+        idx = _INDEXES[full] = PP2SceneIndex(full, uvset)
+    return idx
+
+
+# ----------------------------------------------------------------------
+# ツール用（enable() されていなければ pp2_snapshot と同じ）
+# ----------------------------------------------------------------------
+def snapshot(root: str) -> PP2Snapshot:
+    """take_snapshot(root, uvset=None) の代わり"""
+    if not enabled():
+        return take_snapshot(root, uvset=None)
+    return scene_index(root).snapshot()
+
+
+def read_uvs(snap: PP2Snapshot, uvset: str) -> None:
+    """pp2_snapshot.read_uvs の代わり（snap が最新のインデックスと同じ階層なら使い回す）"""
+    idx = _INDEXES.get(snap.root) if enabled() else None
+    if idx is None or idx.uvset != uvset or not idx.fill_uvs(snap):
+        _read_uvs(snap, uvset)
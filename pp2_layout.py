@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""
+pp2_layout.py
+-----------------------------------
+Pivot Painter 2 用：pp2_uv グリッド レイアウトの記録（Maya 非依存）
+
+PP2UVAutoSquare が決めた列数 / 行数 / 各 Transform のセル番号を保持し、
+ルート Transform の文字列アトリビュート (pp2Layout) に JSON で保存する。
+エクスポーターはこれを読めば UV を 1 つも問い合わせずにグリッドが分かる。
+
+パスはルートからの相対パス（ルート自身は ""）で記録するので、
+ルートの名前変更・親の付け替えでは古くならない。
+
+セルの並べ方 (ordering) は ORDERINGS から選ぶ。PP2 のシェーダーは頂点ごとに
+親テクセルを最大 4 段たどるので、親子が近いほどテクスチャキャッシュに乗りやすい。
+parent_distance で親子間の平均テクセル距離を比べられる。
+
+    dfs     : 列挙順（深さ優先）をそのまま行優先に並べる（従来どおり）
+    bfs     : 深さごと（幹 → 枝 → 葉）。同じ深さの中は列挙順
+    sibling : 兄弟をひとかたまりにし、親をその子ブロックの真ん中に挟む
+    morton  : sibling の並びを Z 曲線 (Morton 順) のセルに置く（部分木が 2D で固まる）
+"""
+
+from __future__ import annotations
+import json, math
+import numpy as np
+
+
+ORDERINGS = ("dfs", "bfs", "sibling", "morton")
+
+
+def best_cols(n: int, mincol: int = 5) -> int:
+    """n ピースをほぼ正方形に近い分割にする列数を返す"""
+    root = int(math.sqrt(n))
+    cand = [max(mincol, root + i) for i in range(0, 3)]
+    return min(cand, key=lambda c: abs(math.ceil(n / float(c)) - c))
+
+
+def relative_paths(paths: list[str]) -> list[str]:
+    """DAG フルパス列（先頭がルート）→ ルート相対パス列"""
+    root = paths[0]
+    return [p[len(root):] for p in paths]
+
+
+def tree_from_paths(paths: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """DAG フルパス列（先頭がルート、深さ優先順）→ (parents, depths)"""
+    index   = {p: i for i, p in enumerate(paths)}
+    parents = np.fromiter((index.get(p.rpartition("|")[0], -1) if i else -1
+                           for i, p in enumerate(paths)), np.int64, len(paths))
+    base    = paths[0].count("|") if paths else 0
+    depths  = np.fromiter((p.count("|") - base for p in paths), np.int64, len(paths))
+    return parents, depths
+
+
+def _children(parents: np.ndarray):
+    """親ごとの子（列挙順）を CSR で返す: (kids, start)。kids[start[i]:start[i+1]]"""
+    n    = len(parents)
+    has  = parents >= 0
+    kids = np.flatnonzero(has)[np.argsort(parents[has], kind="stable")]
+    start = np.searchsorted(parents[kids], np.arange(n + 1))
+    return kids, start
+
+
+def _sibling_sequence(parents: np.ndarray) -> np.ndarray:
+    """
+    兄弟ブロック順：各ノードを自分の子ブロックの真ん中に置く
+    （前半の子の部分木 → 自分 → 後半の子の部分木。兄弟は親を挟んで連続する）
+    """
+    kids, start = _children(parents)
+    kids, start = kids.tolist(), start.tolist()
+    seq, stack = [], [(0, False)]
+    while stack:
+        i, ready = stack.pop()
+        if ready:
+            seq.append(i)
+            continue
+        ch = kids[start[i]:start[i + 1]]
+        h  = len(ch) // 2
+        stack.extend((k, False) for k in reversed(ch[h:]))
+        stack.append((i, True))
+        stack.extend((k, False) for k in reversed(ch[:h]))
+    return np.asarray(seq, np.int64)
+
+
+def _morton_cells(n: int, cols: int, rows: int) -> np.ndarray:
+    """rows x cols 格子のセル番号を Z 曲線の順に n 個"""
+    r, c = np.divmod(np.arange(rows * cols, dtype=np.int64), cols)
+    code = np.zeros_like(r)
+    for b in range(max(rows, cols).bit_length()):
+        code |= ((c >> b) & 1) << (2 * b) | ((r >> b) & 1) << (2 * b + 1)
+    return (r * cols + c)[np.argsort(code, kind="stable")[:n]]
+
+
+def order_cells(parents, depths, cols: int, rows: int, ordering: str = "dfs") -> np.ndarray:
+    """
+    ordering に従って各 Transform（列挙順）のセル番号を決める
+
+    parents / depths は列挙順（ルートが 0、親は子より前）。
+    """
+    if ordering not in ORDERINGS:
+        raise ValueError(f"ordering は {ORDERINGS} のいずれか: {ordering}")
+    parents = np.asarray(parents, np.int64)
+    n = len(parents)
+    if ordering == "dfs":
+        return np.arange(n, dtype=np.int64)
+
+    seq = (np.argsort(np.asarray(depths, np.int64), kind="stable")
+           if ordering == "bfs" else _sibling_sequence(parents))
+    slots = np.arange(n, dtype=np.int64)
+    if ordering == "morton":
+        z = _morton_cells(n, cols, rows)
+        r, c = np.divmod(z, cols)
+        # 空の行 / 列ができると UV から格子を復元できない（小さな格子）→ 行優先のまま
+        if len(np.unique(r)) == rows and len(np.unique(c)) == min(n, cols):
+            slots = z
+    cells = np.empty(n, np.int64)
+    cells[seq] = slots
+    return cells
+
+
+def parent_distance(parents, cells, cols: int, levels: int = 1) -> float:
+    """
+    子と祖先（levels 段上まで）のテクセル間のユークリッド距離の平均
+
+    並べ方の比較用（小さいほどシェーダーの親たどりがキャッシュに乗りやすい）。
+    ルートより上の祖先は数えない。
+    """
+    parents = np.asarray(parents, np.int64)
+    r, c = np.divmod(np.asarray(cells, np.int64), cols)
+    node, anc = np.arange(len(parents)), parents
+    total, count = 0.0, 0
+    for _ in range(levels):
+        ok = anc >= 0
+        node, anc = node[ok], anc[ok]
+        if not len(node):
+            break
+        total += float(np.hypot(r[node] - r[anc], c[node] - c[anc]).sum())
+        count += len(node)
+        anc = parents[anc]
+    return total / count if count else 0.0
+
+
+class PP2Layout:
+    """
+    pp2_uv グリッド レイアウト
+
+    Attributes
+    ----------
+    cols, rows : グリッドの列数 / 行数
+    paths      : ルート相対パス（列挙順）
+    cells      : (N,) 各パスのセル番号 (row * cols + col)
+    uvset      : レイアウトを書き込んだ UV セット名
+    ordering   : セルの並べ方（ORDERINGS のいずれか）
+    """
+
+    ATTR    = "pp2Layout"   # ルート Transform に追加する文字列アトリビュート
+    VERSION = 1
+
+    def __init__(
+        self,
+        cols: int,
+        rows: int,
+        paths: list[str],
+        cells=None,
+        uvset: str = "pp2_uv",
+        ordering: str = "dfs",
+    ) -> None:
+        self.cols  = int(cols)
+        self.rows  = int(rows)
+        self.paths = list(paths)
+        self.cells = (np.arange(len(self.paths), dtype=np.int64) if cells is None
+                      else np.asarray(cells, np.int64))
+        self.uvset = uvset
+        self.ordering = ordering
+
+    @classmethod
+    def for_paths(
+        cls,
+        paths: list[str],
+        mincol: int = 5,
+        uvset: str = "pp2_uv",
+        ordering: str = "dfs",
+    ) -> PP2Layout:
+        """
+        DAG フルパス列（先頭がルート、深さ優先順）に PP2UVAutoSquare と同じ格子を
+        ordering の並べ方で割り当てる
+        """
+        n    = len(paths)
+        cols = best_cols(n, mincol)
+        rows = int(math.ceil(n / float(cols)))
+        cells = None
+        if ordering != "dfs":
+            cells = order_cells(*tree_from_paths(paths), cols, rows, ordering)
+        return cls(cols, rows, relative_paths(paths), cells, uvset, ordering)
+
+    # ------------------------------------------------------------------
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.rows, self.cols
+
+    @property
+    def row_height(self) -> float:
+        return 1.0 / self.rows
+
+    def parent_distance(self, parents, levels: int = 1) -> float:
+        """このレイアウトでの親子テクセル距離の平均（module の parent_distance）"""
+        return parent_distance(parents, self.cells, self.cols, levels)
+
+    def cell_centers(self):
+        """各パスのセル中心 (u, v)"""
+        r, c = np.divmod(self.cells, self.cols)
+        us = (1.0 / self.cols) * (c + 0.5)
+        vs = 1.0 - (1.0 / self.rows) * (r + 0.5)
+        return us, vs
+
+    # ------------------------------------------------------------------
+    def cells_for(self, paths: list[str]) -> np.ndarray | None:
+        """
+        現在の階層（DAG フルパス列）に対応するセル番号を返す
+
+        Transform の増減・名前変更などで記録と一致しなければ None（古い）。
+        """
+        rel = relative_paths(paths)
+        if len(rel) != len(self.paths):
+            return None
+        lut = dict(zip(self.paths, self.cells.tolist()))
+        try:
+            return np.fromiter((lut[p] for p in rel), np.int64, len(rel))
+        except KeyError:
+            return None
+
+    def uvs_in_cells(self, cells, uvs) -> np.ndarray:
+        """
+        uvs (K, 2) がそれぞれ cells (K,) のセル内にあるか（(K,) bool）
+
+        pp2_uv を手で動かした後に記録を信用しないための確認用（NaN は False）。
+        """
+        r, c = np.divmod(np.asarray(cells, np.int64), self.cols)
+        u, v = np.asarray(uvs, np.float64).reshape(-1, 2).T
+        tol  = 1e-6
+        return ((u >= c / self.cols - tol) & (u <= (c + 1) / self.cols + tol)
+                & (v >= 1.0 - (r + 1) / self.rows - tol)
+                & (v <= 1.0 - r / self.rows + tol))
+
+    # ------------------------------------------------------------------
+    def to_json(self) -> str:
+        return json.dumps({
+            "version": self.VERSION,
+            "uvset":   self.uvset,
+            "ordering": self.ordering,
+            "cols":    self.cols,
+            "rows":    self.rows,
+            "paths":   self.paths,
+            "cells":   self.cells.tolist(),
+        }, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, text: str | None) -> PP2Layout | None:
+        """壊れている / バージョン違いの記録は None"""
+        if not text:
+            return None
+        try:
+            d = json.loads(text)
+            if d.get("version") != cls.VERSION:
+                return None
+            return cls(d["cols"], d["rows"], d["paths"], d["cells"], d["uvset"],
+                       d.get("ordering", "dfs"))
+        except (ValueError, KeyError, TypeError):
+            return None
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+pp2_lod.py
+-----------------------------------
+Pivot Painter 2 用：階層をたたんだ LOD テクスチャ（Maya 非依存）
+
+1 つのスナップショットから、深さ max_depth 以上の Transform を
+深さ max_depth - 1 の祖先にまとめた縮小階層を作り、専用の詰めたグリッドで
+PivotPosition / X-Vector を書き出す。シーンの複製・ノード削除は要らない。
+
+    lods = lod_chain(snap, (3, 2, 1), cells, grid)   # LOD0 = 元の階層とグリッド
+    write_lods(lods, out_dir, "tree01")
+        LOD0 : <base>_pivotpos.exr / <base>_xvector.png   （export() と同じ）
+        LODi : <base>_lod<i>_pivotpos.exr / <base>_lod<i>_xvector.png
+        <base>_lods.json : LOD ごとの max_depth / グリッド / RowHeight /
+                           元の Transform → LOD のノード (owners)
+
+親テクセル (_pack_parent) は LOD のグリッドで振り直し、深度 α は
+max_depth - 1 で頭打ちになる。LOD のメッシュは owners の示すノードの
+セル中心を pp2_uv に書けばよい（PP2LOD.node_uvs）。
+"""
+
+from __future__ import annotations
+import json, os
+from contextlib import nullcontext
+import numpy as np
+
+from pp2_hierarchy import PP2Snapshot
+from pp2_layout import PP2Layout, relative_paths
+from pp2_writers import write_textures
+
+
+class PP2LOD:
+    """
+    1 段分の LOD
+
+    Attributes
+    ----------
+    max_depth : これ以上の深さをたたむ（None なら元の階層そのまま）
+    snap      : たたんだ後の PP2Snapshot（列挙順は元の部分列）
+    owners    : (N,) 元の各 Transform がまとめられた LOD ノードの番号
+    layout    : LOD のグリッド（PP2Layout）
+    """
+
+    def __init__(
+        self,
+        snap: PP2Snapshot,
+        max_depth: int | None,
+        mincol: int = 5,
+        uvset: str = "pp2_uv",
+        ordering: str = "dfs",
+        layout: PP2Layout | None = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        snap      : 元の階層のスナップショット
+        max_depth : 1 以上（1 ならルートだけ）。None なら元の階層
+        layout    : max_depth=None の時に使う既存のグリッド
+                    （None なら PP2UVAutoSquare と同じ格子を ordering で作る）
+        """
+        if max_depth is not None and max_depth < 1:
+            raise ValueError(f"max_depth は 1 以上: {max_depth}")
+        self.source    = snap
+        self.max_depth = max_depth
+
+        n, depths = len(snap), snap.depths
+        if max_depth is None:
+            keep, owner = np.arange(n), np.arange(n)
+        else:
+            keep  = np.flatnonzero(depths < max_depth)
+            owner = np.arange(n)
+            deep  = depths >= max_depth
+            while deep.any():                       # 祖先へ 1 段ずつ上げる
+                owner = np.where(deep, snap.parents[owner], owner)
+                deep  = depths[owner] >= max_depth
+
+        remap = np.full(n, -1, np.int64)
+        remap[keep] = np.arange(len(keep))
+        self.owners = remap[owner]
+
+        sub = PP2Snapshot(len(keep))
+        sub.paths = [snap.paths[i] for i in keep.tolist()]
+        merged = [[] for _ in keep]
+        for i, o in enumerate(self.owners.tolist()):
+            merged[o].extend(snap.meshes[i] if snap.meshes else [])
+        sub.meshes = merged
+        sub.shapes = [m[0] if m else None for m in merged]
+        par = snap.parents[keep]
+        sub.parents[:]  = np.where(par >= 0, remap[par], -1)
+        sub.depths[:]   = depths[keep]
+        sub.matrices[:] = snap.matrices[keep]
+        sub.pivots[:]   = snap.pivots[keep]
+        self.snap = sub
+
+        if layout is None or max_depth is not None:
+            layout = PP2Layout.for_paths(sub.paths, mincol, uvset, ordering)
+        self.layout = layout
+
+    # ------------------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self.snap)
+
+    @property
+    def row_height(self) -> float:
+        return self.layout.row_height
+
+    def node_uvs(self):
+        """元の各 Transform に書く pp2_uv（まとめ先ノードのセル中心）(us, vs)"""
+        us, vs = self.layout.cell_centers()
+        return us[self.owners], vs[self.owners]
+
+    def manifest(self, textures: dict[str, str] | None = None) -> dict:
+        return {
+            "max_depth":  self.max_depth,
+            "nodes":      len(self),
+            "cols":       self.layout.cols,
+            "rows":       self.layout.rows,
+            "row_height": self.row_height,
+            "textures":   textures or {},
+            "paths":      relative_paths(self.snap.paths),
+            "cells":      self.layout.cells.tolist(),
+            "owners":     self.owners.tolist(),
+        }
+
+
+def lod_chain(
+    snap: PP2Snapshot,
+    levels,
+    cells=None,
+    grid=None,
+    mincol: int = 5,
+    uvset: str = "pp2_uv",
+    ordering: str = "dfs",
+) -> list[PP2LOD]:
+    """
+    LOD0（元の階層）+ levels の各 max_depth の LOD を作る
+
+    cells / grid : LOD0 に使う既存のグリッド（記録済みレイアウトなど）。
+                   None なら LOD0 も ordering で並べ直す
+    """
+    base = None
+    if cells is not None:
+        base = PP2Layout(grid[1], grid[0], relative_paths(snap.paths), cells, uvset)
+    lods = [PP2LOD(snap, None, mincol, uvset, ordering, base)]
+    for k in levels:
+        lods.append(PP2LOD(snap, int(k), mincol, uvset, ordering))
+    return lods
+
+
+# ----------------------------------------------------------------------
+def write_lods(
+    lods: list[PP2LOD],
+    out_dir: str,
+    base_name: str,
+    outputs=("pivotpos", "xvector"),
+    stage=None,
+    exr_options: dict | None = None,
+    formats: dict | None = None,
+) -> dict:
+    """
+    各 LOD のテクスチャとマニフェスト <base>_lods.json を書き出す
+
+    LOD0 (max_depth=None) は <base>_*、以降は <base>_lod<i>_* に書く。
+    formats は write_textures と同じ（{出力名: 形式}）。
+
+    Returns
+    -------
+    {"outputs": [{出力名: パス}, ...（LOD 順）], "manifest": パス}
+    """
+    stage = stage or (lambda name: nullcontext())
+    written, entries = [], []
+    for i, lod in enumerate(lods):
+        name = base_name if lod.max_depth is None else f"{base_name}_lod{i}"
+        res = write_textures(lod.snap, lod.layout.cells, lod.layout.shape,
+                             out_dir, name, outputs,
+                             lambda s, i=i: stage(f"lod{i}_{s}"),
+                             exr_options=exr_options, formats=formats)
+        written.append(res["outputs"])
+        entries.append(dict(lod=i, **lod.manifest(
+            {k: os.path.basename(p) for k, p in res["outputs"].items()})))
+
+    manifest = os.path.join(out_dir, f"{base_name}_lods.json")
+    with open(manifest, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "root": lods[0].snap.root, "lods": entries},
+                  f, indent=2)
+    return {"outputs": written, "manifest": manifest}
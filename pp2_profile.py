@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+pp2_profile.py
+-----------------------------------
+Pivot Painter 2 用：エクスポーター / UV ツールのプロファイル
+
+    PP2Profiler : 工程ごとの所要時間と、その間の cmds 呼び出し回数（コマンド名別）、
+                  Transform 数・テクスチャサイズを記録して JSON に保存する
+    make_profiler(profile, path) : profile 引数から PP2Profiler / NULL_PROFILER を返す
+
+cmds の計測は、プロファイル中だけ maya.cmds モジュールの関数を数え上げ用の
+ラッパーに差し替えて行う。どのモジュールから呼んでも（pp2_snapshot / pp2_undo /
+set_pp2UV の補助関数など）同じ maya.cmds を通るので、すべて数えられる。
+差し替えはロックの下で最初の attach で行い、最後の attach が終わったら戻す
+（重なった / 入れ子のプロファイルはそれぞれ自分の期間の呼び出しを数える）。
+ラッパーは元の関数をそのまま呼ぶだけなので、同時に動いている pp2_async の
+書き出しなどには影響しない。無効時は NULL_PROFILER の空コンテキストを使うので、
+差し替えも計測も行わない。
+"""
+
+from __future__ import annotations
+import functools, json, os, threading, time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+_LOCK = threading.Lock()
+_ACTIVE: tuple[Counter, ...] = ()           # 計測中のプロファイルの Counter
+_ORIGINALS: dict[str, tuple] = {}           # 差し替えた名前 → (元の関数, ラッパー)
+
+
+def _counting(name: str, fn):
+    """fn を呼ぶたびに計測中のすべての Counter の name を 1 増やすラッパー"""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        for calls in _ACTIVE:
+            calls[name] += 1
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+def _install(cmds) -> None:
+    """まだ差し替えていない maya.cmds の公開関数をラッパーに差し替える"""
+    for name in dir(cmds):
+        fn = getattr(cmds, name)
+        if name.startswith("_") or name in _ORIGINALS or not callable(fn):
+            continue
+        wrapper = _counting(name, fn)
+        if name == "loadPlugin":                # プラグインが足したコマンドも数える
+            wrapper = _reinstalling(cmds, wrapper)
+        _ORIGINALS[name] = (fn, wrapper)
+        setattr(cmds, name, wrapper)
+
+
+def _reinstalling(cmds, load):
+    @functools.wraps(load)
+    def wrapper(*args, **kwargs):
+        try:
+            return load(*args, **kwargs)
+        finally:
+            with _LOCK:
+                if _ACTIVE:
+                    _install(cmds)
+    return wrapper
+
+
+def _uninstall(cmds) -> None:
+    # 計測中にプラグインなどが差し替えた名前はそのまま残す
+    for name, (fn, wrapper) in _ORIGINALS.items():
+        if getattr(cmds, name, None) is wrapper:
+            setattr(cmds, name, fn)
+    _ORIGINALS.clear()
+
+
+# ----------------------------------------------------------------------
+class PP2Profiler:
+    """1 回の実行分のプロファイル"""
+
+    enabled = True
+
+    def __init__(self, tool: str, path: str | None = None) -> None:
+        """
+        Parameters
+        ----------
+        tool : レポートに記録するツール名
+        path : JSON の保存先（None なら一時フォルダの <tool>.pp2profile.json）
+        """
+        if path is None:
+            import tempfile                     # 既定パスの時だけ（import が重い）
+            path = os.path.join(tempfile.gettempdir(), f"{tool}.pp2profile.json")
+        self.tool   = tool
+        self.path   = path
+        self.calls: Counter = Counter()
+        self.stages: dict[str, dict] = {}
+        self.info: dict = {}
+        self._t0 = time.perf_counter()
+
+    # ------------------------------------------------------------------
+    @contextmanager
+    def attach(self):
+        """この with の間の maya.cmds 呼び出しをコマンド名別に数える"""
+        global _ACTIVE
+        import maya.cmds as cmds
+        with _LOCK:
+            if not _ACTIVE:
+                _install(cmds)
+            _ACTIVE = _ACTIVE + (self.calls,)
+        try:
+            yield self
+        finally:
+            with _LOCK:
+                _ACTIVE = tuple(c for c in _ACTIVE if c is not self.calls)
+                if not _ACTIVE:
+                    _uninstall(cmds)
+
+    @contextmanager
+    def stage(self, name: str):
+        """工程 name の所要時間と cmds 呼び出し数を積算する"""
+        n0 = sum(self.calls.values())
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            rec = self.stages.setdefault(name, {"seconds": 0.0, "cmds": 0})
+            rec["seconds"] += time.perf_counter() - t0
+            rec["cmds"]    += sum(self.calls.values()) - n0
+
+    def note(self, **info) -> None:
+        """Transform 数などの付帯情報を記録する"""
+        self.info.update(info)
+
+    def note_texture(self, name: str, path: str, shape) -> None:
+        """書き出したテクスチャのサイズを記録する"""
+        tex = self.info.setdefault("textures", {})
+        tex[name] = {
+            "path":   path,
+            "width":  int(shape[1]),
+            "height": int(shape[0]),
+            "bytes":  os.path.getsize(path) if os.path.exists(path) else None,
+        }
+
+    # ------------------------------------------------------------------
+    def report(self) -> dict:
+        return {
+            "tool":    self.tool,
+            "seconds": time.perf_counter() - self._t0,
+            "stages":  self.stages,
+            "cmds":    dict(self.calls.most_common()),
+            "cmds_total": sum(self.calls.values()),
+            **self.info,
+        }
+
+    def summary(self) -> str:
+        """inViewMessage 用の 1 行要約"""
+        rep   = self.report()
+        slow  = max(self.stages.items(), key=lambda kv: kv[1]["seconds"],
+                    default=("-", {"seconds": 0.0}))
+        top   = ", ".join(f"{k}×{v}" for k, v in self.calls.most_common(2))
+        return (f"prof {rep['seconds']:.2f}s  slowest {slow[0]} "
+                f"{slow[1]['seconds']:.2f}s  cmds {rep['cmds_total']}"
+                + (f" ({top})" if top else ""))
+
+    def save(self) -> str:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2, ensure_ascii=False)
+        return self.path
+
+
+class _NullProfiler:
+    """プロファイル無効時の代役（何も記録しない）"""
+
+    enabled = False
+
+    def attach(self):
+        return nullcontext(self)
+
+    def stage(self, name: str):
+        return nullcontext()
+
+    def note(self, **info) -> None:
+        pass
+
+    def note_texture(self, name: str, path: str, shape) -> None:
+        pass
+
+
+NULL_PROFILER = _NullProfiler()
+
+
+def make_profiler(profile, tool: str, default_path: str | None = None):
+    """
+    profile 引数を解釈する
+
+    profile : False / None → NULL_PROFILER
+              True         → default_path に保存する PP2Profiler
+              str          → そのパスに保存する PP2Profiler
+    """
+    if not profile:
+        return NULL_PROFILER
+    return PP2Profiler(tool, profile if isinstance(profile, str) else default_path)
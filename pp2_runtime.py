@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+"""
+pp2_runtime.py
+-----------------------------------
+Pivot Painter 2 用：PP2 ランタイムの NumPy 参照実装（Maya 非依存。プレビュー / 計測用）
+
+書き出した PivotPosition / X-Vector を配列に戻し、PP2 シェーダーと同じく
+各要素を「自分のピボットまわりに回し、その結果を親の回転で運ぶ」階層風を
+全要素・複数時刻まとめて評価する。UE に読み込まなくても動きを確かめられる。
+
+    tex  = decode_textures("tree01_pivotpos.exr", "tree01_xvector.png")
+    wind = PP2Wind(direction=(1, 0, 0), strength=1.0)
+    mats = simulate(tex, wind, np.arange(48) / 24.0)    # (T, N, 4, 4)
+    pts  = deform_points(points, owners, mats)          # (T, P, 3) ポイントキャッシュ
+    apply_to_hierarchy(snap, cells, tex, mats[10])      # Maya の Transform へ（プレビュー）
+
+座標はすべて Maya のワールド（Y-up・行ベクトル p' = p @ M）。
+PivotPosition の R / B はルート基準なので、origin にルートのピボットを渡すと
+絶対位置に戻る（省略時はルートを原点とした X / Y）。
+
+    python pp2_runtime.py tree01_pivotpos.exr tree01_xvector.png --frames 240
+        → 要素数 × フレーム / 秒 を表示（CPU での処理量の目安）
+"""
+
+from __future__ import annotations
+import argparse, os, sys, time
+import numpy as np
+
+from pp2_encode import DEPTH_ALPHA, PARENT_OFFSET, PARENT_SCALE
+from pp2_env import require
+
+_UP = np.array([0.0, 1.0, 0.0])
+
+
+# ----------------------------------------------------------------------
+# 読み込み
+# ----------------------------------------------------------------------
+def load_texture(path: str) -> np.ndarray:
+    """EXR / PNG / .npy → (H, W, 4) float32（PNG は 0..1）"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".npy":
+        return np.load(path).astype(np.float32, copy=False)
+    if ext == ".exr":
+        OpenEXR = require("OpenEXR", "EXR 読み込み")
+        Imath   = require("Imath", "EXR 読み込み")
+        exr = OpenEXR.InputFile(path)
+        try:
+            win = exr.header()["dataWindow"]
+            w, h = win.max.x - win.min.x + 1, win.max.y - win.min.y + 1
+            ft = Imath.PixelType(Imath.PixelType.FLOAT)
+            planes = [np.frombuffer(exr.channel(c, ft), np.float32).reshape(h, w)
+                      for c in "RGBA"]
+        finally:
+            exr.close()
+        return np.stack(planes, axis=-1)
+    Image = require("PIL.Image", "PNG 読み込み")
+    with Image.open(path) as img:
+        return np.asarray(img.convert("RGBA"), np.float32) / 255.0
+
+
+def unpack_parent(a) -> np.ndarray:
+    """A チャンネル値 → 親テクセル番号（pack_parent の逆）"""
+    return np.rint(np.asarray(a, np.float64) * PARENT_SCALE - PARENT_OFFSET).astype(np.int64)
+
+
+def depth_from_alpha(alpha) -> np.ndarray:
+    """X-Vector の α → 深度（最も近い DEPTH_ALPHA。3 以上は区別できないので 3）"""
+    table = np.array([DEPTH_ALPHA[d] for d in range(len(DEPTH_ALPHA))])
+    a = np.asarray(alpha, np.float64)
+    return np.abs(a[..., None] - table).argmin(axis=-1).astype(np.int64)
+
+
+class PP2Decoded:
+    """
+    デコード済みの要素（テクセル順。空きセルは含まない）
+
+    Attributes
+    ----------
+    shape   : (nR, nC)
+    cells   : (N,) テクセル番号
+    pivots  : (N, 3) ワールドのピボット
+    parents : (N,) 親の要素番号（ルートは -1）
+    depths  : (N,) 親をたどった深度
+    alpha_depths : (N,) X-Vector の α から読んだ深度（3 で頭打ち）
+    xaxis   : (N, 3) 単位化した +X 軸（長さ 0 の軸は 0）
+    """
+
+    def __init__(self, shape, cells, pivots, parents, xaxis, alpha_depths) -> None:
+        self.shape   = tuple(shape)
+        self.cells   = cells   = np.asarray(cells, np.int64)
+        self.pivots  = pivots
+        self.parents = parents = np.asarray(parents, np.int64)
+        self.xaxis   = xaxis
+        self.alpha_depths = alpha_depths
+
+        # 全要素を 1 段ずつ上へ。深度は要素数未満なので、それだけ上っても
+        # 祖先が残る要素は親が循環している（壊れた / 手で作ったテクスチャ）
+        depths = np.zeros(len(cells), np.int64)
+        anc = parents.copy()
+        for _ in range(len(cells)):
+            if not (anc >= 0).any():
+                break
+            depths += anc >= 0
+            anc = np.where(anc >= 0, parents[np.maximum(anc, 0)], -1)
+        if (anc >= 0).any():
+            bad = cells[anc >= 0]
+            raise ValueError(f"親が循環しています: セル {bad.tolist()}")
+        self.depths = depths
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def levels(self) -> list[np.ndarray]:
+        """深度ごとの要素番号（親から順に評価する時に使う）"""
+        return [np.flatnonzero(self.depths == d) for d in range(int(self.depths.max()) + 1)]
+
+
+def decode_textures(pivotpos, xvector, origin=None) -> PP2Decoded:
+    """
+    PivotPosition / X-Vector（パス、または (H, W, 4) 配列）を要素の配列に戻す
+
+    PivotPosition の A が 0 のセル（親インデックスが負になる）は空きとして捨てる。
+    ルート（α が深度 0）の親は -1 にする。
+
+    origin : ルートのワールドピボット (x, y, z)。R / B に x / y を足す（z は G が絶対値）
+    """
+    piv = load_texture(pivotpos) if isinstance(pivotpos, str) else np.asarray(pivotpos)
+    xv  = load_texture(xvector) if isinstance(xvector, str) else np.asarray(xvector)
+    if piv.shape[:2] != xv.shape[:2]:
+        raise ValueError(f"テクスチャの大きさが違います: {piv.shape[:2]} / {xv.shape[:2]}")
+    shape = piv.shape[:2]
+
+    flat  = piv.reshape(-1, 4).astype(np.float64)
+    ptex  = unpack_parent(flat[:, 3])
+    cells = np.flatnonzero(ptex >= 0)
+    ox, oy = (0.0, 0.0) if origin is None else (origin[0], origin[1])
+    pivots = np.stack([flat[cells, 0] + ox, flat[cells, 2] + oy, flat[cells, 1]], 1)
+
+    x = xv.reshape(-1, 4)[cells].astype(np.float64)
+    xaxis = np.stack([x[:, 0], x[:, 2], x[:, 1]], 1) * 2.0 - 1.0
+    nrm   = np.linalg.norm(xaxis, axis=1, keepdims=True)
+    xaxis = np.divide(xaxis, nrm, out=np.zeros_like(xaxis), where=nrm > 0.5)
+    alpha_depths = depth_from_alpha(x[:, 3])
+
+    lookup = np.full(shape[0] * shape[1], -1, np.int64)
+    lookup[cells] = np.arange(len(cells))
+    pcell   = ptex[cells]
+    ok      = (pcell < len(lookup)) & (alpha_depths > 0)
+    parents = np.where(ok, lookup[np.where(ok, pcell, 0)], -1)
+    return PP2Decoded(shape, cells, pivots, parents, xaxis, alpha_depths)
+
+
+# ----------------------------------------------------------------------
+# 風
+# ----------------------------------------------------------------------
+class PP2Wind:
+    """
+    階層ごとの揺れのパラメーター（深度 0 = 幹, 1 = 枝, 2 以上 = 葉）
+
+    各要素の角度  θ = strength · amplitude[d] · (1 + sin(2π · frequency[d] · t − k·p + φ)) / 2
+    回転軸は +X 軸 × 風向き（+X を風下へ倒す向き）。k·p は風向きに進む波、
+    φ は要素ごとに決まる位相のばらつき。
+    """
+
+    def __init__(
+        self,
+        direction=(1.0, 0.0, 0.0),
+        strength: float = 1.0,
+        amplitude=(0.02, 0.08, 0.25),
+        frequency=(0.3, 0.8, 2.0),
+        wavelength: float = 20.0,
+        seed: int = 0,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        direction  : 風向き（ワールド。正規化する）
+        amplitude  : 深度ごとの最大角度 [rad]（足りない深度は最後の値）
+        frequency  : 深度ごとの振動数 [Hz]
+        wavelength : 風向きに進む波の波長（シーン単位）
+        seed       : 位相のばらつきの乱数シード
+        """
+        d = np.asarray(direction, np.float64)
+        self.direction  = d / np.linalg.norm(d)
+        self.strength   = float(strength)
+        self.amplitude  = np.asarray(amplitude, np.float64)
+        self.frequency  = np.asarray(frequency, np.float64)
+        self.wavelength = float(wavelength)
+        self.seed       = seed
+
+    def _per_depth(self, table, depths) -> np.ndarray:
+        return table[np.minimum(depths, len(table) - 1)]
+
+    def axes(self, dec: PP2Decoded) -> np.ndarray:
+        """(N, 3) 回転軸（+X が風と平行なら上 × 風、それも 0 なら回さない）"""
+        ax = np.cross(dec.xaxis, self.direction)
+        n  = np.linalg.norm(ax, axis=1, keepdims=True)
+        fb = np.cross(_UP, self.direction)
+        ax = np.where(n > 1e-6, ax, fb)
+        n  = np.linalg.norm(ax, axis=1, keepdims=True)
+        return np.divide(ax, n, out=np.zeros_like(ax), where=n > 1e-6)
+
+    def angles(self, dec: PP2Decoded, times) -> np.ndarray:
+        """(T, N) 各時刻・各要素の角度 [rad]"""
+        t   = np.asarray(times, np.float64).reshape(-1, 1)
+        amp = self.strength * self._per_depth(self.amplitude, dec.depths)
+        frq = self._per_depth(self.frequency, dec.depths)
+        phi = np.random.default_rng(self.seed).uniform(0.0, 2 * np.pi, len(dec))
+        k   = dec.pivots @ self.direction * (2 * np.pi / self.wavelength)
+        return amp * 0.5 * (1.0 + np.sin(2 * np.pi * frq * t - k + phi))
+
+
+def rotations_about(axes, angles, pivots) -> np.ndarray:
+    """
+    ピボットまわりの回転 (…, N, 4, 4)（行ベクトル形式 p' = p @ M）
+
+    axes : (N, 3) 単位軸、angles : (…, N)、pivots : (N, 3)
+    """
+    c, s = np.cos(angles)[..., None, None], np.sin(angles)[..., None, None]
+    kx, ky, kz = axes[:, 0], axes[:, 1], axes[:, 2]
+    z = np.zeros_like(kx)
+    skew = np.stack([np.stack([z, kz, -ky], -1),           # 行ベクトル形式の [k]× の転置
+                     np.stack([-kz, z, kx], -1),
+                     np.stack([ky, -kx, z], -1)], -2)
+    kk = axes[:, :, None] * axes[:, None, :]
+    r  = c * np.eye(3) + s * skew + (1.0 - c) * kk          # (…, N, 3, 3)
+
+    m = np.zeros(r.shape[:-2] + (4, 4))
+    m[..., :3, :3] = r
+    m[..., 3, :3]  = pivots - np.einsum("ni,...nij->...nj", pivots, r)
+    m[..., 3, 3]   = 1.0
+    return m
+
+
+def simulate(dec: PP2Decoded, wind: PP2Wind, times) -> np.ndarray:
+    """
+    各時刻の要素ごとの変形 (T, N, 4, 4)（静止状態のワールド → 揺れたワールド）
+
+    深度の浅い順に M_i = R_i @ M_parent を一括で求める（自分の回転の後に親の回転）。
+    """
+    local = rotations_about(wind.axes(dec), wind.angles(dec, times), dec.pivots)
+    out = local.copy()
+    for idx in dec.levels()[1:]:
+        out[:, idx] = local[:, idx] @ out[:, dec.parents[idx]]
+    return out
+
+
+def deform_points(points, owners, mats) -> np.ndarray:
+    """
+    頂点を揺らす（ポイントキャッシュ用）
+
+    points : (P, 3) 静止状態のワールド頂点
+    owners : (P,) 各頂点を持つ要素番号
+    mats   : simulate の戻り値 (T, N, 4, 4) か 1 時刻分 (N, 4, 4)
+    """
+    p = np.asarray(points, np.float64)
+    m = np.asarray(mats)[..., np.asarray(owners, np.int64), :, :]
+    return np.einsum("pi,...pij->...pj", p, m[..., :3, :3]) + m[..., 3, :3]
+
+
+# ----------------------------------------------------------------------
+# Maya へ（プレビュー）
+# ----------------------------------------------------------------------
+def element_order(dec: PP2Decoded, cells) -> np.ndarray:
+    """スナップショットの列挙順 → 要素番号（cells は layout_cells などのテクセル番号）"""
+    lookup = np.full(dec.shape[0] * dec.shape[1], -1, np.int64)
+    lookup[dec.cells] = np.arange(len(dec))
+    found = lookup[np.asarray(cells, np.int64)]
+    if (found < 0).any():
+        raise ValueError("テクスチャに無いセルを指すノードがあります")
+    return found
+
+
+def apply_to_hierarchy(snap, cells, dec: PP2Decoded, mats) -> None:
+    """
+    1 時刻分の変形 mats (N, 4, 4) を snap の Transform に書き込む（親から順に ws 行列）
+
+    snap  : pp2_hierarchy.PP2Snapshot（静止状態）
+    cells : snap の各 Transform のテクセル番号
+    元に戻すには静止状態の snap.matrices を同じように書き戻す。
+    """
+    import maya.cmds as cmds
+
+    m = np.asarray(mats)[element_order(dec, cells)]
+    world = np.einsum("nij,njk->nik", snap.matrices.reshape(-1, 4, 4), m)
+    for path, w in zip(snap.paths, world.reshape(-1, 16).tolist()):
+        cmds.xform(path, ws=True, m=w)
+
+
+# ----------------------------------------------------------------------
+# 計測
+# ----------------------------------------------------------------------
+def throughput(dec: PP2Decoded, wind: PP2Wind, frames: int = 240,
+               fps: float = 24.0, chunk: int = 64) -> dict:
+    """simulate を chunk フレームずつ回し、要素数 × フレーム / 秒 を測る"""
+    times = np.arange(frames) / fps
+    t0 = time.perf_counter()
+    for k in range(0, frames, chunk):
+        simulate(dec, wind, times[k:k + chunk])
+    dt = time.perf_counter() - t0
+    return {"elements": len(dec), "frames": frames, "seconds": round(dt, 4),
+            "element_frames_per_sec": round(len(dec) * frames / max(dt, 1e-9))}
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="PP2 runtime reference: decode + wind throughput")
+    ap.add_argument("pivotpos", help="PivotPosition (.exr / .npy)")
+    ap.add_argument("xvector", help="X-Vector (.png / .npy)")
+    ap.add_argument("--frames", type=int, default=240)
+    ap.add_argument("--fps", type=float, default=24.0)
+    ap.add_argument("--chunk", type=int, default=64, help="1 回の simulate で評価するフレーム数")
+    ap.add_argument("--strength", type=float, default=1.0)
+    args = ap.parse_args(argv)
+
+    dec = decode_textures(args.pivotpos, args.xvector)
+    res = throughput(dec, PP2Wind(strength=args.strength), args.frames, args.fps, args.chunk)
+    print(f"[PP2] {res['elements']} elements x {res['frames']} frames: "
+          f"{res['seconds']:.3f}s  ({res['element_frames_per_sec']:,} element-frames/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
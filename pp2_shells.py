@@ -0,0 +1,536 @@
+# -*- coding: utf-8 -*-
+"""
+pp2_shells.py
+-----------------------------------
+Pivot Painter 2 用：結合済みの植生 mesh 1 つから PP2 階層を自動で組む
+
+幹・枝・葉が 1 つの mesh に結合されたアセットを、つながった頂点の塊（シェル）に
+分け、シェルごとのピボット / +X 方向 / 親を NumPy の一括演算で決める。
+既定では Maya ノードを作らず、PP2Snapshot とレイアウトだけを組み立てて
+結合 mesh の pp2_uv と PivotPosition / X-Vector テクスチャを直接書き出す。
+
+    シェル分け : フェース頂点の連結を union-find（hook + pointer jumping の配列版）
+    幹         : 最長主軸が一番長いシェル。ピボットは主軸の下 (−Y) 側の端
+    枝         : 主軸の長さが幹の branch_ratio 倍以上のシェル。幹に近い端がピボット
+    葉         : 残り。主軸の両端のうち枝 / 幹の頂点に近い方がピボット、
+                 最も近い頂点を持つシェルが親
+    +X         : 最長主軸（ピボットから重心側へ。pp2_analysis.x_directions "principal"）
+
+最近傍は scipy があれば cKDTree、無ければ行ブロックごとの総当たり。
+
+使い方
+    PP2ShellExtractor("foliage_combined").execute()
+    PP2ShellExtractor("foliage_combined").export("D:/PP2_out", "tree01")
+    PP2ShellExtractor("foliage_combined", create_nodes=True).execute()   # ノードを作る
+
+    mayapy pp2_batch.py tree01.ma --adapter shells --roots foliage_combined --out D:/PP2_out
+"""
+
+from __future__ import annotations
+import numpy as np
+
+from pp2_analysis import MeshStats, segment_starts, x_directions
+from pp2_batch import MayaSceneAdapter
+from pp2_hierarchy import PP2Snapshot
+from pp2_layout import PP2Layout
+from pp2_writers import write_textures
+
+BRANCH_RATIO = 0.25         # 幹の長さに対してこれ以上長いシェルを枝とみなす
+NEAREST_BLOCK = 1 << 22     # 総当たり最近傍で 1 度に持つ距離の要素数
+
+
+# ----------------------------------------------------------------------
+# シェル分け
+# ----------------------------------------------------------------------
+def shell_labels(counts, ids, n_verts: int | None = None) -> tuple[np.ndarray, int]:
+    """
+    フェース頂点の連結からシェル番号を求める
+
+    Parameters
+    ----------
+    counts  : (F,) フェースごとの頂点数（MFnMesh.getVertices の 1 つ目）
+    ids     : (sum(counts),) フェース頂点の頂点番号（〃 2 つ目）
+    n_verts : 頂点数（None なら ids の最大 + 1）
+
+    Returns
+    -------
+    labels : (V,) 頂点ごとのシェル番号（どのフェースにも使われない頂点は −1）
+    n      : シェル数（番号は最小頂点番号の昇順）
+    """
+    counts = np.asarray(counts, np.int64)
+    ids    = np.asarray(ids, np.int64)
+    n_verts = int(ids.max()) + 1 if n_verts is None and len(ids) else int(n_verts or 0)
+
+    # 各フェース頂点をそのフェースの先頭頂点とつなぐ辺にする
+    first = np.repeat(ids[segment_starts(counts)], counts) if len(counts) else ids
+    a, b  = first, ids
+
+    parent = np.arange(n_verts, dtype=np.int64)
+    while True:
+        pa, pb = parent[a], parent[b]
+        diff   = pa != pb
+        if not diff.any():
+            break
+        # 根どうしを小さい番号の方へつなぐ（番号が必ず減るので循環しない）
+        np.minimum.at(parent, np.maximum(pa[diff], pb[diff]),
+                      np.minimum(pa[diff], pb[diff]))
+        while True:                                     # pointer jumping
+            nxt = parent[parent]
+            if np.array_equal(nxt, parent):
+                break
+            parent = nxt
+
+    used   = np.zeros(n_verts, bool)
+    used[ids] = True
+    labels = np.full(n_verts, -1, np.int64)
+    roots, labels[used] = np.unique(parent[used], return_inverse=True)
+    return labels, len(roots)
+
+
+def nearest(points, queries) -> tuple[np.ndarray, np.ndarray]:
+    """
+    queries (Q, 3) それぞれに最も近い points (P, 3) の (距離, 番号)
+
+    scipy があれば cKDTree、無ければ NEAREST_BLOCK 要素ずつの総当たり。
+    """
+    points  = np.asarray(points, np.float64).reshape(-1, 3)
+    queries = np.asarray(queries, np.float64).reshape(-1, 3)
+    try:
+        from scipy.spatial import cKDTree           # type: ignore
+    except ImportError:
+        cKDTree = None
+    if cKDTree is not None:
+        return cKDTree(points).query(queries)
+
+    # |p|² − 2 q·p を float32 の行列積で（|q|² は順位に効かない）。重心基準で桁落ちを抑える
+    o    = points.mean(axis=0) if len(points) else np.zeros(3)
+    pf   = (points - o).astype(np.float32)
+    p2   = np.einsum("ij,ij->i", pf, pf)
+    idx  = np.empty(len(queries), np.int64)
+    step = max(1, NEAREST_BLOCK // max(len(points), 1))
+    for s in range(0, len(queries), step):
+        d2 = (queries[s:s + step] - o).astype(np.float32) @ pf.T
+        d2 *= -2.0
+        d2 += p2
+        idx[s:s + step] = np.argmin(d2, axis=1)
+    return np.linalg.norm(points[idx] - queries, axis=1), idx
+
+
+def _frames(xdirs, pivots) -> np.ndarray:
+    """+X 方向とピボット → (N, 16) ワールド行列（行ベクトル形式。Y は上向きに近づける）"""
+    x   = np.asarray(xdirs, np.float64)
+    nrm = np.linalg.norm(x, axis=1, keepdims=True)
+    x   = np.where(nrm > 0.0, x / np.where(nrm > 0.0, nrm, 1.0), (1.0, 0.0, 0.0))
+
+    up  = np.tile((0.0, 1.0, 0.0), (len(x), 1))
+    up[np.abs(x[:, 1]) > 0.999] = (0.0, 0.0, 1.0)
+    y   = up - x * np.einsum("ij,ij->i", up, x)[:, None]
+    y  /= np.linalg.norm(y, axis=1, keepdims=True)
+
+    m = np.zeros((len(x), 4, 4))
+    m[:, 0, :3], m[:, 1, :3], m[:, 2, :3] = x, y, np.cross(x, y)
+    m[:, 3, :3] = pivots
+    m[:, 3, 3]  = 1.0
+    return m.reshape(-1, 16)
+
+
+# ----------------------------------------------------------------------
+class PP2ShellForest:
+    """
+    結合 mesh のシェル分けと、シェルを 幹 → 枝 → 葉 に並べた階層（Maya 非依存）
+
+    Attributes
+    ----------
+    labels   : (V,) 頂点ごとのシェル番号（未使用頂点は −1）
+    stats    : シェルごとの pp2_analysis.MeshStats
+    lengths  : (S,) 最長主軸方向の長さ
+    parents  : (S,) 親シェル番号（幹は −1）
+    depths   : (S,) 0 = 幹 / 1 = 枝・幹直下の葉 / 2 = 枝の葉
+    pivots   : (S, 3) ピボット（ワールド）
+    xdirs    : (S, 3) +X 方向
+    order    : (S,) 列挙順（深さ優先）→ シェル番号
+    rank     : (S,) シェル番号 → 列挙順
+    kinds    : (S,) TRUNK / BRANCH / LEAF
+    snapshot : PP2Snapshot（order の順。ノード名は <name> / branch_<k> / leaf_<k>）
+    """
+
+    TRUNK, BRANCH, LEAF = 0, 1, 2
+
+    def __init__(
+        self,
+        points,
+        counts,
+        ids,
+        branch_ratio: float = BRANCH_RATIO,
+        name: str = "shells",
+    ) -> None:
+        """
+        Parameters
+        ----------
+        points : (V, 3) ワールド頂点
+        counts, ids : フェース頂点の連結（MFnMesh.getVertices）
+        branch_ratio : 幹の長さに対して、これ以上長いシェルを枝とする
+        name   : ルート（幹）のノード名
+        """
+        points = np.asarray(points, np.float64).reshape(-1, 3)
+        self.counts = np.asarray(counts, np.int64)
+        self.ids    = np.asarray(ids, np.int64)
+        self.labels, n = shell_labels(self.counts, self.ids, len(points))
+        if n == 0:
+            raise ValueError("フェースがありません")
+
+        # シェル順に頂点を並べ替えて一括統計
+        used = np.flatnonzero(self.labels >= 0)
+        self.vertex_order = used[np.argsort(self.labels[used], kind="stable")]
+        self.stats = stats = MeshStats(points[self.vertex_order],
+                                       np.bincount(self.labels[used], minlength=n))
+        c, axis = stats.centroids, stats.axes[:, 0]
+        lo, hi  = stats.project_range(axis, c)
+        self.lengths = hi - lo
+        ends = np.stack([c + axis * lo[:, None], c + axis * hi[:, None]], 1)
+
+        # 幹 / 枝 / 葉
+        trunk  = int(np.argmax(self.lengths))
+        branch = self.lengths >= branch_ratio * self.lengths[trunk]
+        branch[trunk] = False
+        leaf   = ~branch
+        leaf[trunk] = False
+        self.kinds = np.where(branch, self.BRANCH, self.LEAF)
+        self.kinds[trunk] = self.TRUNK
+
+        self.parents = np.full(n, -1, np.int64)
+        self.pivots  = np.empty((n, 3))
+        self.pivots[trunk] = ends[trunk, np.argmin(ends[trunk, :, 1])]
+
+        owner = np.repeat(np.arange(n), stats.counts)   # 並べ替え後の頂点 → シェル
+        self._attach(np.flatnonzero(branch), ends, owner == trunk, owner)
+        self._attach(np.flatnonzero(leaf), ends, ~leaf[owner], owner)
+
+        self.depths = np.zeros(n, np.int64)
+        self.depths[self.parents >= 0] = 1
+        self.depths[(self.parents >= 0) & branch[np.maximum(self.parents, 0)]] = 2
+        self.xdirs = x_directions(stats, "principal", self.pivots)
+
+        self._enumerate(name, trunk)
+
+    # ------------------------------------------------------------------
+    def _attach(self, shells, ends, target, owner) -> None:
+        """
+        shells の主軸両端を target 頂点と照合し、近い方の端をピボット、
+        最も近い頂点を持つシェルを親にする
+        """
+        if not len(shells):
+            return
+        tid     = np.flatnonzero(target)
+        d, k    = nearest(self.stats.points[tid], ends[shells].reshape(-1, 3))
+        d, k    = d.reshape(-1, 2), k.reshape(-1, 2)
+        end     = np.argmin(d, axis=1)
+        rows    = np.arange(len(shells))
+        self.pivots[shells]  = ends[shells, end]
+        self.parents[shells] = owner[tid[k[rows, end]]]
+
+    def _enumerate(self, name: str, trunk: int) -> None:
+        """深さ優先（子はシェル番号順）に並べ、PP2Snapshot を組む"""
+        n    = len(self.parents)
+        own  = np.arange(n)
+        top  = np.where(self.depths == 1, own,
+                        np.where(self.depths == 2, self.parents, -1))
+        sub  = np.where(self.depths == 2, own, -1)
+        self.order = np.lexsort((sub, top))
+        self.rank  = np.empty(n, np.int64)
+        self.rank[self.order] = own
+
+        paths = [""] * n
+        for s in self.order.tolist():
+            if s == trunk:
+                paths[s] = "|" + name
+            else:
+                kind = "branch" if self.kinds[s] == self.BRANCH else "leaf"
+                paths[s] = f"{paths[self.parents[s]]}|{kind}_{s}"
+
+        self.snapshot = PP2Snapshot.from_paths(
+            [paths[s] for s in self.order.tolist()],
+            _frames(self.xdirs, self.pivots)[self.order],
+            self.pivots[self.order])
+
+    # ------------------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self.parents)
+
+    def face_vertex_nodes(self) -> np.ndarray:
+        """フェース頂点ごとの列挙番号（= PP2Layout のセル。pp2_uv の UV 番号に使う）"""
+        return self.rank[self.labels[self.ids]]
+
+    def layout(self, mincol: int = 5, uvset: str = "pp2_uv",
+               ordering: str = "dfs") -> PP2Layout:
+        """PP2UVAutoSquare と同じ格子を ordering の並べ方で割り当てる"""
+        return PP2Layout.for_paths(self.snapshot.paths, mincol, uvset, ordering)
+
+    def shell_meshes(self):
+        """
+        シェルごとの (頂点番号, counts, シェル内の頂点番号で表した ids) を列挙順に返す
+        （create_nodes 用）
+        """
+        starts = segment_starts(self.counts)
+        face_shell = self.labels[self.ids[starts]]
+        forder = np.argsort(self.rank[face_shell], kind="stable")
+        f_n    = np.bincount(face_shell, minlength=len(self))[self.order]
+
+        local = np.empty(len(self.labels), np.int64)
+        vs    = segment_starts(self.stats.counts)
+        local[self.vertex_order] = (np.arange(len(self.vertex_order))
+                                    - np.repeat(vs, self.stats.counts))
+
+        fv_start = np.repeat(starts[forder], self.counts[forder])
+        fv_off   = np.arange(self.counts[forder].sum()) - np.repeat(
+            segment_starts(self.counts[forder]), self.counts[forder])
+        fv_ids   = local[self.ids[fv_start + fv_off]]
+
+        f0 = fv0 = 0
+        for s, nf in zip(self.order.tolist(), f_n.tolist()):
+            cnt = self.counts[forder[f0:f0 + nf]]
+            nfv = int(cnt.sum())
+            verts = self.vertex_order[vs[s]:vs[s] + self.stats.counts[s]]
+            yield verts, cnt, fv_ids[fv0:fv0 + nfv]
+            f0, fv0 = f0 + nf, fv0 + nfv
+
+
+# ----------------------------------------------------------------------
+# Maya 側（maya は使う時にだけ import する）
+# ----------------------------------------------------------------------
+def read_mesh(mesh: str):
+    """結合 mesh → (mesh の MDagPath, ワールド頂点 (V, 3), counts, ids)"""
+    import maya.api.OpenMaya as om2
+
+    sl = om2.MSelectionList()
+    sl.add(mesh)
+    path = sl.getDagPath(0)
+    if not path.hasFn(om2.MFn.kMesh):
+        path.extendToShape()
+    fn = om2.MFnMesh(path)
+    pts = np.array(fn.getPoints(om2.MSpace.kWorld), np.float64).reshape(-1, 4)[:, :3]
+    counts, ids = fn.getVertices()
+    return path, pts, np.asarray(counts, np.int64), np.asarray(ids, np.int64)
+
+
+def write_shell_uvs(path, forest: PP2ShellForest, layout: PP2Layout) -> None:
+    """
+    結合 mesh の layout.uvset を「シェル → セル中心の UV 1 点」に書き換える
+
+    UV は列挙順に 1 つずつ作り、フェース頂点にシェルの列挙番号を割り当てる
+    （setUVs / assignUVs 各 1 回）。書き込む前の UV セットを退避して
+    pp2Undoable コマンド 1 回として登録するので、Ctrl+Z で元の UV に戻る。
+    """
+    import functools
+    import maya.api.OpenMaya as om2
+    from pp2_undo import EditLog, commit, set_uv_state, uv_state
+
+    us, vs = layout.cell_centers()
+    uv_ids = forest.face_vertex_nodes()             # UV 番号 = 列挙順
+    fn  = om2.MFnMesh(path)
+    new = (us.tolist(), vs.tolist(), om2.MIntArray(forest.counts.tolist()),
+           om2.MIntArray(uv_ids.tolist()))
+    log = EditLog()
+    commit(lambda: log.set(functools.partial(set_uv_state, fn, layout.uvset),
+                           uv_state(fn, layout.uvset), new),
+           log.undo, log.redo)
+
+
+# ----------------------------------------------------------------------
+class PP2ShellExtractor:
+    """結合 mesh 1 つ → PP2 階層・pp2_uv・テクスチャ（既定ではノードを作らない）"""
+
+    UVSET  = "pp2_uv"
+    MINCOL = 5
+
+    def __init__(
+        self,
+        mesh: str | None = None,
+        uvset: str | None = None,
+        mincol: int | None = None,
+        branch_ratio: float = BRANCH_RATIO,
+        name: str | None = None,
+        create_nodes: bool = False,
+        ordering: str = "dfs",
+    ) -> None:
+        """
+        Parameters
+        ----------
+        mesh         : 結合 mesh（Transform / シェイプ名。None なら現在の選択）
+        uvset        : 書き込む UV セット名
+        mincol       : 最小列数（PP2UVAutoSquare と同じ）
+        branch_ratio : 幹の長さに対して、これ以上長いシェルを枝とする
+        name         : ルート（幹）の名前（None なら <mesh>_pp2）
+        create_nodes : True ならシェルごとに Transform + mesh を作って階層を組み、
+                       PP2UVAutoSquare のレイアウトを書き込む（PP2Exporter でそのまま出力可）
+        ordering     : セルの並べ方（pp2_layout.ORDERINGS）
+        """
+        import maya.cmds as cmds
+
+        if mesh is None:
+            sel = cmds.ls(sl=True, l=True)
+            if not sel:
+                cmds.error("結合 mesh を 1 つ選択してください")
+            mesh = sel[0]
+        self.mesh   = mesh
+        self.UVSET  = uvset  or self.UVSET
+        self.MINCOL = mincol or self.MINCOL
+        self.branch_ratio = branch_ratio
+        self.name   = name or mesh.rpartition("|")[2] + "_pp2"
+        self.create_nodes = create_nodes
+        self.ordering = ordering
+        self.forest: PP2ShellForest | None = None
+        self.layout: PP2Layout | None = None
+        self.root: str | None = None            # create_nodes 時に作ったルート
+
+    # ------------------------------------------------------------------
+    def execute(self) -> PP2ShellForest:
+        """シェル分け → 階層 → pp2_uv（create_nodes なら Maya 階層も）"""
+        import maya.cmds as cmds
+
+        path, pts, counts, ids = read_mesh(self.mesh)
+        self.forest = forest = PP2ShellForest(pts, counts, ids,
+                                              self.branch_ratio, self.name)
+        if self.create_nodes:
+            self.root = self._create_nodes(forest)
+        else:
+            self.layout = forest.layout(self.MINCOL, self.UVSET, self.ordering)
+            write_shell_uvs(path, forest, self.layout)
+
+        n_branch = int((forest.kinds == forest.BRANCH).sum())
+        msg = (f"[PP2] shells={len(forest)} (branch {n_branch}) "
+               f"grid={self.layout.rows}x{self.layout.cols}  "
+               f"RowHeight={self.layout.row_height:.5f}"
+               + (f" → {self.root}" if self.root else ""))
+        cmds.inViewMessage(amg=msg, pos="midCenter", fade=True)
+        print(msg)
+        return forest
+
+    def export(
+        self,
+        out_dir: str,
+        base_name: str = "pp2",
+        outputs=("pivotpos", "xvector"),
+        cache: bool = False,
+        exr_options: dict | None = None,
+        formats: dict | None = None,
+    ) -> dict:
+        """
+        PivotPosition / X-Vector を書き出す（未実行なら execute してから）
+
+        ノードを作らない場合もスナップショットから直接 write_textures に渡す。
+        formats : {出力名: 形式}（pp2_writers.WRITERS のキー）
+        """
+        if self.forest is None:
+            self.execute()
+        if self.create_nodes:
+            from pp2_exporter import PP2Exporter
+            opts = exr_options or {}
+            return PP2Exporter(self.root, out_dir, base_name, outputs, cache,
+                               opts.get("compression", "zip"),
+                               opts.get("half_rgb", False), formats=formats).export()
+        res = write_textures(self.forest.snapshot, self.layout.cells,
+                             self.layout.shape, out_dir, base_name, outputs,
+                             cache=cache, exr_options=exr_options, formats=formats)
+        return res["outputs"]
+
+    # ------------------------------------------------------------------
+    def _create_nodes(self, forest: PP2ShellForest) -> str:
+        """
+        列挙順に Transform（ワールド行列 = ピボット + 向き）と mesh を作り、
+        PP2UVAutoSquare(batch=True) でレイアウトを書き込む。ルートのフルパスを返す
+
+        ノード作成・行列・mesh は pp2Undoable コマンド 1 回、レイアウトの書き込みと
+        合わせて undoInfo のチャンク 1 つにまとめるので、Ctrl+Z 1 回で全部消える。
+        """
+        import maya.api.OpenMaya as om2
+        import maya.cmds as cmds
+        from pp2_snapshot import take_snapshot
+        from pp2_undo import EditLog, commit
+        from set_pp2UV import PP2UVAutoSquare
+
+        snap   = forest.snapshot
+        world  = snap.matrices.reshape(-1, 4, 4)
+        pts    = forest.stats.points                          # シェル順
+        starts = segment_starts(forest.stats.counts)
+
+        parent_w = np.where(snap.parents[:, None, None] >= 0,
+                            world[np.maximum(snap.parents, 0)], np.eye(4))
+        local = world @ np.linalg.inv(parent_w)
+        xforms, meshes = [], []
+        for i, (s, (verts, cnt, fv)) in enumerate(
+                zip(forest.order.tolist(), forest.shell_meshes())):
+            xforms.append(om2.MTransformationMatrix(om2.MMatrix(local[i].ravel().tolist())))
+            # ワールド頂点 → オブジェクト空間（行列は正規直交 + 平行移動）
+            w  = pts[starts[s]:starts[s] + forest.stats.counts[s]]
+            ob = (w - world[i, 3, :3]) @ world[i, :3, :3].T
+            meshes.append(([om2.MPoint(*q) for q in ob.tolist()], cnt.tolist(), fv.tolist()))
+
+        log, objs, shapes, dropped = EditLog(), [], [], []
+
+        def place() -> None:
+            for obj, m in zip(objs, xforms):
+                om2.MFnTransform(obj).setTransformation(m)
+
+        def make_meshes() -> None:
+            # やり直しでは消した mesh をそのまま戻す（UV の書き込みが同じノードを指すため）
+            if dropped:
+                dropped.pop().undoIt()
+                return
+            shapes[:] = [om2.MFnMesh().create(p, c, f, parent=obj)
+                         for obj, (p, c, f) in zip(objs, meshes)]
+
+        def drop_meshes() -> None:
+            rm = om2.MDagModifier()
+            for shape in shapes:
+                rm.deleteNode(shape)
+            rm.doIt()
+            dropped.append(rm)
+
+        def apply() -> None:
+            mod = om2.MDagModifier()
+            for i, p in enumerate(snap.paths):
+                par = objs[snap.parents[i]] if snap.parents[i] >= 0 else om2.MObject.kNullObj
+                obj = mod.createNode("transform", par)
+                mod.renameNode(obj, p.rpartition("|")[2])
+                objs.append(obj)
+            log.call(mod.doIt, mod.undoIt)
+            log.call(place, lambda: None)           # 作ったノードは undo で消えるので戻す値は無い
+            log.call(make_meshes, drop_meshes)
+
+        cmds.undoInfo(openChunk=True, chunkName="PP2ShellExtractor")
+        try:
+            commit(apply, log.undo, log.redo)
+            root = om2.MDagPath.getAPathTo(objs[0]).fullPathName()
+            real = take_snapshot(root, uvset=None)
+            self.layout = PP2Layout.for_paths(real.paths, self.MINCOL, self.UVSET,
+                                              self.ordering)
+            tool = PP2UVAutoSquare(root, uvset=self.UVSET, mincol=self.MINCOL, batch=True)
+            tool.write_layout(real.meshes, self.layout)
+        finally:
+            cmds.undoInfo(closeChunk=True)
+        return root
+
+
+class MayaShellAdapter(MayaSceneAdapter):
+    """
+    pp2_batch 用：roots に結合 mesh 名を受け取り、ノードを作らずに
+    シェル階層のスナップショット / pp2_uv を扱う（--adapter shells）
+    """
+
+    BRANCH_RATIO = BRANCH_RATIO
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._shells: dict[str, tuple] = {}        # root → (MDagPath, forest)
+
+    def snapshot(self, root: str) -> PP2Snapshot:
+        path, pts, counts, ids = read_mesh(root)
+        forest = PP2ShellForest(pts, counts, ids, self.BRANCH_RATIO,
+                                root.rpartition("|")[2] + "_pp2")
+        self._shells[root] = (path, forest)
+        return forest.snapshot
+
+    def write_layout(self, root: str, snap: PP2Snapshot, layout: PP2Layout) -> None:
+        path, forest = self._shells[root]
+        write_shell_uvs(path, forest, layout)
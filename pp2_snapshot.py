@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+"""
+pp2_snapshot.py
+-----------------------------------
+Pivot Painter 2 用：OpenMaya 2 による階層スナップショット
+
+root 以下の Transform 階層を MItDag で 1 パス走査し、
+エクスポーター / UV ツールが必要とする値を配列にまとめて返す。
+Transform ごとの cmds 呼び出し（listRelatives / xform / polyEditUV）を置き換える。
+FrameSampler はスナップショットのノード群を任意フレームで評価し直す（フリップブック用）。
+
+インスタンスされた部分木（同じ葉クラスタを何百回も使う木など）は、最初の 1 組だけ
+読んで、2 組目以降はその相対行列をインスタンスのワールド行列で写して使い回す
+（MObjectHandle で同一ノードを判定。結果は snap.memo の hits / misses）。
+"""
+
+from __future__ import annotations
+import numpy as np
+import maya.api.OpenMaya as om2
+
+from pp2_hierarchy import PP2Snapshot
+from pp2_layout import PP2Layout
+
+VERIFY_UVS = 16     # layout_cells が記録と突き合わせる pp2_uv の数
+
+
+# ----------------------------------------------------------------------
+def _dag_path(name: str) -> om2.MDagPath:
+    sl = om2.MSelectionList()
+    sl.add(name)
+    return sl.getDagPath(0)
+
+
+def _mesh_shapes(path: om2.MDagPath) -> list[om2.MDagPath]:
+    """Transform 直下の非 intermediate mesh"""
+    out = []
+    for k in range(path.numberOfShapesDirectlyBelow()):
+        sp = om2.MDagPath(path)
+        sp.extendToShape(k)
+        if sp.apiType() != om2.MFn.kMesh:
+            continue
+        if om2.MFnDagNode(sp).isIntermediateObject:
+            continue
+        out.append(sp)
+    return out
+
+
+def _first_uv(shape: om2.MDagPath, uvset: str):
+    fn = om2.MFnMesh(shape)
+    if uvset not in fn.getUVSetNames():
+        return None
+    us, vs = fn.getUVs(uvset)
+    if not len(us):
+        return None
+    return us[0], vs[0]
+
+
+# ----------------------------------------------------------------------
+def take_snapshot(
+    root: str,
+    uvset: str | None = "pp2_uv",
+    dags: list | None = None,
+) -> PP2Snapshot:
+    """
+    root 以下を 1 パスで走査してスナップショットを作る
+
+    Parameters
+    ----------
+    root  : ルート Transform 名
+    uvset : UV[0] を読む UV セット名（None なら UV を読まない）
+    dags  : list を渡すと Transform ごとに (MDagPath, [mesh の MDagPath]) を足していく
+            （pp2_index がコールバックを張るのに使う。この時はインスタンスも全部読む）
+    """
+    root_path  = _dag_path(root)
+    root_depth = root_path.length()
+
+    paths, shapes, meshes = [], [], []
+    parents, depths, mtx, piv, uvs = [], [], [], [], []
+    index: dict[str, int] = {}
+    seen:  dict[int, int] = {}              # MObjectHandle.hashCode → 最初の列挙番号
+    hits = 0
+
+    it = om2.MItDag()
+    it.reset(root_path, om2.MItDag.kDepthFirst, om2.MFn.kTransform)
+    while not it.isDone():
+        path = it.getPath()
+        full = path.fullPathName()
+        d    = full.count("|") - root_depth     # == path.length() - root_depth
+
+        if dags is None and path.isInstanced(False):
+            key = om2.MObjectHandle(path.node()).hashCode()
+            j = seen.get(key)
+            if j is not None:
+                # 2 組目以降：最初の組 j.. をこのインスタンスの位置へ写す
+                end = j + 1
+                while end < len(paths) and depths[end] > depths[j]:
+                    end += 1
+                w_old = np.asarray(mtx[j], np.float64).reshape(4, 4)
+                w_new = np.array(path.inclusiveMatrix(), np.float64).reshape(4, 4)
+                rel   = np.linalg.solve(w_old, w_new)          # w_old⁻¹ · w_new
+                base, old = len(paths), paths[j]
+                par = index.get(full.rpartition("|")[0], -1) if d else -1
+                for k in range(j, end):
+                    paths.append(full + paths[k][len(old):])
+                    parents.append(par if k == j else parents[k] - j + base)
+                    depths.append(depths[k] - depths[j] + d)
+                    meshes.append([full + m[len(old):] for m in meshes[k]])
+                    shapes.append(meshes[-1][0] if meshes[-1] else None)
+                    uvs.append(uvs[k])
+                sub = np.asarray(mtx[j:end], np.float64).reshape(-1, 4, 4)
+                mtx.extend((sub @ rel).reshape(-1, 16).tolist())
+                p4 = np.c_[np.asarray(piv[j:end], np.float64), np.ones(end - j)]
+                piv.extend((p4 @ rel)[:, :3].tolist())
+                hits += end - j
+                it.prune()
+                it.next()
+                continue
+            seen[key] = len(paths)
+
+        index[full] = len(paths)
+        paths.append(full)
+        parents.append(index.get(full.rpartition("|")[0], -1) if d else -1)
+        depths.append(d)
+
+        mtx.append(list(path.inclusiveMatrix()))
+        p = om2.MFnTransform(path).rotatePivot(om2.MSpace.kWorld)
+        piv.append((p.x, p.y, p.z))
+
+        sps = _mesh_shapes(path)
+        if dags is not None:
+            dags.append((path, sps))
+        meshes.append([sp.fullPathName() for sp in sps])
+        shapes.append(meshes[-1][0] if sps else None)
+        uvs.append(_first_uv(sps[0], uvset) if (sps and uvset) else None)
+
+        it.next()
+
+    snap = PP2Snapshot(len(paths))
+    snap.paths, snap.shapes, snap.meshes = paths, shapes, meshes
+    snap.parents[:]  = parents
+    snap.depths[:]   = depths
+    snap.matrices[:] = mtx
+    snap.pivots[:]   = piv
+    for i, uv in enumerate(uvs):
+        if uv is not None:
+            snap.uvs[i]    = uv
+            snap.has_uv[i] = True
+    snap.memo = {"hits": hits, "misses": len(paths) - hits}
+    return snap
+
+
+# ----------------------------------------------------------------------
+def read_uvs(snap: PP2Snapshot, uvset: str) -> None:
+    """snap.shapes の uvset から UV[0] を読み、snap.uvs / has_uv を埋める"""
+    snap.uvs[:]    = np.nan
+    snap.has_uv[:] = False
+    for i, shape in enumerate(snap.shapes):
+        if shape is None:
+            continue
+        uv = _first_uv(_dag_path(shape), uvset)
+        if uv is not None:
+            snap.uvs[i]    = uv
+            snap.has_uv[i] = True
+
+
+def read_layout(root: str) -> PP2Layout | None:
+    """ルート Transform の pp2Layout アトリビュートを読む（無ければ None）"""
+    fn = om2.MFnDependencyNode(_dag_path(root).node())
+    if not fn.hasAttribute(PP2Layout.ATTR):
+        return None
+    return PP2Layout.from_json(fn.findPlug(PP2Layout.ATTR, False).asString())
+
+
+def gather_world_points(meshes) -> tuple[np.ndarray, np.ndarray]:
+    """
+    mesh 群のワールド頂点を 1 本の配列に連結する（pp2_analysis.MeshStats 用）
+
+    meshes : mesh 名 / MDagPath のリスト。1 mesh につき getPoints を 1 回だけ呼ぶ
+
+    Returns
+    -------
+    points : (P, 3)
+    counts : (N,) mesh ごとの頂点数
+    """
+    chunks = []
+    for m in meshes:
+        path = m if isinstance(m, om2.MDagPath) else _dag_path(m)
+        pts  = om2.MFnMesh(path).getPoints(om2.MSpace.kWorld)
+        chunks.append(np.array(pts, np.float64).reshape(-1, 4)[:, :3])
+    counts = np.array([len(c) for c in chunks], np.int64)
+    points = np.concatenate(chunks) if chunks else np.empty((0, 3))
+    return points, counts
+
+
+def layout_cells(snap: PP2Snapshot, uvset: str, layout: PP2Layout | None = None,
+                 verify: int = VERIFY_UVS):
+    """
+    記録済みレイアウトからテクセル番号とグリッドを求める
+
+    layout : 読み済みの記録（None ならルートの pp2Layout を読む）
+    verify : 記録は pp2_uv を手で動かしても更新されないので、mesh を持つ Transform
+             から verify 個を等間隔に選び、UV[0] が記録のセル内にあるかを確かめる
+             （0 で確かめない）
+
+    Returns
+    -------
+    (cells, (nR, nC))。記録が無い・UV セット違い・階層と不一致・UV と不一致なら None
+    """
+    if layout is None:
+        layout = read_layout(snap.root)
+    if layout is None or layout.uvset != uvset:
+        return None
+    cells = layout.cells_for(snap.paths)
+    if cells is None:
+        return None
+    if verify and not _uvs_match(snap, layout, cells, uvset, verify):
+        return None
+    return cells, layout.shape
+
+
+def _uvs_match(snap: PP2Snapshot, layout: PP2Layout, cells, uvset: str, k: int) -> bool:
+    """mesh を持つ Transform から k 個（先頭・末尾を含む等間隔）の UV[0] を記録と比べる"""
+    shaped = np.array([i for i, s in enumerate(snap.shapes) if s is not None], np.int64)
+    if not len(shaped):
+        return True
+    pick = shaped[np.unique(np.linspace(0, len(shaped) - 1, min(k, len(shaped)))
+                            .round().astype(np.int64))]
+    uvs = []
+    for i in pick.tolist():
+        uv = _first_uv(_dag_path(snap.shapes[i]), uvset)
+        if uv is None:
+            return False
+        uvs.append(uv)
+    return bool(layout.uvs_in_cells(cells[pick], uvs).all())
+
+
+# ----------------------------------------------------------------------
+class FrameSampler:
+    """
+    スナップショットの全ノードを任意フレームで評価する
+
+    worldMatrix[0] / rotatePivot のプラグは最初に 1 回だけ引いておき、
+    各フレームではその時刻の MDGContext を current にしてまとめて読む
+    （currentTime を動かさないのでシーン全体は再評価されない）。
+    接続の無い rotatePivot は最初に読んだ値を使い回す。
+
+        sampler = FrameSampler(snap)
+        for f in range(1, 25):
+            matrices, pivots = sampler.sample(f)
+    """
+
+    def __init__(self, snap: PP2Snapshot) -> None:
+        self.snap  = snap
+        self._wm   = []
+        self._anim = {}                       # 列挙インデックス → rotatePivot プラグ
+        self._rp   = np.ones((len(snap), 4))  # ローカル rotatePivot (x, y, z, 1)
+        for i, full in enumerate(snap.paths):
+            fn = om2.MFnDependencyNode(_dag_path(full).node())
+            self._wm.append(fn.findPlug("worldMatrix", False).elementByLogicalIndex(0))
+            rp = fn.findPlug("rotatePivot", False)
+            if rp.isConnected or any(rp.child(k).isConnected for k in range(3)):
+                self._anim[i] = rp
+            else:
+                self._rp[i, :3] = [rp.child(k).asDouble() for k in range(3)]
+
+    def sample(self, frame: float) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns
+        -------
+        matrices : (N, 16) ワールド行列
+        pivots   : (N, 3)  ワールド rotatePivot
+        """
+        ctx  = om2.MDGContext(om2.MTime(frame, om2.MTime.uiUnit()))
+        prev = ctx.makeCurrent()
+        try:
+            mtx = np.array([om2.MFnMatrixData(p.asMObject()).matrix() for p in self._wm],
+                           np.float64).reshape(-1, 4, 4)
+            rp = self._rp
+            if self._anim:
+                rp = rp.copy()
+                for i, plug in self._anim.items():
+                    rp[i, :3] = [plug.child(k).asDouble() for k in range(3)]
+        finally:
+            prev.makeCurrent()
+        # rotatePivot はローカル（変換前）空間 → ワールドへ
+        pivots = np.einsum("ni,nij->nj", rp, mtx)[:, :3]
+        return mtx.reshape(-1, 16), pivots
+
+    def frames(self, frames):
+        """フレーム列を順に評価するジェネレーター（(frame, matrices, pivots)）"""
+        for f in frames:
+            yield (f,) + self.sample(f)
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+pp2_undo.py
+-----------------------------------
+Pivot Painter 2 用：OpenMaya の編集を undo キューに載せる（Maya プラグイン兼モジュール）
+
+MFnMesh.setUVs / MFnTransform.setRotation / MDagModifier.doIt などの API 編集は
+それだけでは undo キューに積まれず、undoInfo のチャンクにも何も残らない。
+commit() はこのファイル自身を Maya プラグインとして読み込み、pp2Undoable
+コマンドの中で編集を実行して、Ctrl+Z / 再実行で呼ぶ関数を登録する。
+
+    log = EditLog()
+    def apply():
+        log.set(lambda e: fn.setRotation(e, om2.MSpace.kTransform), old, new)
+        log.call(mod.doIt, mod.undoIt)
+    commit(apply, log.undo, log.redo)
+
+EditLog は「前の値 → 後の値」の書き込みを記録し、undo では逆順に前の値、
+redo では同じ順に後の値を書き戻す（最初の実行で読んだ値を使うので、
+redo で計算し直さない）。
+
+    before = uv_state(fn, "pp2_uv")             # UV セットの中身（無ければ None）
+    log.set(lambda s: set_uv_state(fn, "pp2_uv", s), before, after)
+"""
+
+from __future__ import annotations
+import os, sys, types
+import maya.api.OpenMaya as om2
+import maya.cmds as cmds
+
+COMMAND = "pp2Undoable"
+PLUGIN  = os.path.splitext(os.path.abspath(__file__))[0] + ".py"
+
+# Maya はプラグインのファイルを別モジュールとして読み込むので、
+# コマンドへの受け渡しはどちらからも同じものが見える置き場を使う
+_SHARED = sys.modules.setdefault("_pp2_undo_shared", types.ModuleType("_pp2_undo_shared"))
+if not hasattr(_SHARED, "pending"):
+    _SHARED.pending = None
+
+
+def maya_useNewAPI():
+    """OpenMaya 2.0 のプラグインであることを Maya に知らせる"""
+
+
+# ----------------------------------------------------------------------
+# コマンド
+# ----------------------------------------------------------------------
+class PP2UndoableCommand(om2.MPxCommand):
+    """commit() が置いた (do, undo, redo) を実行し、undo / redo で呼び戻す"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._do = self._undo = self._redo = None
+
+    @staticmethod
+    def creator():
+        return PP2UndoableCommand()
+
+    def doIt(self, args) -> None:
+        if _SHARED.pending is None:
+            raise RuntimeError(f"{COMMAND} は pp2_undo.commit() から呼んでください")
+        self._do, self._undo, self._redo = _SHARED.pending
+        _SHARED.pending = None
+        try:
+            self._do()
+        except Exception:
+            self._undo()                        # 途中まで書いた分を戻してから失敗させる
+            raise
+
+    def redoIt(self) -> None:
+        (self._redo or self._do)()
+
+    def undoIt(self) -> None:
+        self._undo()
+
+    def isUndoable(self) -> bool:
+        return True
+
+
+def initializePlugin(obj) -> None:
+    om2.MFnPlugin(obj, "pp2", "1.0").registerCommand(COMMAND, PP2UndoableCommand.creator)
+
+
+def uninitializePlugin(obj) -> None:
+    om2.MFnPlugin(obj).deregisterCommand(COMMAND)
+
+
+# ----------------------------------------------------------------------
+# ツール用
+# ----------------------------------------------------------------------
+def commit(do, undo, redo=None) -> None:
+    """
+    do() を実行し、1 つの undo 単位として登録する
+
+    undo : Ctrl+Z で呼ぶ（do() が途中で例外を出した時も呼ぶ）
+    redo : 再実行で呼ぶ（None なら do() をもう一度）
+    """
+    if not cmds.pluginInfo(PLUGIN, q=True, loaded=True):
+        cmds.loadPlugin(PLUGIN, quiet=True)
+    _SHARED.pending = (do, undo, redo)
+    try:
+        getattr(cmds, COMMAND)()
+    finally:
+        _SHARED.pending = None
+
+
+class EditLog:
+    """API 編集の前後の値を記録し、undo / redo で書き戻す"""
+
+    def __init__(self) -> None:
+        self._ops: list = []                    # (setter, before, after)
+
+    def __len__(self) -> int:
+        return len(self._ops)
+
+    def set(self, setter, before, after) -> None:
+        """setter(after) を実行して記録する（undo では setter(before)）"""
+        self._ops.append((setter, before, after))
+        setter(after)
+
+    def call(self, do, undo) -> None:
+        """do() を実行して記録する（MDagModifier の doIt / undoIt など）"""
+        self.set(lambda f: f(), undo, do)
+
+    def undo(self) -> None:
+        for setter, before, _ in reversed(self._ops):
+            setter(before)
+
+    def redo(self) -> None:
+        for setter, _, after in self._ops:
+            setter(after)
+
+
+# ----------------------------------------------------------------------
+# UV セットの退避 / 書き戻し
+# ----------------------------------------------------------------------
+def uv_state(fn: om2.MFnMesh, uvset: str):
+    """uvset の中身 (us, vs, uvCounts, uvIds)。UV セットが無ければ None"""
+    if uvset not in fn.getUVSetNames():
+        return None
+    us, vs = fn.getUVs(uvset)
+    counts, ids = fn.getAssignedUVs(uvset)
+    return us, vs, counts, ids
+
+
+def set_uv_state(fn: om2.MFnMesh, uvset: str, state) -> None:
+    """uv_state の値を書き込む（None なら UV セットごと消す）"""
+    names = fn.getUVSetNames()
+    if state is None:
+        if uvset in names:
+            fn.deleteUVSet(uvset)
+        return
+    us, vs, counts, ids = state
+    if uvset not in names:
+        fn.createUVSet(uvset)
+    fn.clearUVs(uvset)
+    fn.setUVs(us, vs, uvset)
+    fn.assignUVs(counts, ids, uvset)
@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+"""
+pp2_validate.py
+-----------------------------------
+Pivot Painter 2 用：書き出したテクスチャの往復検証（Maya 非依存）
+
+書き出した PivotPosition / X-Vector を読み戻し、元のスナップショットから
+期待される値と全テクセルまとめて（NumPy の一括比較で）突き合わせる。
+UE に読み込む前に、壊れた書き出しをバッチで止めるためのもの。
+
+    ISSUES のキー                 中身
+    cell_range / collision / empty / orphan            グリッド（セル番号の重複・空き）
+    parent / parent_fallback / parent_target           _pack_parent の親テクセル
+    pivot / xvector / zero_xaxis / alpha / deep        値（許容誤差は half / 8-bit の量子化分）
+
+    rep = validate_snapshot(snap, cells, "tree01_pivotpos.exr", "tree01_xvector.png")
+    rep.ok, rep.summary()       # {"ok", "nodes", "shape", "issues": {名前: {"count", "sample"}}, "stats"}
+
+    python pp2_validate.py tree01_pivotpos.exr tree01_xvector.png --scene tree01.json --root trunk
+        （pp2_batch の json シーン。セルはルートの pp2Layout 記録、無ければ --ordering で並べ直す）
+"""
+
+from __future__ import annotations
+import argparse, json, sys
+import numpy as np
+
+from pp2_encode import encode_xvector, parent_cells
+from pp2_runtime import load_texture, unpack_parent
+
+# 許容誤差
+PIVOT_ABS_TOL = 1e-5            # PivotPosition RGB の絶対誤差
+PIVOT_REL_TOL = 2.0 ** -11      # 〃 相対誤差（half の丸め。float32 はこれに収まる）
+BYTE_TOL      = 0.5 / 255 + 1e-6  # X-Vector RGBA（8-bit PNG の丸め）
+MAX_DEPTH     = 3               # α が区別できる / シェーダーがたどれる深さ
+
+ISSUES = {                      # 名前 → 説明（sample は node 番号。orphan だけテクセル番号）
+    "cell_range":      "グリッド外のセル",
+    "collision":       "同じセルを複数の Transform が使っている",
+    "empty":           "Transform のセルが空（A が親を指していない）",
+    "orphan":          "どの Transform のものでもない使用中のテクセル",
+    "parent":          "親テクセルが違う",
+    "parent_fallback": "親テクセルが 0 に落ちている（グリッドに親が無い）",
+    "parent_target":   "親テクセルが空きセル / グリッド外を指している",
+    "pivot":           "ピボットが許容誤差を超えている",
+    "xvector":         "X-Vector の RGB が許容誤差を超えている",
+    "zero_xaxis":      "+X 軸の長さが 0",
+    "alpha":           "深度 α が違う",
+    "deep":            f"深度が {MAX_DEPTH} を超えている",
+}
+
+
+class PP2Report:
+    """
+    検証結果
+
+    Attributes
+    ----------
+    shape  : テクスチャの (nR, nC)
+    nodes  : 検証した Transform 数
+    issues : {ISSUES の名前: 該当する node 番号（orphan はテクセル番号）の配列}。空のものは含まない
+    stats  : テクセルごとの誤差の統計
+    paths  : node 番号 → パス（sample の表示用。None なら番号のまま）
+    """
+
+    def __init__(self, shape, nodes: int, issues: dict, stats: dict, paths=None) -> None:
+        self.shape  = tuple(int(v) for v in shape)
+        self.nodes  = nodes
+        self.issues = {k: v for k, v in issues.items() if len(v)}
+        self.stats  = stats
+        self.paths  = paths
+
+    @property
+    def ok(self) -> bool:
+        return not self.issues
+
+    def summary(self, limit: int = 5) -> dict:
+        """JSON にできる要約（sample は各項目の先頭 limit 件）"""
+        out = {}
+        for name, idx in self.issues.items():
+            sample = idx[:limit].tolist()
+            if self.paths is not None and name != "orphan":
+                sample = [self.paths[i] for i in sample]
+            out[name] = {"count": len(idx), "sample": sample}
+        return {"ok": self.ok, "nodes": self.nodes, "shape": list(self.shape),
+                "issues": out, "stats": self.stats}
+
+    def lines(self, limit: int = 5) -> list[str]:
+        """print 用の行"""
+        s = self.summary(limit)
+        head = "OK" if self.ok else "FAILED"
+        res = [f"[PP2] validate {head}: {self.nodes} nodes / "
+               f"{self.shape[0]}x{self.shape[1]}"]
+        for name, d in s["issues"].items():
+            res.append(f"  {name:<15} {d['count']:>7}  {ISSUES[name]}  {d['sample']}")
+        for name, st in self.stats.items():
+            res.append(f"  {name:<15} " + "  ".join(f"{k}={v:.3g}" for k, v in st.items()))
+        return res
+
+
+# ----------------------------------------------------------------------
+def _texture(tex):
+    if tex is None:
+        return None
+    return load_texture(tex) if isinstance(tex, str) else np.asarray(tex, np.float32)
+
+
+def _err_stats(err) -> dict:
+    err = err[np.isfinite(err)]
+    if not len(err):
+        return {"max": 0.0, "mean": 0.0, "rms": 0.0}
+    return {"max": float(err.max()), "mean": float(err.mean()),
+            "rms": float(np.sqrt(np.mean(err * err)))}
+
+
+def validate_arrays(
+    pivotpos,
+    xvector,
+    pivots,
+    matrices,
+    parents,
+    depths,
+    cells,
+    roots=0,
+    grid=None,
+    paths=None,
+) -> PP2Report:
+    """
+    読み戻したテクスチャ（パス、または (H, W, 4) 配列。片方は None 可）を
+    列挙順の配列と突き合わせる
+
+    Parameters
+    ----------
+    parents : 親の番号（ルートは -1。親テクセルは自分自身のセル = parent_cells）
+    roots   : 各 Transform の ΔX / ΔY の基準にするルートの番号（スカラーか (N,)）
+    grid    : 期待するグリッド (nR, nC)。テクスチャと違えば ValueError
+    """
+    piv = _texture(pivotpos)
+    xv  = _texture(xvector)
+    if piv is None and xv is None:
+        raise ValueError("検証するテクスチャがありません")
+    shape = (piv if piv is not None else xv).shape[:2]
+    if xv is not None and xv.shape[:2] != shape:
+        raise ValueError(f"テクスチャの大きさが違います: {shape} / {xv.shape[:2]}")
+    if grid is not None and tuple(grid) != tuple(shape):
+        raise ValueError(f"グリッドとテクスチャの大きさが違います: {tuple(grid)} / {shape}")
+
+    parents = np.asarray(parents, np.int64)
+    depths  = np.asarray(depths, np.int64)
+    cells   = np.asarray(cells, np.int64)
+    n, size = len(cells), shape[0] * shape[1]
+    issues: dict[str, np.ndarray] = {}
+    stats:  dict[str, dict] = {}
+
+    # --- グリッド --------------------------------------------------------
+    inside = (cells >= 0) & (cells < size)
+    issues["cell_range"] = np.flatnonzero(~inside)
+    cell = np.where(inside, cells, 0)
+    uniq, counts = np.unique(cells[inside], return_counts=True)
+    issues["collision"] = np.flatnonzero(np.isin(cells, uniq[counts > 1]) & inside)
+    issues["deep"] = np.flatnonzero(depths > MAX_DEPTH)
+
+    # --- PivotPosition --------------------------------------------------
+    if piv is not None:
+        flat = piv.reshape(-1, 4)
+        ptex = unpack_parent(flat[:, 3])
+        used = ptex >= 0
+        issues["empty"] = np.flatnonzero(inside & ~used[cell])
+        owned = np.zeros(size, bool)
+        owned[cell[inside]] = True
+        issues["orphan"] = np.flatnonzero(used & ~owned)
+
+        got  = ptex[cell]
+        want = parent_cells(parents, cells)
+        bad  = inside & used[cell] & (got != want)
+        fall = bad & (got == 0)
+        issues["parent_fallback"] = np.flatnonzero(fall)
+        issues["parent"] = np.flatnonzero(bad & ~fall)
+        tgt_ok = (got >= 0) & (got < size)
+        tgt_ok[tgt_ok] = used[got[tgt_ok]]
+        issues["parent_target"] = np.flatnonzero(
+            inside & used[cell] & ~tgt_ok & (parents >= 0))   # ルートは parent で見る
+
+        p   = np.asarray(pivots, np.float64).reshape(-1, 3)
+        ref = p[np.broadcast_to(np.asarray(roots, np.int64), (n,))]
+        exp = np.stack([p[:, 0] - ref[:, 0], p[:, 2], p[:, 1] - ref[:, 1]], 1)
+        err = np.abs(flat[cell, :3].astype(np.float64) - exp)
+        tol = PIVOT_ABS_TOL + np.abs(exp) * PIVOT_REL_TOL
+        issues["pivot"] = np.flatnonzero(inside & ~(err <= tol).all(axis=1))
+        stats["pivot"] = _err_stats(err[inside].max(axis=1))
+
+    # --- X-Vector -------------------------------------------------------
+    if xv is not None:
+        exp = encode_xvector(matrices, depths, np.arange(n), (1, n))[0]
+        got = xv.reshape(-1, 4)[cell]
+        err = np.abs(got - exp)
+        issues["xvector"] = np.flatnonzero(inside & ~(err[:, :3] <= BYTE_TOL).all(axis=1))
+        issues["alpha"] = np.flatnonzero(inside & ~(err[:, 3] <= BYTE_TOL))
+        ax = got[:, :3].astype(np.float64) * 2.0 - 1.0
+        zero = (np.linalg.norm(ax, axis=1) < 0.5) | (np.abs(exp[:, :3] - 0.5).max(axis=1) == 0)
+        issues["zero_xaxis"] = np.flatnonzero(inside & zero)
+        stats["xvector_255"] = _err_stats(err[inside, :3].max(axis=1) * 255.0)
+
+        e  = exp[:, :3].astype(np.float64) * 2.0 - 1.0
+        ok = inside & ~zero
+        cos = np.einsum("ij,ij->i", ax[ok], e[ok]) / (
+            np.linalg.norm(ax[ok], axis=1) * np.linalg.norm(e[ok], axis=1))
+        stats["xaxis_deg"] = _err_stats(np.degrees(np.arccos(np.clip(cos, -1.0, 1.0))))
+
+    return PP2Report(shape, n, {k: issues[k] for k in ISSUES if k in issues},
+                     stats, paths)
+
+
+def validate_snapshot(snap, cells, pivotpos=None, xvector=None, grid=None) -> PP2Report:
+    """単体出力（write_textures / LOD）を snap と cells に対して検証する"""
+    return validate_arrays(pivotpos, xvector, snap.pivots, snap.matrices, snap.parents,
+                           snap.depths, cells, 0, grid, snap.paths)
+
+
+def validate_atlas(atlas, pivotpos=None, xvector=None) -> PP2Report:
+    """アトラス（write_atlas）を検証する。ΔX / ΔY はアセットごとのルート基準"""
+    m = atlas.merged()
+    sizes = [len(s) for s in atlas.snaps]
+    roots = np.repeat(atlas.starts, sizes)
+    paths = [p for s in atlas.snaps for p in s.paths]
+    return validate_arrays(pivotpos, xvector, m["pivots"], m["matrices"], m["parents"],
+                           m["depths"], m["cells"], roots, atlas.shape, paths)
+
+
+# ----------------------------------------------------------------------
+# CLI
+# ----------------------------------------------------------------------
+def main(argv: list[str] | None = None) -> int:
+    from pp2_batch import JsonSceneAdapter
+    from pp2_layout import ORDERINGS, PP2Layout
+
+    ap = argparse.ArgumentParser(description="PP2 textures: round-trip validation")
+    ap.add_argument("pivotpos", help="PivotPosition (.exr / .npy)")
+    ap.add_argument("xvector", help="X-Vector (.png / .npy)")
+    ap.add_argument("--scene", required=True, help="pp2_batch の json シーン")
+    ap.add_argument("--root", required=True)
+    ap.add_argument("--mincol", type=int, default=5)
+    ap.add_argument("--ordering", choices=ORDERINGS, default="dfs",
+                    help="pp2Layout の記録が無い時の並べ方")
+    ap.add_argument("--limit", type=int, default=5, help="項目ごとに表示する件数")
+    ap.add_argument("--json", help="要約を JSON で書き出す")
+    args = ap.parse_args(argv)
+
+    adapter = JsonSceneAdapter()
+    adapter.open(args.scene)
+    snap = adapter.snapshot(args.root)
+    rec  = PP2Layout.from_json(adapter._subtree(snap.root)[0].get(PP2Layout.ATTR))
+    cells = rec.cells_for(snap.paths) if rec is not None else None
+    if cells is None:
+        rec   = PP2Layout.for_paths(snap.paths, args.mincol, ordering=args.ordering)
+        cells = rec.cells
+
+    rep = validate_snapshot(snap, cells, args.pivotpos, args.xvector, rec.shape)
+    print("\n".join(rep.lines(args.limit)))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rep.summary(args.limit), f, indent=2, ensure_ascii=False)
+    return 0 if rep.ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,392 @@
+# -*- coding: utf-8 -*-
+"""
+pp2_writers.py
+-----------------------------------
+Pivot Painter 2 用：テクスチャ書き出し（Maya 非依存）
+
+    save_exr       : PivotPosition 用 RGBA EXR (OpenEXR / Imath)
+                     行ブロック単位の書き出し・ZIP / PIZ 圧縮・RGB の half 化に対応
+    save_png_rgba  : X-Vector 用 8-bit RGBA PNG (Pillow)
+    save_npy       : 生の (H, W, 4) float32 配列 (.npy。NumPy だけで書ける)
+    write_textures : スナップショットから両テクスチャをエンコードして書き出す
+    write_flipbook : フレームごとのサンプルを縦積み EXR / PNG 連番へ逐次書き出す
+
+書き出し形式は WRITERS レジストリ（形式名 → 拡張子と "モジュール:関数"）から選び、
+関数は初めて使う時に import する。未登録の形式 fmt は pp2_writer_<fmt>.py を
+探して読み込み、その中の register_writer で登録されるのを待つ。
+画像ライブラリは書き出す時にだけ pp2_env.require で import する。
+"""
+
+from __future__ import annotations
+import importlib, inspect, json, os
+from contextlib import nullcontext
+from typing import Callable
+import numpy as np
+
+from pp2_cache import PP2ExportCache, node_hashes
+from pp2_encode import empty_texture, encode_pivot_position, encode_xvector
+from pp2_env import require
+
+
+EXR_COMPRESSION = {                 # 名前 → Imath.Compression の定数名
+    "none": "NO_COMPRESSION",
+    "zip":  "ZIP_COMPRESSION",
+    "piz":  "PIZ_COMPRESSION",
+}
+HALF_MAX = 65504.0                  # half の最大有限値
+
+
+def _half_checked(plane: np.ndarray, tol: float | None) -> np.ndarray:
+    """float32 → float16。範囲外、または誤差が tol を超えたら ValueError"""
+    if np.any(np.abs(plane) > HALF_MAX):
+        raise ValueError(f"half の範囲外の値があります (|v| > {HALF_MAX})")
+    h = plane.astype(np.float16)
+    if tol is not None:
+        err = float(np.max(np.abs(h.astype(np.float32) - plane), initial=0.0))
+        if err > tol:
+            raise ValueError(f"half 化の誤差 {err:g} が許容値 {tol:g} を超えました")
+    return h
+
+
+class ExrScanlineWriter:
+    """
+    Scanline EXR を行ブロック単位で書き出すライター
+
+    write_rows には (チャンネル, 行, 幅) のチャンネル分離 (planar) 配列を渡す。
+    各チャンネルの行ブロックが C 連続ならコピーせずにそのまま渡す。
+
+        with ExrScanlineWriter(path, w, h, compression="zip") as exr:
+            for block in blocks:            # (4, rows, w) float32
+                exr.write_rows(block)
+    """
+
+    def __init__(
+        self,
+        path: str,
+        width: int,
+        height: int,
+        compression: str = "zip",
+        half_rgb: bool = False,
+        half_tol: float | None = None,
+        channels: str = "RGBA",
+    ) -> None:
+        """
+        Parameters
+        ----------
+        compression : "none" / "zip" / "piz"（いずれも可逆）
+        half_rgb    : True なら RGB を half で保存（A は親インデックスなので常に FLOAT）
+        half_tol    : half 化で許す最大絶対誤差（None なら範囲チェックのみ）
+        """
+        OpenEXR = require("OpenEXR", "EXR 書き出し")
+        Imath   = require("Imath", "EXR 書き出し")
+
+        if compression not in EXR_COMPRESSION:
+            raise ValueError(f"未知の圧縮: {compression}")
+        self.channels = channels
+        self.height   = height
+        self.half     = {c: half_rgb and c in "RGB" for c in channels}
+        self.half_tol = half_tol
+        self.rows_written = 0
+
+        hdr = OpenEXR.Header(width, height)
+        hdr["compression"] = Imath.Compression(
+            getattr(Imath.Compression, EXR_COMPRESSION[compression]))
+        hdr["channels"] = {c: Imath.Channel(Imath.PixelType(
+            Imath.PixelType.HALF if self.half[c] else Imath.PixelType.FLOAT))
+            for c in channels}
+        self._out = OpenEXR.OutputFile(path, hdr)
+
+    def write_rows(self, planes: np.ndarray) -> None:
+        """上から続きの行ブロック (C, rows, W) を書き込む"""
+        rows = planes.shape[1]
+        if self.rows_written + rows > self.height:
+            raise ValueError("EXR の高さを超えて書き込もうとしました")
+        data = {}
+        for i, c in enumerate(self.channels):
+            plane = planes[i]
+            if self.half[c]:
+                plane = _half_checked(plane, self.half_tol)
+            elif plane.dtype != np.float32 or not plane.flags.c_contiguous:
+                plane = np.ascontiguousarray(plane, np.float32)
+            data[c] = memoryview(plane)
+        self._out.writePixels(data, rows)
+        self.rows_written += rows
+
+    def close(self) -> None:
+        self._out.close()
+
+    def __enter__(self) -> ExrScanlineWriter:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def save_exr(
+    path: str,
+    arr: np.ndarray,
+    compression: str = "zip",
+    half_rgb: bool = False,
+    half_tol: float | None = None,
+    chunk_rows: int = 256,
+) -> None:
+    """
+    (H, W, 4) float32 → RGBA EXR を chunk_rows 行ずつ書き出す
+
+    arr が pp2_encode.empty_texture のようなチャンネル分離メモリのビューなら
+    行ブロックはコピーせずに渡る（それ以外でも作業領域は 1 ブロック分だけ）。
+    """
+    h, w, _ = arr.shape
+    planes  = np.moveaxis(arr, -1, 0)           # (4, H, W) ビュー
+    with ExrScanlineWriter(path, w, h, compression, half_rgb, half_tol) as exr:
+        for y in range(0, h, chunk_rows):
+            exr.write_rows(planes[:, y:y + chunk_rows])
+
+
+# save_exr の既定値（キャッシュの比較で、明示した既定値と省略を同じに扱う）
+EXR_DEFAULTS = {k: p.default for k, p in inspect.signature(save_exr).parameters.items()
+                if p.default is not inspect.Parameter.empty}
+
+
+def save_png_rgba(path: str, arr: np.ndarray) -> None:
+    """(H, W, 4) 0..1 float → 8-bit RGBA PNG（無圧縮）"""
+    Image = require("PIL.Image", "PNG 書き出し")
+
+    img8 = np.rint(np.clip(arr, 0.0, 1.0) * 255.0).astype(np.uint8)
+    Image.fromarray(img8, "RGBA").save(path, compress_level=0)
+
+
+def save_npy(path: str, arr: np.ndarray) -> None:
+    """(H, W, 4) → float32 の .npy（画像ライブラリ不要。検証・後段ツール用）"""
+    np.save(path, np.ascontiguousarray(arr, np.float32))
+
+
+# ----------------------------------------------------------------------
+# 書き出し形式のレジストリ
+# ----------------------------------------------------------------------
+WRITERS: dict[str, tuple[str, str | Callable]] = {
+    "exr": (".exr", "pp2_writers:save_exr"),
+    "png": (".png", "pp2_writers:save_png_rgba"),
+    "npy": (".npy", "pp2_writers:save_npy"),
+}
+EXR_FORMATS = ("exr",)              # exr_options を渡す形式
+
+OUTPUT_FILES = {                    # 出力名 → (ファイル名の書式, 既定の形式)
+    "pivotpos": ("{}_pivotpos", "exr"),
+    "xvector":  ("{}_xvector",  "png"),
+}
+
+
+def register_writer(fmt: str, ext: str, fn: str | Callable) -> None:
+    """
+    書き出し形式を登録する
+
+    fn : fn(path, arr, **options)、または遅延 import 用の "モジュール:関数"
+    """
+    WRITERS[fmt] = (ext, fn)
+
+
+def get_writer(fmt: str) -> Callable:
+    """形式名 → 書き出し関数（"モジュール:関数" はここで初めて import する）"""
+    if fmt not in WRITERS:
+        try:
+            importlib.import_module(f"pp2_writer_{fmt}")
+        except ImportError:
+            pass
+        if fmt not in WRITERS:
+            raise ValueError(f"未知の書き出し形式: {fmt}（登録済み: {sorted(WRITERS)}）")
+    ext, fn = WRITERS[fmt]
+    if isinstance(fn, str):
+        mod, _, attr = fn.partition(":")
+        fn = getattr(importlib.import_module(mod), attr)
+        WRITERS[fmt] = (ext, fn)
+    return fn
+
+
+def output_paths(
+    out_dir: str,
+    base_name: str,
+    outputs,
+    formats: dict | None = None,
+) -> dict[str, tuple[str, str]]:
+    """出力名 → (パス, 形式)。formats で出力ごとの形式を差し替えられる"""
+    out = {}
+    for k in outputs:
+        pattern, fmt = OUTPUT_FILES[k]
+        fmt = (formats or {}).get(k, fmt)
+        if fmt not in WRITERS:
+            get_writer(fmt)                     # 未登録ならここで探す / ValueError
+        out[k] = (os.path.join(out_dir, pattern.format(base_name) + WRITERS[fmt][0]), fmt)
+    return out
+
+
+def cache_options(targets: dict[str, tuple[str, str]],
+                  exr_options: dict | None = None) -> dict:
+    """
+    キャッシュに記録する書き出し設定（output_paths の結果から）
+
+    形式は出力ごとに解決したもの、exr_options は EXR で書く出力がある時だけ
+    EXR_DEFAULTS を埋めたもの。既定値を明示しても省略しても同じ値になる。
+    """
+    formats = {k: fmt for k, (_, fmt) in targets.items()}
+    exr = ({**EXR_DEFAULTS, **(exr_options or {})}
+           if any(f in EXR_FORMATS for f in formats.values()) else None)
+    return {"exr_options": exr, "formats": formats}
+
+
+def save_image(path: str, arr: np.ndarray, fmt: str,
+               exr_options: dict | None = None) -> None:
+    """形式 fmt で書き出す（exr_options は EXR 形式の時だけ渡す）"""
+    opts = (exr_options or {}) if fmt in EXR_FORMATS else {}
+    get_writer(fmt)(path, arr, **opts)
+
+
+def write_textures(
+    snap,
+    cells,
+    grid,
+    out_dir: str,
+    base_name: str,
+    outputs=("pivotpos", "xvector"),
+    stage=None,
+    cache: bool = False,
+    exr_options: dict | None = None,
+    formats: dict | None = None,
+) -> dict:
+    """
+    PP2Snapshot とグリッドから指定テクスチャをエンコードして書き出す
+
+    Parameters
+    ----------
+    stage : stage(name) → コンテキストマネージャ（工程計測用。None なら計測しない）
+    cache : True なら <base_name>.pp2cache.npz を使って差分だけ再計算し、
+            何も変わっていなければ書き出しごと省略する
+    exr_options : save_exr への追加引数（compression / half_rgb / half_tol / chunk_rows）
+    formats : {出力名: 形式}（WRITERS のキー。既定は pivotpos=exr / xvector=png）
+
+    Returns
+    -------
+    {"outputs": {出力名: パス}, "skipped": bool, "recomputed": {出力名: Transform 数}}
+    """
+    stage = stage or (lambda name: nullcontext())
+    os.makedirs(out_dir, exist_ok=True)
+    targets = output_paths(out_dir, base_name, outputs, formats)
+    paths   = {k: p for k, (p, _) in targets.items()}
+
+    encoders = {
+        "pivotpos": (lambda out=None, index=None: encode_pivot_position(
+            snap.pivots, snap.parents, cells, grid, out=out, index=index), True),
+        "xvector":  (lambda out=None, index=None: encode_xvector(
+            snap.matrices, snap.depths, cells, grid, out=out, index=index), False),
+    }
+
+    pc = None
+    if cache:
+        with stage("cache"):
+            pc = PP2ExportCache(os.path.join(out_dir, f"{base_name}.pp2cache.npz"))
+            hashes = node_hashes(snap.matrices, snap.pivots, snap.parents,
+                                 snap.depths, cells)
+            if pc.begin(hashes, cells, grid, paths, cache_options(targets, exr_options)):
+                return {"outputs": paths, "skipped": True, "recomputed": {}}
+
+    recomputed = {}
+    for name, path in paths.items():
+        fn, root_dependent = encoders[name]
+        with stage(f"encode_{name}"):
+            if pc:
+                tex = pc.encode(name, fn, root_dependent)
+            else:
+                tex = fn()
+        recomputed[name] = pc.recomputed[name] if pc else len(snap)
+        with stage(f"write_{name}"):
+            save_image(path, tex, targets[name][1], exr_options)
+
+    if pc:
+        with stage("cache"):
+            pc.commit(paths)
+    return {"outputs": paths, "skipped": False, "recomputed": recomputed}
+
+
+
+def write_flipbook(
+    samples,
+    n_frames: int,
+    parents,
+    depths,
+    cells,
+    grid,
+    out_dir: str,
+    base_name: str,
+    outputs=("pivotpos", "xvector"),
+    stage=None,
+    exr_options: dict | None = None,
+) -> dict:
+    """
+    フレームごとのサンプルを届いた順に書き出す（全フレーム分を溜めない）
+
+        pivotpos : <base>_pivotpos.exr          フレーム f を行 [f*nR, (f+1)*nR) に縦積み
+        xvector  : <base>_xvector_<frame>.png   フレームごとの連番
+
+    親テクセル (A) は各フレーム内の番号。フレームの並びと行数は
+    <base>_flipbook.json に記録する。
+
+    Parameters
+    ----------
+    samples  : (frame, matrices, pivots) を返すイテラブル（FrameSampler.frames など）
+    n_frames : samples のフレーム数（EXR の高さを先に決めるため）
+    parents, depths, cells, grid : 全フレーム共通の階層とグリッド
+    exr_options : ExrScanlineWriter への追加引数（compression / half_rgb / half_tol）
+
+    Returns
+    -------
+    {"outputs": {"pivotpos": パス, "xvector": [パス, ...]}, "manifest": パス, "frames": [...]}
+    """
+    stage = stage or (lambda name: nullcontext())
+    os.makedirs(out_dir, exist_ok=True)
+    nR, nC = grid
+    pos = os.path.join(out_dir, OUTPUT_FILES["pivotpos"][0].format(base_name) + ".exr")
+    opts = {k: v for k, v in (exr_options or {}).items() if k != "chunk_rows"}
+
+    exr = (ExrScanlineWriter(pos, nC, nR * n_frames, **opts)
+           if "pivotpos" in outputs else nullcontext())
+    buf = {k: empty_texture(grid) for k in outputs}     # フレーム間で使い回す
+    frames, xvecs = [], []
+    with exr:
+        for frame, matrices, pivots in samples:
+            if len(frames) == n_frames:
+                raise ValueError(f"n_frames ({n_frames}) より多いフレームが来ました")
+            frames.append(frame)
+            if "pivotpos" in outputs:
+                with stage("encode_pivotpos"):
+                    encode_pivot_position(pivots, parents, cells, grid,
+                                          out=buf["pivotpos"])
+                with stage("write_pivotpos"):
+                    exr.write_rows(np.moveaxis(buf["pivotpos"], -1, 0))
+            if "xvector" in outputs:
+                with stage("encode_xvector"):
+                    encode_xvector(matrices, depths, cells, grid, out=buf["xvector"])
+                xvecs.append(os.path.join(out_dir, f"{base_name}_xvector_{frame:g}.png"))
+                with stage("write_xvector"):
+                    save_png_rgba(xvecs[-1], buf["xvector"])
+        if len(frames) != n_frames:
+            raise ValueError(f"フレーム数が n_frames ({n_frames}) と合いません: {len(frames)}")
+
+    written = {}
+    if "pivotpos" in outputs:
+        written["pivotpos"] = pos
+    if "xvector" in outputs:
+        written["xvector"] = xvecs
+
+    manifest = os.path.join(out_dir, f"{base_name}_flipbook.json")
+    with open(manifest, "w", encoding="utf-8") as f:
+        json.dump({
+            "version":    1,
+            "frames":     frames,
+            "cols":       nC,
+            "frame_rows": nR,
+            "rows":       nR * n_frames,
+            "row_height": 1.0 / (nR * n_frames),
+            "textures":   {"pivotpos": os.path.basename(pos) if "pivotpos" in outputs else None,
+                           "xvector":  [os.path.basename(p) for p in xvecs]},
+        }, f, indent=2)
+    return {"outputs": written, "manifest": manifest, "frames": frames}
@@ -6,8 +6,14 @@ Pivot Painter 2 用：Transform ごとに 1 ドットを自動配置（クラス
 """
 
 from __future__ import annotations
-import math
+import functools, math
 import maya.cmds as cmds
+import maya.api.OpenMaya as om2
+
+from pp2_layout import ORDERINGS, PP2Layout, best_cols, order_cells, relative_paths
+from pp2_profile import NULL_PROFILER, make_profiler
+from pp2_index import snapshot
+from pp2_undo import EditLog, commit, set_uv_state, uv_state
 
 
 class PP2UVAutoSquare:
@@ -27,6 +33,9 @@ class PP2UVAutoSquare:
         uvset: str | None = None,
         src_uv: str | None = None,
         mincol: int | None = None,
+        batch: bool = False,
+        profile: bool | str = False,
+        ordering: str = "dfs",
     ) -> None:
         """
         Parameters
@@ -35,38 +44,79 @@ class PP2UVAutoSquare:
         uvset  : 出力先 UV セット名
         src_uv : コピー元 UV セット名
         mincol : 最小列数
+        batch  : True なら MFnMesh で UV 配列を直接書き込む一括モード
+                 （polyProjection / polyEditUV を使わず、履歴も作らない）
+        profile: True / パスなら工程ごとの時間と cmds 呼び出し回数を JSON に保存
+                 （True なら一時フォルダの PP2UVAutoSquare.pp2profile.json）
+        ordering: セルの並べ方 "dfs" / "bfs" / "sibling" / "morton"（pp2_layout.ORDERINGS）
+                 親子のテクセルが近いほど PP2 シェーダーの親たどりがキャッシュに乗る
         """
+        if ordering not in ORDERINGS:
+            raise ValueError(f"ordering は {ORDERINGS} のいずれか: {ordering}")
         self.root   = root or self._get_root_from_selection()
         self.UVSET  = uvset   or self.UVSET
         self.SRC_UV = src_uv  or self.SRC_UV
         self.MINCOL = mincol  or self.MINCOL
+        self.batch  = batch
+        self.ordering = ordering
+        self.profile  = profile
+        self.profiler = NULL_PROFILER
 
     # ------------------------------------------------------------------
     def execute(self) -> None:
         """メイン処理"""
-        trs  = list(self._walk(self.root))
-        n    = len(trs)
-        cols = self._best_cols(n)
-        rows = int(math.ceil(n / float(cols)))
+        prof = self.profiler = make_profiler(self.profile, "PP2UVAutoSquare")
 
-        du = 1.0 / cols
-        dv = 1.0 / rows
+        with prof.attach():
+            with prof.stage("snapshot"):
+                snap = snapshot(self.root)
+            n    = len(snap)
+            cols = self._best_cols(n)
+            rows = int(math.ceil(n / float(cols)))
 
-        for i, tr in enumerate(trs):
-            col_idx = i % cols
-            row_idx = i // cols
-            u = du * (col_idx + 0.5)
-            v = 1.0 - dv * (row_idx + 0.5)
+            dv = 1.0 / rows
 
-            for mesh in cmds.listRelatives(tr, s=True, ni=True,
-                                           f=True, type="mesh") or []:
-                self._ensure_uv(mesh)
-                cmds.polyEditUV(mesh + ".map[*]", u=u, v=v, su=0, sv=0)
+            cells  = order_cells(snap.parents, snap.depths, cols, rows, self.ordering)
+            layout = PP2Layout(cols, rows, relative_paths(snap.paths), cells,
+                               self.UVSET, self.ordering)
+            self.write_layout(snap.meshes, layout)
 
         msg = f"{self.UVSET}: cols={cols} rows={rows}   RowHeight={dv:.5f}"
+        if prof.enabled:
+            prof.note(nodes=n, grid=[rows, cols], batch=self.batch,
+                      meshes=sum(map(len, snap.meshes)), ordering=self.ordering,
+                      memo=snap.memo,
+                      parent_distance=layout.parent_distance(snap.parents))
+            print(f"[PP2] profile → {prof.save()}")
+            msg += "  | " + prof.summary()
         cmds.inViewMessage(amg=msg, pos="midCenter", fade=True)
         print(f"★ UE の Material Instance で RowHeight = {dv:.5f}")
 
+    # ------------------------------------------------------------------
+    def write_layout(self, meshes: list[list[str]], layout: PP2Layout) -> None:
+        """
+        layout のセル中心を各 Transform の mesh に書き込み、記録を保存する
+
+        meshes : Transform ごとの mesh リスト（layout.paths と同じ並び）
+        """
+        us, vs = layout.cell_centers()
+        # UV の書き込みと pp2Layout の保存を 1 回の Ctrl+Z で戻せるようにする
+        cmds.undoInfo(openChunk=True, chunkName="PP2UVAutoSquare")
+        try:
+            with self.profiler.stage("layout"):
+                if self.batch:
+                    self._layout_batch(meshes, us, vs)
+                else:
+                    for ms, u, v in zip(meshes, us.tolist(), vs.tolist()):
+                        for mesh in ms:
+                            self._ensure_uv(mesh)
+                            cmds.polyEditUV(mesh + ".map[*]", u=u, v=v, su=0, sv=0)
+
+            with self.profiler.stage("save_layout"):
+                self._save_layout(layout)
+        finally:
+            cmds.undoInfo(closeChunk=True)
+
     # ------------------------------------------------------------------
     # private utility
     # ------------------------------------------------------------------
@@ -77,16 +127,6 @@ class PP2UVAutoSquare:
             cmds.error("幹 Transform を 1 つ選択してください")
         return sel[0]
 
-    @staticmethod
-    def _walk(root: str):
-        """root 以下の Transform 階層を深さ優先で列挙"""
-        st = [root]
-        while st:
-            n = st.pop()
-            yield n
-            st.extend(cmds.listRelatives(n, c=True, f=True,
-                                         type="transform") or [])
-
     # ----------------------------------------
     def _ensure_uv(self, mesh: str) -> None:
         """
@@ -100,12 +140,49 @@ class PP2UVAutoSquare:
         cmds.polyUVSet(mesh, e=True, uvSet=self.UVSET, currentUVSet=True)
         cmds.polyProjection(mesh + ".f[*]", md="x", ibd=True, ch=False)
 
+    # ----------------------------------------
+    def _layout_batch(self, meshes: list[list[str]], us, vs) -> None:
+        """
+        各 mesh の UVSET を「全フェース頂点 → UV 1 点」に直接書き換える
+
+        MFnMesh の配列書き込みはそれだけでは undo キューに積まれないので、
+        書き込む前の UVSET（無ければ「無い」こと）を退避し、pp2Undoable
+        コマンド 1 回として登録する（Ctrl+Z で退避した UV に戻す）。
+        退避は mesh ごとの UV 配列のコピーなので、その分メモリを使う。
+        """
+        sl, uv = om2.MSelectionList(), []
+        for ms, u, v in zip(meshes, us.tolist(), vs.tolist()):
+            for mesh in ms:
+                sl.add(mesh)
+                uv.append((u, v))
+
+        log = EditLog()
+
+        def apply():
+            for k, (u, v) in enumerate(uv):
+                fn = om2.MFnMesh(sl.getDagPath(k))
+                counts, ids = fn.getVertices()
+                log.set(functools.partial(set_uv_state, fn, self.UVSET),
+                        uv_state(fn, self.UVSET),
+                        ([u], [v], counts, om2.MIntArray(len(ids), 0)))
+
+        commit(apply, log.undo, log.redo)
+
     # ----------------------------------------
     def _best_cols(self, n: int) -> int:
         """n ピースをほぼ正方形に近い分割にする列数を返す"""
-        root = int(math.sqrt(n))
-        cand = [max(self.MINCOL, root + i) for i in range(0, 3)]
-        return min(cand, key=lambda c: abs(math.ceil(n / float(c)) - c))
+        return best_cols(n, self.MINCOL)
+
+    # ----------------------------------------
+    def _save_layout(self, layout: PP2Layout) -> None:
+        """
+        レイアウトをルートの pp2Layout アトリビュートに保存
+        （エクスポーターは UV を読まずにグリッドを復元できる）
+        """
+        if not cmds.attributeQuery(PP2Layout.ATTR, node=self.root, exists=True):
+            cmds.addAttr(self.root, ln=PP2Layout.ATTR, dt="string")
+        cmds.setAttr(f"{self.root}.{PP2Layout.ATTR}", layout.to_json(),
+                     type="string")
 
 
 # ----------------------------------------------------------------------
@@ -120,6 +197,15 @@ class PP2UVAutoSquare:
 #   ── 任意で ────────────────────────────
 #       tool = pp2.PP2UVAutoSquare(uvset="my_uv", mincol=4)
 #       tool.execute()
+#
+#   ── 1 万要素以上は一括モード ─────────────
+#       pp2.PP2UVAutoSquare(batch=True).execute()
+#
+#   ── 親子テクセルを近づける並べ方（Z 曲線）───────
+#       pp2.PP2UVAutoSquare(batch=True, ordering="morton").execute()
+#
+#   ── 工程ごとの時間 / cmds 呼び出し回数を JSON に ──
+#       pp2.PP2UVAutoSquare(profile="D:/PP2_out/uv_profile.json").execute()
 # ----------------------------------------------------------------------
 if __name__ == "__main__":
     PP2UVAutoSquare().execute()
@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+"""テスト用：リポジトリ直下のモジュール（pp2_*.py）を import できるようにする"""
+
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
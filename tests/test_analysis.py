@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+pp2_analysis.MeshStats を mesh ごとの素朴な計算と突き合わせる
+
+    python -m pytest -q tests
+"""
+
+import numpy as np
+
+from pp2_analysis import MeshStats, pivot_points, x_directions
+
+
+def _meshes(counts, seed=0):
+    rng = np.random.default_rng(seed)
+    pts = [rng.normal(size=(c, 3)) * (4.0, 1.0, 0.25) + rng.normal(scale=1e3, size=3)
+           for c in counts]
+    return pts, np.concatenate(pts) if pts else np.empty((0, 3))
+
+
+def test_stats_match_per_mesh():
+    counts = [5, 40, 3, 17]
+    pts, cat = _meshes(counts)
+    stats = MeshStats(cat, counts)
+    assert stats.valid.all()
+    for k, p in enumerate(pts):
+        assert np.allclose(stats.centroids[k], p.mean(0))
+        assert np.array_equal(stats.mins[k], p.min(0))
+        assert np.array_equal(stats.maxs[k], p.max(0))
+        w, v = np.linalg.eigh(np.cov(p.T, bias=True))
+        assert np.allclose(stats.extents[k], w[::-1])
+        assert np.allclose(np.abs(stats.axes[k, 0] @ v[:, -1]), 1.0)   # 最長主軸
+
+
+def test_empty_meshes_are_masked():
+    counts = [0, 6, 0, 0, 9, 0]
+    pts, cat = _meshes(counts, seed=1)
+    stats = MeshStats(cat, counts)
+    assert stats.valid.tolist() == [c > 0 for c in counts]
+
+    ref = MeshStats(cat, [6, 9])                    # 空を除いたもの
+    for a, b in ((stats.centroids, ref.centroids), (stats.extents, ref.extents),
+                 (stats.mins, ref.mins)):
+        assert np.isnan(a[~stats.valid]).all()
+        assert np.allclose(a[stats.valid], b)
+
+    pivots = np.zeros((len(counts), 3))
+    for mode in ("centroid", "bbox", "base"):
+        got = pivot_points(stats, mode, pivots)
+        assert np.allclose(got[stats.valid], pivot_points(ref, mode, pivots[:2]))
+    for mode in ("bbox", "centroid", "principal"):
+        got = x_directions(stats, mode, pivots)
+        assert np.isnan(got[~stats.valid]).all()
+        assert np.allclose(got[stats.valid], x_directions(ref, mode, pivots[:2]))
+
+
+def test_all_empty():
+    stats = MeshStats(np.empty((0, 3)), [0, 0])
+    assert not stats.valid.any()
+    assert np.isnan(stats.centroids).all()
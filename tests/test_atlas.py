@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+pp2_atlas の行ブロック割り当てと、書き出したアトラスの読み戻し
+
+    python -m pytest -q tests
+"""
+
+import json
+import numpy as np
+import pytest
+
+from pp2_atlas import PP2Atlas, write_atlas
+from pp2_layout import ORDERINGS
+from pp2_runtime import decode_textures, unpack_parent
+
+from test_encode import _tree
+
+
+def _snaps():
+    return [_tree(30, seed=1), _tree(12, seed=2), _tree(45, seed=3)]
+
+
+@pytest.mark.parametrize("ordering", ORDERINGS)
+def test_blocks_stay_inside(ordering):
+    snaps = _snaps()
+    atlas = PP2Atlas(snaps, names=["a", "b", "c"], ordering=ordering)
+    assert atlas.block_rows.sum() == atlas.rows
+    assert atlas.offsets.tolist() == [0, *np.cumsum(atlas.block_rows)[:-1].tolist()]
+
+    tex  = atlas.encode(("pivotpos",))["pivotpos"]
+    ptex = unpack_parent(tex[..., 3]).ravel()
+    seen = []
+    for s, lay, off, rows in zip(snaps, atlas.layouts, atlas.offsets.tolist(),
+                                 atlas.block_rows.tolist()):
+        lo, hi = off * atlas.cols, (off + rows) * atlas.cols
+        assert lay.shape == atlas.shape
+        assert ((lay.cells >= lo) & (lay.cells < hi)).all()         # 自分の行ブロック
+        assert rows * atlas.cols >= len(s)
+        parent = ptex[lay.cells]
+        assert ((parent >= lo) & (parent < hi)).all()               # 親も同じブロック
+        want = np.where(s.parents >= 0, lay.cells[s.parents], lay.cells)
+        assert parent.tolist() == want.tolist()                     # ルートは自分自身
+        seen += lay.cells.tolist()
+    assert len(set(seen)) == len(seen) == sum(map(len, snaps))      # セルの重複なし
+
+
+def test_write_and_decode(tmp_path):
+    snaps = _snaps()
+    atlas = PP2Atlas(snaps, names=["a", "b", "c"], ordering="morton")
+    res = write_atlas(atlas, str(tmp_path), "forest",
+                      formats={"pivotpos": "npy", "xvector": "npy"})
+
+    with open(res["manifest"], encoding="utf-8") as f:
+        man = json.load(f)
+    assert [a["name"] for a in man["assets"]] == ["a", "b", "c"]
+    assert [a["row_offset"] for a in man["assets"]] == atlas.offsets.tolist()
+    assert man["textures"] == {"pivotpos": "forest_pivotpos.npy",
+                               "xvector": "forest_xvector.npy"}
+
+    dec = decode_textures(np.load(res["outputs"]["pivotpos"]),
+                          np.load(res["outputs"]["xvector"]))
+    assert len(dec) == sum(map(len, snaps))
+    roots = dec.cells[dec.parents < 0]
+    assert sorted(roots.tolist()) == sorted(int(lay.cells[0]) for lay in atlas.layouts)
+
+    # 要素ごとの深度と、アセットのルート基準の ΔX / ΔY が元と合う
+    lookup = {c: k for k, c in enumerate(dec.cells.tolist())}
+    for s, lay in zip(snaps, atlas.layouts):
+        k = [lookup[c] for c in lay.cells.tolist()]
+        assert dec.depths[k].tolist() == s.depths.tolist()
+        rel = s.pivots - s.pivots[0]
+        assert np.allclose(dec.pivots[k][:, [0, 1]], rel[:, [0, 1]], atol=1e-3)
+        assert np.allclose(dec.pivots[k][:, 2], s.pivots[:, 2], atol=1e-3)
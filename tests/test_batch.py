@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+pp2_batch の一括処理を JSON シーン（JsonSceneAdapter）で Maya なしに確かめる
+
+    python -m pytest -q tests
+
+ワーカーは spawn で起動した別プロセス。テクスチャは画像ライブラリの要らない
+.npy で書き出す。
+"""
+
+import json
+import os
+import numpy as np
+import pytest
+
+from pp2_batch import JsonSceneAdapter, SceneAdapter, run_batch
+from pp2_layout import PP2Layout
+from pp2_runtime import unpack_parent
+
+NPY = {"pivotpos": "npy", "xvector": "npy"}
+
+
+def _scene(path, roots):
+    """roots ごとに 幹 1 + 枝 2 + 葉 2×2 の階層を持つ JSON シーンを書く"""
+    nodes, k = [], 0
+    for root in roots:
+        nodes.append({"path": f"|{root}", "pivot": [0.0, 0.0, 0.0]})
+        for b in range(2):
+            branch = f"|{root}|b{b}"
+            nodes.append({"path": branch, "pivot": [b + 1.0, 5.0, 0.0]})
+            for l in range(2):
+                k += 1
+                m = np.eye(4)
+                m[3, :3] = (b + 1.0, 6.0 + l, k)
+                nodes.append({"path": f"{branch}|l{l}", "matrix": m.ravel().tolist()})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"nodes": nodes}, f)
+    return str(path)
+
+
+def _job(scene, roots, out_dir, **kw):
+    return {"scene": scene, "roots": roots, "out_dir": str(out_dir),
+            "formats": NPY, **kw}
+
+
+def test_run_batch(tmp_path):
+    a = _scene(tmp_path / "a.json", ["trunk"])
+    b = _scene(tmp_path / "b.json", ["tree1", "tree2"])
+    jobs = [
+        _job(a, ["trunk"], tmp_path / "out_a", save=True),
+        _job(b, ["tree1", "tree2"], tmp_path / "out_b"),
+        _job(str(tmp_path / "missing.json"), ["trunk"], tmp_path / "out_x"),
+        _job(b, ["tree2"], tmp_path / "out_b2", ordering="morton"),   # 同じシーンを別ルートで
+    ]
+    done = []
+    summary = run_batch(jobs, adapter="json", workers=2,
+                        progress=lambda d, t, r: done.append((d, t)))
+
+    assert summary["workers"] == 2
+    assert (summary["ok"], summary["failed"]) == (3, 1)
+    assert sorted(done) == [(i, 4) for i in range(1, 5)]
+    res = summary["jobs"]
+    assert [r["scene"] for r in res] == [j["scene"] for j in jobs]     # jobs の並び
+    assert [r["ok"] for r in res] == [True, True, False, True]
+    assert res[2]["error"].startswith("FileNotFoundError")
+    assert [[x["root"] for x in r["roots"]] for r in res] == \
+        [["|trunk"], ["|tree1", "|tree2"], [], ["|tree2"]]
+    assert res[3]["roots"][0]["ordering"] == "morton"
+
+    for r in (res[0], res[1], res[3]):
+        for x in r["roots"]:
+            assert x["nodes"] == 7
+            for k, p in x["outputs"].items():
+                tex = np.load(p)
+                assert tex.shape == (x["rows"], x["cols"], 4)
+                if k == "pivotpos":
+                    # 埋まったセル（親インデックスが正）がノード数だけある
+                    assert (unpack_parent(tex[..., 3]) >= 0).sum() == 7
+    assert sorted(os.listdir(tmp_path / "out_b")) == [
+        "b_tree1_pivotpos.npy", "b_tree1_xvector.npy",
+        "b_tree2_pivotpos.npy", "b_tree2_xvector.npy"]
+
+    # save したシーンだけレイアウトが書き戻される
+    with open(a, encoding="utf-8") as f:
+        nodes = json.load(f)["nodes"]
+    layout = PP2Layout.from_json(nodes[0][PP2Layout.ATTR])
+    assert layout.shape == (res[0]["roots"][0]["rows"], res[0]["roots"][0]["cols"])
+    assert all("uv" in n for n in nodes)
+    with open(b, encoding="utf-8") as f:
+        assert all("uv" not in n for n in json.load(f)["nodes"])
+
+
+def test_adapter_must_implement_all_methods():
+    class Partial(SceneAdapter):
+        def open(self, path):
+            pass
+
+    with pytest.raises(TypeError):
+        Partial()
+    JsonSceneAdapter()
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+pp2_cache の差分再計算とスキップを write_textures(cache=True) で確かめる
+
+    python -m pytest -q tests
+
+差分で作ったテクスチャは、キャッシュなしで全体を書き直したものと一致すること。
+"""
+
+import os
+import numpy as np
+import pytest
+
+from pp2_layout import PP2Layout
+from pp2_writers import write_textures
+
+from test_encode import _tree
+
+NPY = {"pivotpos": "npy", "xvector": "npy"}
+
+
+def _write(snap, layout, out_dir, cache=True, **kw):
+    kw.setdefault("formats", NPY)
+    return write_textures(snap, layout.cells, layout.shape, str(out_dir), "t",
+                          cache=cache, **kw)
+
+
+def _same_as_full(res, snap, layout, tmp_path):
+    """res の出力が、キャッシュなしで全体を書いたものと一致するか"""
+    full = _write(snap, layout, tmp_path / "full", cache=False)
+    for k, p in res["outputs"].items():
+        assert np.array_equal(np.load(p), np.load(full["outputs"][k])), k
+
+
+def test_skip_and_partial_recompute(tmp_path):
+    snap   = _tree(60)
+    layout = PP2Layout.for_paths(snap.paths)
+    out    = tmp_path / "out"
+
+    res = _write(snap, layout, out)
+    assert not res["skipped"] and res["recomputed"] == {"pivotpos": 60, "xvector": 60}
+    res = _write(snap, layout, out)                 # 何も変わっていない
+    assert res["skipped"] and res["recomputed"] == {}
+
+    # 1 ノード：ピボットだけ → 両方とも 1 テクセル
+    snap.pivots[7] += (1.0, 2.0, 3.0)
+    res = _write(snap, layout, out)
+    assert res["recomputed"] == {"pivotpos": 1, "xvector": 1}
+    _same_as_full(res, snap, layout, tmp_path)
+
+    # 2 ノード：行列
+    m = snap.matrices.reshape(-1, 4, 4)
+    m[[12, 40], 0, :3] = m[[12, 40], 1, :3]
+    res = _write(snap, layout, out)
+    assert res["recomputed"] == {"pivotpos": 2, "xvector": 2}
+    _same_as_full(res, snap, layout, tmp_path)
+
+    # ルートが動くと PivotPosition（ルート基準）は全体、X-Vector は 1 つ
+    snap.pivots[0] += 5.0
+    res = _write(snap, layout, out)
+    assert res["recomputed"] == {"pivotpos": 60, "xvector": 1}
+    _same_as_full(res, snap, layout, tmp_path)
+
+
+def test_reorder_moves_cells(tmp_path):
+    snap = _tree(60)
+    out  = tmp_path / "out"
+    _write(snap, PP2Layout.for_paths(snap.paths), out)
+
+    # 同じ格子で並べ方だけ変える → 動いたセルは旧セルを空けて書き直す
+    layout = PP2Layout.for_paths(snap.paths, ordering="morton")
+    res = _write(snap, layout, out)
+    moved = int((layout.cells != PP2Layout.for_paths(snap.paths).cells).sum())
+    assert not res["skipped"] and 0 < res["recomputed"]["xvector"] <= 60
+    assert res["recomputed"]["xvector"] >= moved
+    _same_as_full(res, snap, layout, tmp_path)
+
+
+def test_options_change_rewrites(tmp_path):
+    pytest.importorskip("OpenEXR")
+    snap   = _tree(30)
+    layout = PP2Layout.for_paths(snap.paths)
+    out    = tmp_path / "out"
+    fmt    = {"pivotpos": "exr", "xvector": "npy"}
+
+    assert not _write(snap, layout, out, formats=fmt)["skipped"]
+    # 既定値を明示しても同じ設定
+    assert _write(snap, layout, out, formats=fmt,
+                  exr_options={"compression": "zip", "half_rgb": False})["skipped"]
+    res = _write(snap, layout, out, formats=fmt, exr_options={"compression": "piz"})
+    assert not res["skipped"] and res["recomputed"] == {"pivotpos": 0, "xvector": 0}
+    assert _write(snap, layout, out, formats=fmt,
+                  exr_options={"compression": "piz"})["skipped"]
+
+    # 形式の変更（同じパスでも）→ 書き直し。npy だけなら exr_options は関係ない
+    assert not _write(snap, layout, out)["skipped"]
+    assert _write(snap, layout, out, exr_options={"compression": "none"})["skipped"]
+
+
+def test_corrupt_cache_is_rebuilt(tmp_path):
+    snap   = _tree(20)
+    layout = PP2Layout.for_paths(snap.paths)
+    out    = tmp_path / "out"
+    _write(snap, layout, out)
+    with open(os.path.join(out, "t.pp2cache.npz"), "r+b") as f:
+        f.truncate(100)
+    res = _write(snap, layout, out)
+    assert not res["skipped"] and res["recomputed"] == {"pivotpos": 20, "xvector": 20}
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+pp2_encode / pp2_writers の出力を旧来の Transform ごとの計算と突き合わせる
+
+    python -m pytest -q tests
+
+旧 PP2PivotPosExporter / PP2XVectorExporter の export() のループ
+（_enum_tree・round(u, 6) のグリッド・enum2grid.get(pidx, 0)・DEPTH_A.get）を
+そのまま書き写したものを基準にする。ただしルートの親テクセルだけは旧来の
+enum2grid.get(-1, 0) = セル 0 ではなく、ルート自身のセルにしている
+（dfs 以外ではセル 0 が無関係な要素になるため。dfs では同じ値）。
+"""
+
+import os
+import numpy as np
+import pytest
+
+from pp2_encode import (DEPTH_ALPHA, encode_pivot_position, encode_xvector,
+                        grid_from_uvs, pack_parent, parent_cells)
+from pp2_hierarchy import PP2Snapshot
+from pp2_layout import ORDERINGS, PP2Layout, parent_distance
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# ----------------------------------------------------------------------
+# 旧来の計算（Transform ごと）
+# ----------------------------------------------------------------------
+def _legacy_pack_parent(idx):
+    return (1024 + idx) / float(2**24)
+
+
+def _legacy_grid(uv_u, uv_v, n):
+    u_set = {round(u, 6) for u in uv_u}
+    v_set = {round(v, 6) for v in uv_v}
+    cols, rows = sorted(u_set), sorted(v_set, reverse=True)
+    u_idx = {u: i for i, u in enumerate(cols)}
+    v_idx = {v: i for i, v in enumerate(rows)}
+    rc = [(v_idx[round(uv_v[i], 6)], u_idx[round(uv_u[i], 6)]) for i in range(n)]
+    return rc, (len(rows), len(cols))
+
+
+def _legacy_pivotpos(parents, pivots, rc, shape):
+    nC  = shape[1]
+    enum2grid = {i: r * nC + c for i, (r, c) in enumerate(rc)}
+    tex = np.zeros(shape + (4,), np.float32)
+    root = pivots[0]
+    for i, (r, c) in enumerate(rc):
+        dv = pivots[i] - root
+        tex[r, c, 0] = dv[0]
+        tex[r, c, 1] = pivots[i][2]
+        tex[r, c, 2] = dv[1]
+        tex[r, c, 3] = _legacy_pack_parent(enum2grid.get(int(parents[i]), 0))
+    return tex
+
+
+def _legacy_xvector(depths, matrices, rc, shape):
+    depth_a = {0: 19/255.0, 1: 7/255.0, 2: 5.5/255.0, 3: 5/255.0}
+    tex = np.zeros(shape + (4,), np.float32)
+    for i, (r, c) in enumerate(rc):
+        m  = matrices[i]
+        vx = np.array(m[0:3]) / np.linalg.norm(m[0:3])
+        tex[r, c, 0] = vx[0] * 0.5 + 0.5
+        tex[r, c, 1] = vx[2] * 0.5 + 0.5
+        tex[r, c, 2] = vx[1] * 0.5 + 0.5
+        tex[r, c, 3] = depth_a.get(int(depths[i]), 5/255.0)
+    return tex
+
+
+# ----------------------------------------------------------------------
+def _tree(n=60, seed=0):
+    """深さ 5 まである小さな階層（深さ優先のパス）とワールド行列・ピボット"""
+    rng = np.random.default_rng(seed)
+    paths = ["|root"]
+    for i in range(1, n):
+        parent = paths[rng.integers(max(0, i - 4), i)]
+        if parent.count("|") > 5:
+            parent = paths[0]
+        paths.append(f"{parent}|n{i}")
+    order = sorted(range(n), key=lambda i: paths[i].split("|"))
+    paths = [paths[i] for i in order]                # 深さ優先順に並べ直す
+
+    mtx = np.tile(np.eye(4), (n, 1, 1))
+    q, _ = np.linalg.qr(rng.normal(size=(n, 3, 3)))
+    mtx[:, :3, :3] = q * rng.uniform(0.5, 3.0, (n, 1, 1))   # スケール付き
+    mtx[:, 3, :3]  = rng.normal(scale=50.0, size=(n, 3))
+    pivots = rng.normal(scale=50.0, size=(n, 3))
+    return PP2Snapshot.from_paths(paths, mtx.reshape(n, 16), pivots)
+
+
+@pytest.fixture(params=ORDERINGS)
+def case(request):
+    snap   = _tree()
+    layout = PP2Layout.for_paths(snap.paths, ordering=request.param)
+    us, vs = layout.cell_centers()
+    rc, shape = _legacy_grid(us.tolist(), vs.tolist(), len(snap))
+    return snap, layout, us, vs, rc, shape
+
+
+# ----------------------------------------------------------------------
+def test_grid_from_uvs_matches_legacy(case):
+    snap, layout, us, vs, rc, shape = case
+    cells, grid = grid_from_uvs(np.stack([us, vs], 1))
+    assert grid == shape == layout.shape
+    assert cells.tolist() == [r * shape[1] + c for r, c in rc]
+    assert np.array_equal(cells, layout.cells)
+
+
+def test_grid_from_uvs_merges_float_noise():
+    uv = np.array([[0.1, 0.9], [0.1 + 2e-8, 0.9 - 2e-8], [0.3, 0.9]])
+    cells, grid = grid_from_uvs(uv)
+    assert grid == (1, 2)
+    assert cells.tolist() == [0, 0, 1]
+
+
+def test_pivot_position_matches_legacy(case):
+    snap, layout, us, vs, rc, shape = case
+    want = _legacy_pivotpos(snap.parents, snap.pivots, rc, shape)
+    got  = encode_pivot_position(snap.pivots, snap.parents, layout.cells, shape)
+    r, c = rc[0]
+    if layout.ordering == "dfs":
+        assert (r, c) == (0, 0)                     # ルートがセル 0 なら旧来と全く同じ
+    want[r, c, 3] = pack_parent(layout.cells[0])    # ルートの親は自分自身のセル
+    assert np.array_equal(got, want)                # R = ΔX, G = Z, B = ΔY, A 同じ
+
+
+def test_xvector_matches_legacy(case):
+    snap, layout, us, vs, rc, shape = case
+    assert snap.depths.max() > 3                    # DEPTH_ALPHA の頭打ちを通す
+    want = _legacy_xvector(snap.depths, snap.matrices, rc, shape)
+    got  = encode_xvector(snap.matrices, snap.depths, layout.cells, shape)
+    assert np.allclose(got, want, atol=1e-7)
+
+
+def test_pack_parent_and_root_fallback():
+    idx = np.arange(0, 5000, 7)
+    assert np.array_equal(pack_parent(idx), [_legacy_pack_parent(int(i)) for i in idx])
+    cells = np.array([5, 3, 9, 0])
+    got = parent_cells([-1, 0, 1, 0], cells)
+    # ルートは自分自身のセル（旧来の enum2grid.get(-1, 0) = 0 とは違う）
+    assert got.tolist() == [5, 5, 3, 5]
+    # 一部だけ渡す時は own が各要素自身のセル
+    assert parent_cells([1, -1], cells, own=[0, 9]).tolist() == [3, 9]
+
+
+def test_root_parent_is_own_cell_in_every_ordering():
+    from pp2_atlas import PP2Atlas
+    snap = _tree(50)
+    for ordering in ORDERINGS:
+        layout = PP2Layout.for_paths(snap.paths, ordering=ordering)
+        tex = encode_pivot_position(snap.pivots, snap.parents, layout.cells, layout.shape)
+        r, c = divmod(int(layout.cells[0]), layout.cols)
+        assert tex[r, c, 3] == pack_parent(layout.cells[0])
+
+        # アトラスに 1 つだけ入れても同じ A になる
+        atlas = PP2Atlas([snap], mincol=layout.cols, ordering=ordering)
+        assert atlas.shape == layout.shape
+        assert np.array_equal(atlas.encode(("pivotpos",))["pivotpos"], tex)
+
+
+def test_parent_distance():
+    # 3 列：ルート (0,0)、子 (0,2)・(1,0)、孫 (1,2)（親は (0,2)）
+    parents, cells = [-1, 0, 0, 1], [0, 2, 3, 5]
+    assert parent_distance(parents, cells, 3) == pytest.approx((2 + 1 + 1) / 3)
+    # 2 段上まで：孫 → ルート (1,2)-(0,0) = √5 が加わる
+    assert parent_distance(parents, cells, 3, levels=2) == \
+        pytest.approx((2 + 1 + 1 + np.sqrt(5)) / 4)
+    assert parent_distance([-1], [0], 3) == 0.0
+
+    snap = _tree(200)
+    d = {o: PP2Layout.for_paths(snap.paths, ordering=o).parent_distance(snap.parents)
+         for o in ORDERINGS}
+    assert d["sibling"] < d["bfs"]                  # 兄弟をまとめると親に近い
+    assert all(v > 0 for v in d.values())
+
+
+def test_depth_alpha_clamp():
+    from pp2_encode import depth_alpha
+    d = np.array([0, 1, 2, 3, 4, 7, -1])
+    want = [DEPTH_ALPHA.get(int(k), 5/255.0) for k in d]
+    assert np.allclose(depth_alpha(d), want)
+
+
+# ----------------------------------------------------------------------
+# 同梱サンプルとの往復
+# ----------------------------------------------------------------------
+def test_write_textures_reproduces_samples(tmp_path):
+    pytest.importorskip("OpenEXR")
+    pytest.importorskip("PIL")
+    from pp2_runtime import decode_textures, load_texture
+    from pp2_writers import write_textures
+
+    piv_src = os.path.join(HERE, "pp2_pivotposSample.exr")
+    xv_src  = os.path.join(HERE, "pp2_xvectorSample.png")
+    dec = decode_textures(piv_src, xv_src)
+
+    # デコードした要素から同じ並びのスナップショットを組み直す
+    n = len(dec)
+    snap = PP2Snapshot(n)
+    snap.paths = [f"|n{i}" for i in range(n)]
+    snap.parents[:] = dec.parents
+    snap.depths[:]  = dec.depths
+    snap.pivots[:]  = dec.pivots
+    mtx = np.tile(np.eye(4), (n, 1, 1))
+    mtx[:, 0, :3] = dec.xaxis
+    snap.matrices[:] = mtx.reshape(n, 16)
+
+    res = write_textures(snap, dec.cells, dec.shape, str(tmp_path), "rt")
+    piv_src, piv_out = load_texture(piv_src), load_texture(res["outputs"]["pivotpos"])
+    xv_src,  xv_out  = load_texture(xv_src), load_texture(res["outputs"]["xvector"])
+
+    assert piv_out.shape == piv_src.shape
+    assert np.array_equal(piv_out, piv_src)
+    # X-Vector は 8-bit → 単位化 → 8-bit なので 1 段までの差を許す
+    assert np.abs(xv_out - xv_src).max() <= 1.0 / 255 + 1e-6
+    assert np.array_equal(xv_out[..., 3], xv_src[..., 3])
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+pp2_lod の階層のたたみ方と LOD 一式の書き出し
+
+    python -m pytest -q tests
+"""
+
+import json
+import os
+import numpy as np
+import pytest
+
+from pp2_layout import PP2Layout
+from pp2_lod import PP2LOD, lod_chain, write_lods
+
+from test_encode import _tree
+
+LEVELS = (3, 2, 1)
+
+
+@pytest.fixture
+def chain():
+    snap = _tree(60)
+    assert snap.depths.max() > LEVELS[0]
+    base = PP2Layout.for_paths(snap.paths, ordering="sibling")
+    return snap, base, lod_chain(snap, LEVELS, base.cells, base.shape)
+
+
+def test_lod0_keeps_hierarchy_and_grid(chain):
+    snap, base, lods = chain
+    lod0 = lods[0]
+    assert lod0.max_depth is None and len(lod0) == len(snap)
+    assert lod0.owners.tolist() == list(range(len(snap)))
+    assert np.array_equal(lod0.layout.cells, base.cells)
+    assert lod0.layout.shape == base.shape
+
+
+def test_depth_cap_and_owners(chain):
+    snap, base, lods = chain
+    assert [lod.max_depth for lod in lods[1:]] == list(LEVELS)
+    for lod in lods[1:]:
+        d = lod.max_depth
+        sub = lod.snap
+        assert sub.depths.max() == d - 1                  # 深さ d 以上は残らない
+        assert len(sub) == int((snap.depths < d).sum())
+        # 残ったノードの親は LOD 内で同じノード（パスで照合）
+        for i, p in enumerate(sub.parents.tolist()):
+            want = sub.paths[i].rpartition("|")[0]
+            assert (p < 0 and i == 0) or sub.paths[p] == want
+
+        for i, o in enumerate(lod.owners.tolist()):
+            src, dst = snap.paths[i], sub.paths[o]
+            if snap.depths[i] < d:
+                assert dst == src                         # たたまれないノードは自分
+            else:
+                assert src.startswith(dst + "|")          # 祖先にまとめられる
+                assert sub.depths[o] == d - 1
+
+        us, vs = lod.node_uvs()
+        cu, cv = lod.layout.cell_centers()
+        assert np.array_equal(us, cu[lod.owners]) and np.array_equal(vs, cv[lod.owners])
+
+
+def test_max_depth_must_be_positive():
+    with pytest.raises(ValueError):
+        PP2LOD(_tree(10), 0)
+
+
+def test_write_lods_manifest(chain, tmp_path):
+    snap, base, lods = chain
+    res = write_lods(lods, str(tmp_path), "tree",
+                     formats={"pivotpos": "npy", "xvector": "npy"})
+    with open(res["manifest"], encoding="utf-8") as f:
+        man = json.load(f)
+
+    assert man["root"] == snap.root
+    assert [e["lod"] for e in man["lods"]] == [0, 1, 2, 3]
+    assert [e["max_depth"] for e in man["lods"]] == [None, *LEVELS]
+    assert len(res["outputs"]) == len(lods)
+    for e, lod, out in zip(man["lods"], lods, res["outputs"]):
+        assert e["nodes"] == len(lod)
+        assert e["owners"] == lod.owners.tolist()
+        assert e["cells"] == lod.layout.cells.tolist()
+        assert (e["rows"], e["cols"]) == lod.layout.shape
+        for k, p in out.items():
+            assert e["textures"][k] == os.path.basename(p)
+            assert np.load(p).shape == lod.layout.shape + (4,)
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        ["tree_lods.json", "tree_pivotpos.npy", "tree_xvector.npy"]
+        + [f"tree_lod{i}_{k}.npy" for i in (1, 2, 3) for k in ("pivotpos", "xvector")])
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+pp2_profile の cmds 呼び出し回数をフェイク Maya の記録と突き合わせる
+
+    python -m pytest -q tests
+
+プロファイルは maya.cmds そのものを差し替えるので、ツール本体だけでなく
+pp2_index / pp2_undo など別モジュールからの呼び出しも数えること。
+"""
+
+import json, os, sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for p in (os.path.join(ROOT, "benchmarks", "fakemaya"),
+          os.path.join(ROOT, "benchmarks")):
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+import maya.cmds as cmds
+from maya import _scene
+from synth import build_tree
+
+from pp2_profile import PP2Profiler
+from set_pp2UV import PP2UVAutoSquare
+
+
+def _fake_counts() -> dict:
+    return {k[len("cmds."):]: v for k, v in _scene.CALLS.items()
+            if k.startswith("cmds.")}
+
+
+@pytest.mark.parametrize("batch", [True, False])
+def test_counts_match_fake_maya(tmp_path, batch):
+    root = build_tree(30)
+    tool = PP2UVAutoSquare(root, batch=batch, profile=str(tmp_path / "p.json"))
+    _scene.reset_calls()
+    tool.execute()
+
+    with open(tmp_path / "p.json", encoding="utf-8") as f:
+        rep = json.load(f)
+    expect = _fake_counts()
+    expect.pop("inViewMessage")             # 計測の外（結果表示）
+    assert rep["cmds"] == expect
+    assert rep["cmds_total"] == sum(expect.values())
+    if batch:                               # pp2_undo 経由の呼び出しも入る
+        assert rep["cmds"]["pp2Undoable"] == 1
+
+
+def test_overlapping_profiles_and_restore():
+    originals = {k: getattr(cmds, k) for k in dir(cmds) if not k.startswith("_")}
+    outer, inner = PP2Profiler("outer", "-"), PP2Profiler("inner", "-")
+    with outer.attach():
+        cmds.ls(sl=True)
+        with inner.attach():
+            cmds.ls(sl=True)
+            cmds.objExists("|nope")
+        cmds.ls(sl=True)
+    cmds.ls(sl=True)                        # 計測の外
+
+    assert outer.calls == {"ls": 3, "objExists": 1}
+    assert inner.calls == {"ls": 1, "objExists": 1}
+    assert {k: getattr(cmds, k) for k in originals} == originals
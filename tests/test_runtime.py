@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+pp2_runtime のデコードを確かめる（壊れたテクスチャを含む）
+
+    python -m pytest -q tests
+"""
+
+import numpy as np
+import pytest
+
+from pp2_encode import encode_pivot_position, encode_xvector
+from pp2_runtime import PP2Decoded, decode_textures
+
+
+def _decoded(parents):
+    n = len(parents)
+    return PP2Decoded((1, n), np.arange(n), np.zeros((n, 3)), parents,
+                      np.tile([1.0, 0.0, 0.0], (n, 1)), np.ones(n, np.int64))
+
+
+def test_depths_follow_parents():
+    dec = _decoded([-1, 0, 1, 1, 0])
+    assert dec.depths.tolist() == [0, 1, 2, 2, 1]
+    assert [lv.tolist() for lv in dec.levels()] == [[0], [1, 4], [2, 3]]
+
+
+@pytest.mark.parametrize("parents, bad", [
+    ([1, 0], [0, 1]),                   # 2 要素の循環
+    ([-1, 1, 1], [1, 2]),               # 自分自身が親（とその子）
+])
+def test_cyclic_parents_raise(parents, bad):
+    with pytest.raises(ValueError, match="循環") as err:
+        _decoded(parents)
+    assert str(bad) in str(err.value)
+
+
+def test_decode_cyclic_textures():
+    # 親セルが互いを指すテクスチャ（どちらも深度 1 の α）
+    pivots   = np.zeros((2, 3))
+    matrices = np.tile(np.eye(4).ravel(), (2, 1))
+    cells    = np.array([0, 1])
+    piv = encode_pivot_position(pivots, np.array([1, 0]), cells, (1, 2))
+    xv  = encode_xvector(matrices, np.array([1, 1]), cells, (1, 2))
+    with pytest.raises(ValueError, match="循環"):
+        decode_textures(piv, xv)
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+pp2_shells のシェル分け・最近傍・階層組み立てを小さな結合 mesh で確かめる
+
+    python -m pytest -q tests
+
+scipy の有無で結果が変わらないよう、最近傍は総当たりの経路を通す。
+"""
+
+import sys
+import numpy as np
+import pytest
+
+import pp2_shells
+from pp2_shells import PP2ShellForest, nearest, shell_labels
+
+# 立方体の 6 面（頂点 0..3 が始点側、4..7 が終点側）
+_BOX_FACES = [(0, 1, 2, 3), (4, 7, 6, 5), (0, 4, 5, 1),
+              (1, 5, 6, 2), (2, 6, 7, 3), (3, 7, 4, 0)]
+
+
+@pytest.fixture(autouse=True)
+def brute_force(monkeypatch):
+    """scipy.spatial を import できないようにして総当たりの最近傍を使う"""
+    monkeypatch.setitem(sys.modules, "scipy.spatial", None)
+
+
+def _stick(p0, p1, w=0.05):
+    """p0 → p1 の細い角柱 (8 頂点, 6 四角形)"""
+    p0, p1 = np.asarray(p0, float), np.asarray(p1, float)
+    d = (p1 - p0) / np.linalg.norm(p1 - p0)
+    a = np.cross(d, (0.0, 0.0, 1.0) if abs(d[2]) < 0.9 else (1.0, 0.0, 0.0))
+    a /= np.linalg.norm(a)
+    b = np.cross(d, a)
+    ring = [a + b, a - b, -a - b, -a + b]
+    return np.array([p0 + w * r for r in ring] + [p1 + w * r for r in ring])
+
+
+def _combine(sticks):
+    """角柱を 1 つの mesh (points, counts, ids) に結合"""
+    pts, ids = [], []
+    for k, s in enumerate(sticks):
+        pts.append(s)
+        ids += [8 * k + v for f in _BOX_FACES for v in f]
+    return np.concatenate(pts), [4] * (6 * len(sticks)), ids
+
+
+def _tree():
+    return _combine([
+        _stick((0, 0, 0), (0, 10, 0)),          # 幹
+        _stick((0.1, 9.5, 0), (4, 12, 0)),      # 枝（幹の 0.25 倍以上。幹の上端から）
+        _stick((4.1, 12.1, 0), (4.6, 12.4, 0)), # 枝先の葉
+    ])
+
+
+# ----------------------------------------------------------------------
+def test_shell_labels():
+    pts, counts, ids = _tree()
+    labels, n = shell_labels(counts, ids, len(pts) + 2)    # 末尾 2 頂点は未使用
+    assert n == 3
+    assert labels.tolist() == [0] * 8 + [1] * 8 + [2] * 8 + [-1, -1]
+
+
+def test_shell_labels_joins_shared_vertices():
+    # 2 つの三角形が頂点 2 を共有 → 1 シェル。3 つ目は別
+    labels, n = shell_labels([3, 3, 3], [0, 1, 2, 2, 3, 4, 5, 6, 7])
+    assert n == 2
+    assert labels.tolist() == [0] * 5 + [1] * 3
+
+
+def test_nearest_brute_force(monkeypatch):
+    monkeypatch.setattr(pp2_shells, "NEAREST_BLOCK", 64)    # 行ブロックを複数回す
+    rng = np.random.default_rng(0)
+    points, queries = rng.normal(size=(50, 3)), rng.normal(size=(30, 3))
+    d, k = nearest(points, queries)
+    full = np.linalg.norm(queries[:, None] - points[None], axis=2)
+    assert k.tolist() == full.argmin(axis=1).tolist()
+    assert np.allclose(d, full.min(axis=1))
+
+
+def test_forest_hierarchy():
+    pts, counts, ids = _tree()
+    forest = PP2ShellForest(pts, counts, ids, name="tree")
+    T, B, L = forest.TRUNK, forest.BRANCH, forest.LEAF
+
+    assert forest.kinds.tolist() == [T, B, L]
+    assert forest.parents.tolist() == [-1, 0, 1]
+    assert forest.depths.tolist() == [0, 1, 2]
+    assert np.allclose(forest.pivots[0], (0, 0, 0), atol=0.1)    # 幹は下端
+    assert np.allclose(forest.pivots[1], (0.1, 9.5, 0), atol=0.1)   # 枝は幹側の端
+    assert np.allclose(forest.pivots[2], (4.1, 12.1, 0), atol=0.1)
+    x = forest.xdirs[1] / np.linalg.norm(forest.xdirs[1])           # +X は先端へ
+    assert x @ np.array((3.9, 2.5, 0)) / np.hypot(3.9, 2.5) > 0.99
+
+    snap = forest.snapshot
+    assert snap.paths == ["|tree", "|tree|branch_1", "|tree|branch_1|leaf_2"]
+    assert snap.parents.tolist() == [-1, 0, 1]
+    assert forest.face_vertex_nodes().tolist() == [0] * 24 + [1] * 24 + [2] * 24
+
+    meshes = list(forest.shell_meshes())
+    assert [m[0].tolist() for m in meshes] == [list(range(8 * k, 8 * k + 8)) for k in range(3)]
+    for verts, cnt, fv in meshes:
+        assert cnt.tolist() == [4] * 6
+        assert fv.tolist() == [v for f in _BOX_FACES for v in f]
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+pp2_validate.validate_arrays が壊したテクスチャの問題を正しい項目で報告するか
+
+    python -m pytest -q tests
+"""
+
+import numpy as np
+import pytest
+
+from pp2_encode import encode_pivot_position, encode_xvector, pack_parent
+from pp2_hierarchy import PP2Snapshot
+from pp2_layout import PP2Layout
+from pp2_validate import validate_arrays
+
+
+@pytest.fixture
+def export():
+    """深さ 2 までの階層（幹 1・枝 4・葉 12）とそのテクスチャ"""
+    paths = ["|trunk"]
+    for b in range(4):
+        paths.append(f"|trunk|b{b}")
+        paths += [f"|trunk|b{b}|l{k}" for k in range(3)]
+    n   = len(paths)
+    rng = np.random.default_rng(0)
+    mtx = np.tile(np.eye(4), (n, 1, 1))
+    mtx[:, :3, :3], _ = np.linalg.qr(rng.normal(size=(n, 3, 3)))
+    snap = PP2Snapshot.from_paths(paths, mtx.reshape(n, 16), rng.normal(size=(n, 3)))
+    layout = PP2Layout.for_paths(snap.paths, ordering="sibling")
+    piv = encode_pivot_position(snap.pivots, snap.parents, layout.cells, layout.shape)
+    xv  = encode_xvector(snap.matrices, snap.depths, layout.cells, layout.shape)
+    return snap, layout, piv.copy(), xv.copy()
+
+
+def _check(snap, cells, piv, xv):
+    return validate_arrays(piv, xv, snap.pivots, snap.matrices, snap.parents,
+                           snap.depths, cells, 0, None, snap.paths)
+
+
+def _texel(layout, i):
+    return divmod(int(layout.cells[i]), layout.cols)
+
+
+def test_clean_export_is_ok(export):
+    snap, layout, piv, xv = export
+    rep = _check(snap, layout.cells, piv, xv)
+    assert rep.ok and rep.issues == {}
+    assert rep.summary()["ok"] is True
+    assert rep.lines()[0].startswith("[PP2] validate OK")
+
+
+def test_cell_collision(export):
+    snap, layout, piv, xv = export
+    cells = layout.cells.copy()
+    cells[5] = cells[6]                             # 2 つの Transform が同じセル
+    rep = _check(snap, cells, piv, xv)
+    assert not rep.ok
+    assert rep.issues["collision"].tolist() == [5, 6]
+    assert rep.summary()["issues"]["collision"]["sample"] == [snap.paths[5], snap.paths[6]]
+
+
+def test_parent_out_of_range(export):
+    snap, layout, piv, xv = export
+    r, c = _texel(layout, 3)
+    piv[r, c, 3] = pack_parent(layout.rows * layout.cols + 10)   # グリッドの外
+    rep = _check(snap, layout.cells, piv, xv)
+    assert rep.issues["parent"].tolist() == [3]
+    assert rep.issues["parent_target"].tolist() == [3]
+    assert set(rep.issues) == {"parent", "parent_target"}
+
+
+def test_parent_fallback_to_cell_zero(export):
+    snap, layout, piv, xv = export
+    i = int(np.flatnonzero((snap.parents >= 0) & (layout.cells[snap.parents] != 0))[0])
+    r, c = _texel(layout, i)
+    piv[r, c, 3] = pack_parent(0)
+    rep = _check(snap, layout.cells, piv, xv)
+    assert set(rep.issues) == {"parent_fallback"}
+    assert rep.issues["parent_fallback"].tolist() == [i]
+
+
+def test_zero_xaxis(export):
+    snap, layout, piv, xv = export
+    r, c = _texel(layout, 4)
+    xv[r, c, :3] = 0.5                              # (0, 0, 0) 軸
+    rep = _check(snap, layout.cells, piv, xv)
+    assert rep.issues["zero_xaxis"].tolist() == [4]
+    assert rep.issues["xvector"].tolist() == [4]
+    assert "alpha" not in rep.issues
+
+
+def test_wrong_alpha(export):
+    snap, layout, piv, xv = export
+    r, c = _texel(layout, 2)
+    assert snap.depths[2] == 2
+    xv[r, c, 3] = 19 / 255.0                        # 深度 0 の α
+    rep = _check(snap, layout.cells, piv, xv)
+    assert set(rep.issues) == {"alpha"}
+    assert rep.issues["alpha"].tolist() == [2]
+    assert not rep.summary()["ok"]